@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
+
+    def ready(self):
+        # Connects the signal receivers that keep the SIS session pool in sync with logins.
+        from . import sessions  # noqa: F401
+        # Registers the system checks for the core settings.
+        from . import checks  # noqa: F401
@@ -0,0 +1,102 @@
+# core/async_client.py
+import asyncio
+from typing import Type
+
+from .async_network import AsyncHttpClient
+from .documents import ParseTarget
+from .endpoints import Endpoint
+from .exceptions import SessionExpiredError
+from .parsers import BaseParser, run_parser
+
+
+class AsyncEmpowerClient:
+    """
+    The asyncio counterpart of EmpowerClient, for async views under ASGI.
+
+    It offers the same get/post/ajax_post API on top of an AsyncHttpClient, so a
+    single worker can serve many users while they wait on the SIS. Parsers run in
+    a worker thread. The response cache and request coalescing are features of the
+    blocking EmpowerClient and are not applied here.
+    """
+
+    def __init__(self, username, password, http_client: AsyncHttpClient = None):
+        """
+        Initializes the client.
+
+        Args:
+            username (str): The SIS username.
+            password (str): The SIS password.
+            http_client (AsyncHttpClient, optional): An existing async client to use,
+                e.g. one continuing a pooled session. A new one is created when omitted.
+        """
+        self._username = username
+        self._http_client = http_client or AsyncHttpClient(username, password)
+
+    async def get(self, endpoint: Endpoint, parser_class: Type[BaseParser]):
+        """
+        Performs a GET request for a page, processes it with the specified parser,
+        and returns the data.
+        """
+        document = await self._http_client.get(endpoint, parser_class.target)
+        return await asyncio.to_thread(run_parser, parser_class, document)
+
+    async def post(self, endpoint: Endpoint, payload: dict, parser_class: Type[BaseParser]):
+        """
+        Sends a POST request with a payload to a fuseaction.
+        """
+        document = await self._http_client.post(endpoint, payload, parser_class.target)
+        return await asyncio.to_thread(run_parser, parser_class, document)
+
+    async def ajax_post(self, initial_endpoint: Endpoint, token_name: str, cfc_url: str, method: str, payload: dict, parser_class: Type[BaseParser]):
+        """
+        Performs a two-step AJAX POST request by first visiting a page to get a dynamic token.
+        Tokens are cached and refreshed on rejection exactly as in EmpowerClient.ajax_post.
+        """
+        token_key = (initial_endpoint.fuseaction, token_name)
+        dynamic_token = self._http_client._tokens.get(token_key)
+        token_was_cached = dynamic_token is not None
+        if not token_was_cached:
+            dynamic_token = await self._fetch_token(initial_endpoint, token_name)
+
+        try:
+            return await self._ajax_call(cfc_url, method, {**payload, token_name: dynamic_token}, initial_endpoint, parser_class)
+        except SessionExpiredError:
+            self._http_client._tokens.pop(token_key, None)
+            if not token_was_cached:
+                raise
+            dynamic_token = await self._fetch_token(initial_endpoint, token_name)
+            return await self._ajax_call(cfc_url, method, {**payload, token_name: dynamic_token}, initial_endpoint, parser_class)
+
+    async def _fetch_token(self, initial_endpoint: Endpoint, token_name: str) -> str:
+        """
+        Scrapes a dynamic token from the initial page and caches it for this session.
+        """
+        host_page = await self._http_client.get(initial_endpoint, ParseTarget(name='input', attrs={'name': token_name}))
+
+        token_input = host_page.find('input', {'name': token_name})
+
+        if not token_input or not token_input.get('value'):
+            raise Exception(f"Could not find a valid token named '{token_name}' on the initial page.")
+
+        self._http_client._tokens[(initial_endpoint.fuseaction, token_name)] = token_input['value']
+        return token_input['value']
+
+    async def _ajax_call(self, cfc_url: str, method: str, payload: dict, initial_endpoint: Endpoint, parser_class: Type[BaseParser]):
+        """
+        Makes the actual .cfc request and parses the response.
+        """
+        ajax_document = await self._http_client.ajax_post(cfc_url, method, payload, initial_endpoint.parser_backend,
+                                                          parser_class.target)
+        return await asyncio.to_thread(run_parser, parser_class, ajax_document)
+
+    async def __aenter__(self):
+        """
+        Enters the async context manager.
+        """
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        """
+        Exits the async context manager, ensuring the session is closed.
+        """
+        await self._http_client.aclose()
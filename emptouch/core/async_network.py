@@ -0,0 +1,226 @@
+# core/async_network.py
+import asyncio
+import logging
+import time
+from contextlib import nullcontext
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+from .documents import Node, ParseTarget, parse_document
+from .endpoints import LOGOUT
+from .exceptions import AuthenticationError, NavigationError, SessionExpiredError, SISTimeoutError
+from .network import BaseHttpClient, HttpClient
+from .ratelimit import rate_limiter
+from .resilience import circuit_breaker
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncHttpClient(BaseHttpClient):
+    """
+    An asyncio counterpart of HttpClient built on httpx.AsyncClient, with the same
+    get/post/ajax_post API and the same login and SessionExpiredError re-login
+    semantics. Parsing runs in a worker thread so large pages don't stall the loop.
+
+    The underlying connection pool is bound to the event loop it was first used
+    on, so an instance should not outlive the request that created it; use
+    `from_client()` / `sync_to()` to carry the session over from a pooled HttpClient.
+    """
+
+    def __init__(self, username, password, **kwargs):
+        super().__init__(username, password, **kwargs)
+        try:
+            import httpx
+        except ImportError:
+            raise ImproperlyConfigured("AsyncHttpClient requires the 'httpx' package.")
+        self._httpx = httpx
+        pool = getattr(settings, 'EMPTOUCH_SIS_CONNECTION_POOL', {})
+        pool_maxsize = pool.get('POOL_MAXSIZE', 16)
+        limits = httpx.Limits(max_connections=pool_maxsize if pool.get('POOL_BLOCK', False) else None,
+                              max_keepalive_connections=pool_maxsize)
+        self._client = httpx.AsyncClient(headers={'User-Agent': self.USER_AGENT}, follow_redirects=True, limits=limits,
+                                         timeout=httpx.Timeout(self.read_timeout, connect=self.connect_timeout))
+        self._login_lock = asyncio.Lock()
+
+    @classmethod
+    def from_client(cls, http_client: HttpClient) -> 'AsyncHttpClient':
+        """
+        Creates an async client that continues the SIS session of a blocking one.
+        """
+        async_client = cls(http_client._username, http_client._password,
+                           navigation_url=http_client.navigation_url, auth_url=http_client.auth_url)
+        if http_client._is_logged_in:
+            async_client.load_cookies(http_client.export_cookies(), http_client.authenticated_at)
+            async_client._tokens.update(http_client._tokens)
+        return async_client
+
+    def sync_to(self, http_client: HttpClient):
+        """
+        Copies this client's (possibly refreshed) session back into a blocking client.
+        """
+        if self._is_logged_in:
+            http_client.load_cookies(self.export_cookies(), self.authenticated_at)
+            http_client._tokens.update(self._tokens)
+
+    @property
+    def _cookie_jar(self):
+        return self._client.cookies.jar
+
+    async def _send(self, method: str, url: str, retry: bool = None, **kwargs):
+        """
+        Sends a single HTTP request under the same rate limiter, timeouts, retry
+        policy and circuit breaker as HttpClient._send.
+        """
+        fuseaction = (kwargs.get('params') or {}).get('fuseaction')
+        retries = self._retries_for(method, retry)
+
+        for attempt in range(retries + 1):
+            circuit_breaker.before_request(url)
+            response = failure = None
+            try:
+                async with nullcontext() if self._offline else rate_limiter.alimit(url, fuseaction):
+                    started = time.perf_counter()
+                    # Streamed, so that the time to the response headers (TTFB) can be
+                    # told apart from the download.
+                    response = await self._client.send(self._client.build_request(method, url, **kwargs), stream=True)
+                    ttfb = time.perf_counter() - started
+                    try:
+                        await response.aread()
+                    finally:
+                        await response.aclose()
+                    self._record_response(method, url, fuseaction, time.perf_counter() - started,
+                                          len(response.content), ttfb)
+            except self._httpx.TimeoutException as e:
+                failure = SISTimeoutError(f"{method} {url} timed out: {e}")
+            except self._httpx.TransportError as e:
+                failure = NavigationError(f"Could not connect to the SIS for {method} {url}: {e}")
+
+            delay = self._retry_delay(method, url, fuseaction, attempt, retries, response, failure)
+            if delay is None:
+                if failure is not None:
+                    raise failure
+                return response
+            await asyncio.sleep(delay)
+
+    async def _login(self):
+        """
+        Internal login method. Verifies success by checking that the response is NOT the login page.
+        """
+        if not self._password:
+            raise AuthenticationError("The SIS session expired and no password is available to log in again.")
+        try:
+            response = await self._send('POST', self.auth_url, data=self._login_payload())
+            response.raise_for_status()
+        except self._httpx.HTTPError as e:
+            raise AuthenticationError(f"An HTTP error occurred during authentication: {e}")
+        except NavigationError as e:
+            raise AuthenticationError(f"Could not reach the SIS to log in: {e}") from e
+
+        if await asyncio.to_thread(self._is_login_response, response.content):
+            return False
+        self._tokens.clear()
+        self._is_logged_in = True
+        self.authenticated_at = time.time()
+        return True
+
+    async def _ensure_logged_in(self, force=False, seen=None):
+        """
+        Logs in unless already logged in. Concurrent tasks share a single login;
+        see HttpClient._ensure_logged_in for `force` and `seen`.
+        """
+        async with self._login_lock:
+            if force and self.authenticated_at != seen:
+                # Another task already re-authenticated while we waited.
+                return
+            if force or not self._is_logged_in:
+                self._is_logged_in = False
+                await self._login()
+
+    async def _parse(self, response, endpoint, target: ParseTarget, description: str) -> Node:
+        """
+        Parses a navigation response off the event loop and checks for the login page.
+        """
+        def parse():
+            document = parse_document(response.content, endpoint.parser_backend, target)
+            if self._is_login_response(response.content, document if target is None else None):
+                raise SessionExpiredError(f"Session expired when {description} '{endpoint.fuseaction}'.")
+            return document
+
+        return await asyncio.to_thread(parse)
+
+    async def get(self, endpoint, target: ParseTarget = None) -> Node:
+        """
+        Performs a GET request with automatic session management.
+        """
+        await self._ensure_logged_in()
+        seen = self.authenticated_at
+        try:
+            return await self._perform_get(endpoint, target)
+        except SessionExpiredError:
+            await self._ensure_logged_in(force=True, seen=seen)
+            return await self._perform_get(endpoint, target)
+
+    async def _perform_get(self, endpoint, target: ParseTarget = None) -> Node:
+        try:
+            response = await self._send('GET', self.navigation_url, params={'fuseaction': endpoint.fuseaction})
+            response.raise_for_status()
+        except self._httpx.HTTPError as e:
+            raise NavigationError(f"HTTP GET request failed for endpoint '{endpoint.fuseaction}': {e}")
+        return await self._parse(response, endpoint, target, 'requesting')
+
+    async def post(self, endpoint, payload: dict, target: ParseTarget = None) -> Node:
+        """
+        Performs a POST request with automatic session management.
+        """
+        await self._ensure_logged_in()
+        seen = self.authenticated_at
+        try:
+            return await self._perform_post(endpoint, payload, target)
+        except SessionExpiredError:
+            # If we get kicked out, re-login and retry once.
+            await self._ensure_logged_in(force=True, seen=seen)
+            return await self._perform_post(endpoint, payload, target)
+
+    async def _perform_post(self, endpoint, payload: dict, target: ParseTarget = None) -> Node:
+        try:
+            response = await self._send('POST', self.navigation_url, params={'fuseaction': endpoint.fuseaction}, data=payload)
+            response.raise_for_status()
+        except self._httpx.HTTPError as e:
+            raise NavigationError(f"HTTP POST request failed for endpoint '{endpoint.fuseaction}': {e}")
+        return await self._parse(response, endpoint, target, 'POSTing to')
+
+    async def ajax_post(self, cfc_url: str, method: str, payload: dict, parser_backend: str = None,
+                        target: ParseTarget = None) -> Node:
+        """
+        Performs a specialized AJAX POST request to a .cfc endpoint. Like
+        HttpClient.ajax_post, logs in again and raises SessionExpiredError
+        without retrying.
+        """
+        await self._ensure_logged_in()
+        seen = self.authenticated_at
+        full_url = f"{cfc_url}?method={method}"
+        try:
+            response = await self._send('POST', full_url, data=payload, headers=self._ajax_headers())
+            response.raise_for_status()
+        except self._httpx.HTTPError as e:
+            raise NavigationError(f"AJAX POST request failed for URL '{full_url}': {e}")
+
+        def parse():
+            document = parse_document(response.content, parser_backend, target)
+            return document, self._is_login_response(response.content, document if target is None else None)
+
+        document, expired = await asyncio.to_thread(parse)
+        if expired:
+            await self._ensure_logged_in(force=True, seen=seen)
+            raise SessionExpiredError(f"Session expired when POSTing to '{full_url}'.")
+        return document
+
+    async def aclose(self, logout=True):
+        """
+        Closes the connection pool, logging out of the SIS first unless logout=False.
+        """
+        try:
+            if logout: await self._send('GET', self.navigation_url, retry=False, params={'fuseaction': LOGOUT.fuseaction})
+        except (self._httpx.HTTPError, NavigationError): pass
+        finally: await self._client.aclose()
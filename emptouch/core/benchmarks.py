@@ -0,0 +1,262 @@
+# core/benchmarks.py
+import platform
+import statistics
+import time
+from contextlib import ExitStack, contextmanager
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from string import Template
+from typing import Callable, Iterator, List
+
+import django
+from django.core.exceptions import ImproperlyConfigured
+from django.test import RequestFactory
+
+from .client import EmpowerClient
+from .documents import BACKENDS, ParseTarget, parse_document
+from .endpoints import Endpoint
+from .fakesis import FakeSIS
+from .fakesis.server import PAGES_DIR
+from .network import HttpClient
+from .parsers import BaseParser
+from .ratelimit import rate_limiter
+
+
+@dataclass(frozen=True)
+class Benchmark:
+    """
+    A named operation to time. `setup` is a context manager factory yielding the
+    callable to time; whatever it sets up is torn down after the measurement.
+    """
+    name: str
+    setup: Callable[[], Iterator[Callable[[], object]]]
+
+
+BENCHMARKS: List[Benchmark] = []
+
+
+def benchmark(name: str):
+    """Registers a setup generator as a benchmark; see `Benchmark`."""
+    def decorator(func):
+        BENCHMARKS.append(Benchmark(name, contextmanager(func)))
+        return func
+    return decorator
+
+
+def measure(func: Callable[[], object], rounds: int = 5, min_round_time: float = 0.2) -> dict:
+    """
+    Times `func`, returning per-call statistics in seconds.
+
+    One warm-up call calibrates how many calls make up a round of at least
+    `min_round_time` seconds; `rounds` such rounds are then timed.
+    """
+    started = time.perf_counter()
+    func()
+    single = max(time.perf_counter() - started, 1e-7)
+    iterations = max(1, int(min_round_time / single))
+
+    samples = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        for _ in range(iterations):
+            func()
+        samples.append((time.perf_counter() - started) / iterations)
+
+    return {
+        'rounds': rounds,
+        'iterations': iterations,
+        'min': min(samples),
+        'median': statistics.median(samples),
+        'mean': statistics.fmean(samples),
+        'stdev': statistics.stdev(samples) if len(samples) > 1 else 0.0,
+    }
+
+
+def run(name_filter: str = None, rounds: int = 5, min_round_time: float = 0.2, log: Callable[[str], None] = None) -> dict:
+    """
+    Runs the registered benchmarks whose name contains `name_filter` and returns
+    a JSON-serializable report.
+    """
+    results = {}
+    for bench in BENCHMARKS:
+        if name_filter and name_filter not in bench.name:
+            continue
+        try:
+            with bench.setup() as func:
+                results[bench.name] = measure(func, rounds, min_round_time)
+        except ImproperlyConfigured as e:
+            # e.g. an optional parser backend that isn't installed.
+            if log:
+                log(f"{bench.name}: skipped ({e})")
+            continue
+        if log:
+            log(f"{bench.name}: {format_seconds(results[bench.name]['median'])} per call")
+    return {
+        'meta': {
+            'created': datetime.now(timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'platform': platform.platform(),
+            'rounds': rounds,
+        },
+        'results': results,
+    }
+
+
+def compare(baseline: dict, current: dict, threshold: float = 0.1) -> List[dict]:
+    """
+    Compares the medians of two reports. Returns one row per benchmark present in
+    both, flagged as a regression if it got slower by more than `threshold`.
+    """
+    rows = []
+    for name, result in current['results'].items():
+        before = baseline['results'].get(name)
+        if before is None:
+            continue
+        change = result['median'] / before['median'] - 1
+        rows.append({'name': name, 'before': before['median'], 'after': result['median'],
+                     'change': change, 'regression': change > threshold})
+    return rows
+
+
+def format_seconds(seconds: float) -> str:
+    for unit, scale in (('s', 1), ('ms', 1e-3), ('µs', 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.2f}{unit}"
+    return f"{seconds / 1e-9:.0f}ns"
+
+
+# --- Fixtures ---
+
+def _page(name: str, **values) -> bytes:
+    template = Template((PAGES_DIR / name).read_text(encoding='utf-8'))
+    return template.safe_substitute(username='student', token='0123456789abcdef', **values).encode('utf-8')
+
+
+def _large_page(copies: int = 10) -> bytes:
+    """The grades page with its table body repeated, about 240 KB at the default."""
+    page = _page('fuseactions/STUDENT.GRADES.html')
+    head, rest = page.split(b'<tbody>', 1)
+    rows, tail = rest.split(b'</tbody>', 1)
+    return head + b'<tbody>' + rows * copies + b'</tbody>' + tail
+
+
+class GradesParser(BaseParser):
+    """Extracts the rows of the fake SIS grades page."""
+    target = ParseTarget(name='table', attrs={'id': 'grades'})
+
+    def parse(self):
+        return [
+            {cell.get('class'): cell.text() for cell in row.find_all('td')}
+            for row in self.document.find_all('tr', {'class': 'grade-row'})
+        ]
+
+
+@contextmanager
+def _fake_sis(**options):
+    """A running FakeSIS, with the rate limiter (which guards the real SIS) off."""
+    limiter_enabled, rate_limiter.enabled = rate_limiter.enabled, False
+    try:
+        with FakeSIS(**options) as sis:
+            yield sis
+    finally:
+        rate_limiter.enabled = limiter_enabled
+
+
+def _client(sis: FakeSIS) -> EmpowerClient:
+    http_client = HttpClient('student', 'password', navigation_url=sis.navigation_url, auth_url=sis.auth_url)
+    return EmpowerClient('student', 'password', http_client=http_client)
+
+
+# --- Login detection ---
+
+def _login_detection(page_name: str, sniff: bool):
+    http_client = HttpClient('student', 'password')
+    content = _page(page_name, fuseaction='STUDENT.GRADES')
+    if sniff:
+        yield lambda: http_client._is_login_response(content)
+    else:
+        document = parse_document(content)
+        yield lambda: http_client._is_login_page(document)
+
+
+for _label, _page_name in (('login', 'login.html'), ('auth_failed', 'auth_failed.html'),
+                           ('normal', 'fuseactions/STUDENT.GRADES.html')):
+    benchmark(f'login_detection.is_login_page.{_label}')(
+        lambda page_name=_page_name: _login_detection(page_name, sniff=False))
+    benchmark(f'login_detection.is_login_response.{_label}')(
+        lambda page_name=_page_name: _login_detection(page_name, sniff=True))
+
+
+# --- Parsing ---
+
+def _parse(backend: str, target: ParseTarget = None):
+    content = _large_page()
+    parse_document(content, backend)  # Fails early if the backend isn't installed.
+    yield lambda: parse_document(content, backend, target)
+
+
+for _backend in BACKENDS:
+    benchmark(f'parse.{_backend}.full_page')(lambda backend=_backend: _parse(backend))
+    benchmark(f'parse.{_backend}.target')(lambda backend=_backend: _parse(backend, GradesParser.target))
+
+
+@benchmark('parse.grades_parser')
+def _grades_parser():
+    document = parse_document(_large_page(), target=GradesParser.target)
+    yield lambda: GradesParser(document).parse()
+
+
+# --- Client, end to end against the fake SIS ---
+
+@benchmark('client.get.grades')
+def _client_get():
+    with _fake_sis() as sis, _client(sis) as client:
+        endpoint = Endpoint('STUDENT.GRADES', coalesce=False)
+        yield lambda: client.get(endpoint, GradesParser)
+
+
+# --- Dashboard ---
+
+class _BenchmarkUser:
+    """Stands in for request.user, so the dashboard runs without a database."""
+    username = 'student'
+    is_authenticated = True
+    is_active = True
+
+    def has_perm(self, perm, obj=None):
+        return True
+
+
+def _dashboard(widget_count: int):
+    from . import widgets
+    from .views import DashboardView
+
+    with ExitStack() as stack:
+        sis = stack.enter_context(_fake_sis())
+        client = stack.enter_context(_client(sis))
+
+        def fetch(user, fuseaction):
+            return {'grades': client.get(Endpoint(fuseaction, coalesce=False), GradesParser)}
+
+        benchmark_widgets = [
+            widgets.Widget(
+                name=f'Benchmark {i}', permission_codename='auth.view_user',
+                template_name='core/benchmark_widget.html',
+                # Alternate pages, so each widget does real network and parsing work.
+                fetch_data_func=lambda user, fuseaction=('STUDENT.GRADES' if i % 2 == 0 else f'BENCH{i}'): fetch(user, fuseaction),
+            )
+            for i in range(widget_count)
+        ]
+        registry = widgets.WIDGET_REGISTRY[:]
+        widgets.WIDGET_REGISTRY[:] = benchmark_widgets
+        stack.callback(widgets.WIDGET_REGISTRY.__setitem__, slice(None), registry)
+
+        view = DashboardView.as_view()
+        request = RequestFactory().get('/')
+        request.user = _BenchmarkUser()
+        yield lambda: view(request)
+
+
+for _widget_count in (1, 4, 16):
+    benchmark(f'dashboard.widgets_{_widget_count}')(lambda widget_count=_widget_count: _dashboard(widget_count))
@@ -0,0 +1,140 @@
+# core/cache.py
+import hashlib
+import json
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Type
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import close_old_connections
+
+from .endpoints import Endpoint
+from .correlation import in_current_context
+from .parsers import BaseParser
+
+logger = logging.getLogger(__name__)
+
+
+class ResponseCache:
+    """
+    Caches parsed SIS results per (user, fuseaction, payload, parser) in the
+    Django cache framework, for endpoints that declare a `cache_ttl`.
+
+    Parsed results are stored rather than pages, so a hit skips both the network
+    and the parser; results must therefore be picklable. Within `stale_ttl` seconds
+    after expiring, an entry is still served while a single background refresh
+    fetches a new one (stale-while-revalidate).
+    """
+
+    def __init__(self, cache_alias=None, key_prefix='emptouch:response'):
+        self.cache_alias = cache_alias or getattr(settings, 'EMPTOUCH_RESPONSE_CACHE_ALIAS', 'default')
+        self.key_prefix = key_prefix
+        self._refresher = ThreadPoolExecutor(max_workers=4, thread_name_prefix='response-cache-refresh')
+
+    @property
+    def _cache(self):
+        return caches[self.cache_alias]
+
+    def get_or_fetch(self, username: str, endpoint: Endpoint, payload, parser_class: Type[BaseParser],
+                     fetch: Callable, detach: Callable[[], Callable] = None):
+        """
+        Returns the cached result for this request, calling `fetch()` on a miss.
+
+        Args:
+            username (str): The SIS user the result belongs to.
+            endpoint (Endpoint): The endpoint; its cache_ttl and stale_ttl apply.
+            payload (dict or None): The POST payload, or None for a GET.
+            parser_class (Type[BaseParser]): The parser that produced the result.
+            fetch (Callable): Performs the request and returns the parsed result.
+            detach (Callable, optional): Called on the request's thread when a
+                background refresh is scheduled; returns a fetch callable that
+                doesn't use the caller's client, which may be closed by the time
+                the refresh runs. Without it, stale entries are refreshed
+                synchronously with `fetch`.
+        """
+        key = self._key(username, endpoint, payload, parser_class)
+        entry = self._cache.get(key)
+        if entry is None:
+            return self._store(key, endpoint, fetch())
+
+        if time.time() > entry['fresh_until']:
+            if detach is None:
+                return self._store(key, endpoint, fetch())
+            self._refresh_in_background(key, endpoint, detach)
+        return entry['value']
+
+    def invalidate(self, username: str, endpoint: Endpoint = None):
+        """
+        Drops the user's cached results for one endpoint (any payload or parser),
+        or for every endpoint if none is given.
+        """
+        self._bump(self._generation_key(username, endpoint.fuseaction if endpoint else None))
+
+    def _store(self, key: str, endpoint: Endpoint, value):
+        entry = {'value': value, 'fresh_until': time.time() + endpoint.cache_ttl}
+        self._cache.set(key, entry, timeout=endpoint.cache_ttl + endpoint.stale_ttl)
+        return value
+
+    def _refresh_in_background(self, key: str, endpoint: Endpoint, detach: Callable[[], Callable]):
+        """
+        Schedules one refresh for a stale entry; concurrent readers keep serving it.
+        """
+        lock_key = f"{key}:refreshing"
+        if not self._cache.add(lock_key, True, timeout=max(endpoint.cache_ttl, 30)):
+            return
+        try:
+            fetch = detach()
+        except Exception:
+            self._cache.delete(lock_key)
+            raise
+
+        def refresh():
+            try:
+                self._store(key, endpoint, fetch())
+            except Exception:
+                # Keep serving the stale value; the next stale read will try again.
+                logger.warning("Background refresh of a stale '%s' entry failed.", endpoint.fuseaction, exc_info=True)
+            finally:
+                self._cache.delete(lock_key)
+                close_old_connections()
+
+        self._refresher.submit(in_current_context(refresh))
+
+    def _key(self, username: str, endpoint: Endpoint, payload, parser_class: Type[BaseParser]) -> str:
+        user_generation_key = self._generation_key(username)
+        endpoint_generation_key = self._generation_key(username, endpoint.fuseaction)
+        generations = self._cache.get_many([user_generation_key, endpoint_generation_key])
+        request = json.dumps([
+            endpoint.fuseaction,
+            sorted((str(k), str(v)) for k, v in (payload or {}).items()) if payload is not None else None,
+            f"{parser_class.__module__}.{parser_class.__qualname__}",
+            generations.get(user_generation_key, 0),
+            generations.get(endpoint_generation_key, 0),
+        ])
+        digest = hashlib.sha256(request.encode()).hexdigest()
+        return f"{self.key_prefix}:{self._user_hash(username)}:{digest}"
+
+    def _generation_key(self, username: str, fuseaction: str = None) -> str:
+        key = f"{self.key_prefix}:generation:{self._user_hash(username)}"
+        if fuseaction is not None:
+            key += f":{hashlib.sha256(fuseaction.encode()).hexdigest()[:16]}"
+        return key
+
+    def _bump(self, generation_key: str):
+        if not self._cache.add(generation_key, 1, timeout=None):
+            try:
+                self._cache.incr(generation_key)
+            except ValueError:
+                # The counter expired between add() and incr().
+                self._cache.add(generation_key, 1, timeout=None)
+
+    @staticmethod
+    def _user_hash(username: str) -> str:
+        # Keeps usernames out of cache keys and within memcached's key limits.
+        return hashlib.sha256(username.encode()).hexdigest()[:16]
+
+
+# The shared cache used by EmpowerClient.
+response_cache = ResponseCache()
@@ -0,0 +1,168 @@
+# core/cassette.py
+import base64
+import gzip
+import json
+import threading
+from collections import defaultdict
+from pathlib import Path
+from typing import Optional
+from urllib.parse import parse_qs, parse_qsl, urlsplit
+
+from django.conf import settings
+from requests import PreparedRequest, Response
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+from .exceptions import CassetteMissError
+
+RECORD = 'record'
+REPLAY = 'replay'
+
+# Form fields left out of the cassette: the password is a secret, and the login
+# timestamp differs on every run, so neither may take part in matching.
+REDACTED_FIELDS = {'empower_pswd', 'logoninfo'}
+
+# The only response headers worth keeping; cookies in particular are never stored.
+RECORDED_HEADERS = ('Content-Type', 'Location')
+
+
+class CassetteAdapter(HTTPAdapter):
+    """
+    A requests transport adapter that records SIS traffic to a cassette file, or
+    replays it from one without touching the network.
+
+    A cassette is a gzip-compressed JSON Lines file with one exchange per line:
+    the request's method, path, fuseaction, .cfc method and form payload (minus
+    REDACTED_FIELDS), and the response's status, a few headers and body. Requests
+    are matched on those fields, not the host, so traffic recorded against the
+    real SIS can be replayed wherever the client points. When an identical request
+    was recorded several times, replay serves the recordings in order and then
+    keeps repeating the last one.
+
+    Recorded pages contain whatever personal data the SIS showed; keep cassettes
+    out of version control unless they were recorded with a test account.
+
+    Args:
+        path (str or Path): The cassette file.
+        mode (str): RECORD or REPLAY.
+        transport (HTTPAdapter, optional): Performs the real requests when recording.
+    """
+
+    def __init__(self, path, mode: str, transport: HTTPAdapter = None):
+        super().__init__()
+        if mode not in (RECORD, REPLAY):
+            raise ValueError(f"Unknown cassette mode '{mode}'; use '{RECORD}' or '{REPLAY}'.")
+        self.path = Path(path)
+        self.mode = mode
+        self.transport = transport
+        self._lock = threading.Lock()
+        self._recordings = None
+        self._cursors = defaultdict(int)
+
+    def send(self, request: PreparedRequest, **kwargs) -> Response:
+        if self.mode == REPLAY:
+            return self._replay(request)
+        response = self.transport.send(request, **kwargs)
+        self._record(request, response)
+        return response
+
+    def close(self):
+        if self.transport is not None:
+            self.transport.close()
+
+    def _record(self, request: PreparedRequest, response: Response):
+        content = response.content
+        entry = {**self._describe(request), 'status': response.status_code,
+                 'headers': {name: response.headers[name] for name in RECORDED_HEADERS if name in response.headers}}
+        try:
+            entry['body'] = content.decode('utf-8')
+        except UnicodeDecodeError:
+            entry['body_base64'] = base64.b64encode(content).decode('ascii')
+
+        line = json.dumps(entry, separators=(',', ':')) + '\n'
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            # Each append adds a gzip member; readers see one continuous stream.
+            with gzip.open(self.path, 'at', encoding='utf-8') as cassette:
+                cassette.write(line)
+
+    def _replay(self, request: PreparedRequest) -> Response:
+        description = self._describe(request)
+        key = self._key(description)
+        with self._lock:
+            if self._recordings is None:
+                self._recordings = self._load()
+            recordings = self._recordings.get(key)
+            if not recordings:
+                raise CassetteMissError(
+                    f"No recorded response in '{self.path}' for {description['method']} {description['path']} "
+                    f"(fuseaction={description['fuseaction']}, method={description['cfc_method']})."
+                )
+            entry = recordings[min(self._cursors[key], len(recordings) - 1)]
+            self._cursors[key] += 1
+
+        response = Response()
+        response.status_code = entry['status']
+        response.headers = CaseInsensitiveDict(entry['headers'])
+        response.encoding = get_encoding_from_headers(response.headers)
+        response.url = request.url
+        response.request = request
+        response.connection = self
+        if 'body_base64' in entry:
+            response._content = base64.b64decode(entry['body_base64'])
+        else:
+            response._content = entry['body'].encode('utf-8')
+        response._content_consumed = True
+        return response
+
+    def _load(self) -> dict:
+        recordings = defaultdict(list)
+        if not self.path.exists():
+            return recordings
+        with gzip.open(self.path, 'rt', encoding='utf-8') as cassette:
+            for line in cassette:
+                if line.strip():
+                    entry = json.loads(line)
+                    recordings[self._key(entry)].append(entry)
+        return recordings
+
+    @staticmethod
+    def _describe(request: PreparedRequest) -> dict:
+        url = urlsplit(request.url)
+        query = parse_qs(url.query)
+        body = request.body or ''
+        if isinstance(body, bytes):
+            body = body.decode('utf-8', 'replace')
+        payload = sorted((k, v) for k, v in parse_qsl(body, keep_blank_values=True) if k not in REDACTED_FIELDS)
+        return {
+            'method': request.method,
+            'path': url.path,
+            'fuseaction': query.get('fuseaction', [None])[0],
+            'cfc_method': query.get('method', [None])[0],
+            'payload': payload,
+        }
+
+    @staticmethod
+    def _key(description: dict) -> str:
+        return json.dumps([description['method'], description['path'], description['fuseaction'],
+                           description['cfc_method'], [list(pair) for pair in description['payload']]])
+
+
+_cassette_adapter = None
+_cassette_adapter_lock = threading.Lock()
+
+
+def get_cassette_adapter(transport: HTTPAdapter) -> Optional[CassetteAdapter]:
+    """
+    Returns the process-wide cassette adapter configured in
+    settings.EMPTOUCH_SIS_CASSETTE, or None if recording and replay are off.
+    """
+    global _cassette_adapter
+    config = getattr(settings, 'EMPTOUCH_SIS_CASSETTE', None) or {}
+    if not config.get('MODE'):
+        return None
+    with _cassette_adapter_lock:
+        if _cassette_adapter is None:
+            _cassette_adapter = CassetteAdapter(config['PATH'], config['MODE'], transport)
+        return _cassette_adapter
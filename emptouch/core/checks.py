@@ -0,0 +1,21 @@
+# core/checks.py
+from django.core import checks
+
+from .cookie_store import get_cookie_store
+
+
+@checks.register(checks.Tags.caches)
+def check_cookie_store(app_configs, **kwargs):
+    """
+    Warns when EMPTOUCH_COOKIE_STORE is enabled but backed by a cache that other
+    worker processes can't see, since jars saved there are never shared.
+    """
+    store = get_cookie_store()
+    if store is None or store.shared:
+        return []
+    return [checks.Warning(
+        "EMPTOUCH_COOKIE_STORE uses a cache that isn't shared between processes, so SIS sessions "
+        "are still logged in once per worker.",
+        hint="Point its 'cache_alias' at a Redis, Memcached or DatabaseCache cache, or set it to None.",
+        id='core.W001',
+    )]
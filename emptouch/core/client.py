@@ -1,8 +1,37 @@
 # core/client.py
-from typing import Type
+import functools
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable, List, Optional, Tuple, Type
+
+from django.conf import settings
+
+from .cache import response_cache
+from .documents import ParseTarget
 from .endpoints import Endpoint
+from .exceptions import SessionExpiredError
 from .network import HttpClient
-from .parsers import BaseParser
+from .parsers import BaseParser, run_parser
+from .correlation import in_current_context
+from .singleflight import in_flight
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class BatchResult:
+    """
+    The outcome of one request in an EmpowerClient.get_many/post_many batch:
+    either the parsed `value`, or the `error` that request raised.
+    """
+    endpoint: Endpoint
+    value: Any = None
+    error: Optional[Exception] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
 
 
 class EmpowerClient:
@@ -11,15 +40,19 @@ class EmpowerClient:
     It delegates session management to the underlying HttpClient.
     """
 
-    def __init__(self, username, password):
+    def __init__(self, username, password, http_client: HttpClient = None):
         """
         Initializes the client.
         
         Args:
             username (str): The SIS username.
             password (str): The SIS password.
+            http_client (HttpClient, optional): An already configured (and possibly
+                authenticated) HttpClient to reuse, e.g. one checked out of the
+                session pool. A new one is created when omitted.
         """
-        self._http_client = HttpClient(username, password)
+        self._username = username
+        self._http_client = http_client or HttpClient(username, password)
 
     def get(self, endpoint: Endpoint, parser_class: Type[BaseParser]):
         """
@@ -32,41 +65,176 @@ class EmpowerClient:
 
         Returns:
             The structured data returned by the parser's .parse() method.
+            Served from the response cache if the endpoint declares a cache_ttl.
         """
-        soup = self._http_client.get(endpoint)
-        parser = parser_class(soup)
-        return parser.parse()
+        return self._execute('GET', endpoint, None, parser_class)
 
     def post(self, endpoint: Endpoint, payload: dict, parser_class: Type[BaseParser]):
         """
         Sends a POST request with a payload to a fuseaction.
         """
-        soup = self._http_client.post(endpoint, payload)
-        parser = parser_class(soup)
-        return parser.parse()
+        return self._execute('POST', endpoint, payload, parser_class)
+
+    def get_many(self, requests: Iterable[Tuple[Endpoint, Type[BaseParser]]],
+                 max_concurrency: int = None) -> List[BatchResult]:
+        """
+        Performs several GET requests concurrently on this client's SIS session.
+
+        Args:
+            requests: (endpoint, parser_class) pairs.
+            max_concurrency (int, optional): Maximum requests in flight at once.
+                Defaults to settings.EMPTOUCH_BATCH_MAX_CONCURRENCY.
+
+        Returns:
+            One BatchResult per request, in the same order. A failing request
+            records its exception instead of aborting the batch.
+        """
+        calls = [
+            (endpoint, functools.partial(self.get, endpoint, parser_class))
+            for endpoint, parser_class in requests
+        ]
+        return self._run_many(calls, max_concurrency)
+
+    def post_many(self, requests: Iterable[Tuple[Endpoint, dict, Type[BaseParser]]],
+                  max_concurrency: int = None) -> List[BatchResult]:
+        """
+        Performs several POST requests concurrently; see `get_many`.
+
+        Args:
+            requests: (endpoint, payload, parser_class) triples.
+        """
+        calls = [
+            (endpoint, functools.partial(self.post, endpoint, payload, parser_class))
+            for endpoint, payload, parser_class in requests
+        ]
+        return self._run_many(calls, max_concurrency)
+
+    def _run_many(self, calls: List[Tuple[Endpoint, Callable]], max_concurrency: int = None) -> List[BatchResult]:
+        """
+        Runs (endpoint, call) pairs on a bounded thread pool. Each worker fetches and
+        parses its own page, so parsing one page overlaps the network wait of others.
+        """
+        if max_concurrency is None:
+            max_concurrency = getattr(settings, 'EMPTOUCH_BATCH_MAX_CONCURRENCY', 4)
+
+        def run(endpoint: Endpoint, call: Callable) -> BatchResult:
+            try:
+                return BatchResult(endpoint, value=call())
+            except Exception as e:
+                return BatchResult(endpoint, error=e)
+
+        if not calls:
+            return []
+
+        # Log in once up front, rather than letting every worker race to do it.
+        try:
+            self._http_client._ensure_logged_in()
+        except Exception as e:
+            return [BatchResult(endpoint, error=e) for endpoint, _ in calls]
+
+        with ThreadPoolExecutor(max_workers=min(max_concurrency, len(calls)), thread_name_prefix='sis-batch') as executor:
+            futures = [executor.submit(in_current_context(functools.partial(run, endpoint, call)))
+                       for endpoint, call in calls]
+            return [future.result() for future in futures]
+
+    def invalidate_cache(self, endpoint: Endpoint = None):
+        """
+        Drops this user's cached results for one endpoint, or for all of them.
+        """
+        response_cache.invalidate(self._username, endpoint)
+
+    def _execute(self, method: str, endpoint: Endpoint, payload, parser_class: Type[BaseParser]):
+        """
+        Fetches and parses the page, coalescing the request with identical
+        in-flight ones and going through the response cache when the endpoint
+        opts into caching.
+        """
+        fetch = functools.partial(self._fetch, self._http_client, method, endpoint, payload, parser_class)
+        if endpoint.coalesce:
+            frozen_payload = tuple(sorted((str(k), str(v)) for k, v in payload.items())) if payload else None
+            key = (self._username, method, endpoint.fuseaction, frozen_payload, parser_class)
+            fetch = functools.partial(in_flight.do, key, fetch)
+
+        if not endpoint.cache_ttl:
+            return fetch()
+
+        def detach():
+            # Background refreshes run on a clone, since this client may be
+            # closed (and logged out) before the refresh gets to run.
+            http_client = self._http_client.clone()
+            authenticated_at = http_client.authenticated_at
+
+            def refresh():
+                try:
+                    return self._fetch(http_client, method, endpoint, payload, parser_class)
+                finally:
+                    # Only log out a session the clone had to open itself.
+                    http_client.close(logout=http_client.authenticated_at != authenticated_at)
+            return refresh
+
+        return response_cache.get_or_fetch(self._username, endpoint, payload, parser_class, fetch, detach)
+
+    @staticmethod
+    def _fetch(http_client: HttpClient, method: str, endpoint: Endpoint, payload, parser_class: Type[BaseParser]):
+        if method == 'GET':
+            document = http_client.get(endpoint, parser_class.target)
+        else:
+            document = http_client.post(endpoint, payload, parser_class.target)
+        return run_parser(parser_class, document)
 
     def ajax_post(self, initial_endpoint: Endpoint, token_name: str, cfc_url: str, method: str, payload: dict, parser_class: Type[BaseParser]):
         """
         Performs a two-step AJAX POST request by first visiting a page to get a dynamic token.
+
+        The token is cached for the current SIS session, so consecutive calls skip
+        the initial page. If a call made with a cached token gets the login page,
+        the token is treated as rejected: a fresh one is scraped and the call is
+        retried once. Anything else, including a response the parser can't read,
+        propagates without a retry, since the .cfc call isn't idempotent and may
+        already have taken effect.
+        """
+        token_key = (initial_endpoint.fuseaction, token_name)
+        dynamic_token = self._http_client._tokens.get(token_key)
+        token_was_cached = dynamic_token is not None
+        if not token_was_cached:
+            dynamic_token = self._fetch_token(initial_endpoint, token_name)
+
+        try:
+            return self._ajax_call(cfc_url, method, {**payload, token_name: dynamic_token}, initial_endpoint, parser_class)
+        except SessionExpiredError:
+            self._http_client._tokens.pop(token_key, None)
+            if not token_was_cached:
+                raise
+            logger.debug("Cached token '%s' was rejected; fetching a new one.", token_name)
+            dynamic_token = self._fetch_token(initial_endpoint, token_name)
+            return self._ajax_call(cfc_url, method, {**payload, token_name: dynamic_token}, initial_endpoint, parser_class)
+
+    def _fetch_token(self, initial_endpoint: Endpoint, token_name: str) -> str:
         """
-        print(f"DEBUG: Visiting initial page '{initial_endpoint.fuseaction}' to find token '{token_name}'...")
-        host_page_soup = self._http_client.get(initial_endpoint)
+        Scrapes a dynamic token from the initial page and caches it for this session.
+        """
+        logger.debug("Visiting initial page '%s' to find token '%s'...", initial_endpoint.fuseaction, token_name)
+        host_page = self._http_client.get(initial_endpoint, ParseTarget(name='input', attrs={'name': token_name}))
         
-        token_input = host_page_soup.find('input', {'name': token_name})
+        token_input = host_page.find('input', {'name': token_name})
         
         if not token_input or not token_input.get('value'):
             raise Exception(f"Could not find a valid token named '{token_name}' on the initial page.")
             
         dynamic_token = token_input['value']
-        print(f"DEBUG: Found dynamic token: {dynamic_token}")
-
-        payload[token_name] = dynamic_token
+        # The token itself is a session secret and is never logged.
+        logger.debug("Found dynamic token '%s'.", token_name)
+        self._http_client._tokens[(initial_endpoint.fuseaction, token_name)] = dynamic_token
+        return dynamic_token
 
-        print(f"DEBUG: Making AJAX POST to {cfc_url} with method {method}")
-        ajax_soup = self._http_client.ajax_post(cfc_url, method, payload)
-        
-        parser = parser_class(ajax_soup)
-        return parser.parse()
+    def _ajax_call(self, cfc_url: str, method: str, payload: dict, initial_endpoint: Endpoint, parser_class: Type[BaseParser]):
+        """
+        Makes the actual .cfc request and parses the response.
+        """
+        logger.debug("Making AJAX POST to %s with method %s", cfc_url, method)
+        ajax_document = self._http_client.ajax_post(cfc_url, method, payload, initial_endpoint.parser_backend,
+                                                    parser_class.target)
+        return run_parser(parser_class, ajax_document)
 
     def __enter__(self):
         """
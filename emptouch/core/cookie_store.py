@@ -0,0 +1,157 @@
+# core/cookie_store.py
+import base64
+import hashlib
+import json
+import time
+from abc import ABC, abstractmethod
+from typing import Optional
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.exceptions import ImproperlyConfigured
+from django.utils.module_loading import import_string
+
+# Bump this whenever the serialized layout changes; jars in an older format are ignored.
+FORMAT_VERSION = 1
+
+
+class BaseCookieJarStore(ABC):
+    """
+    Abstract base class for stores that share authenticated SIS cookie jars
+    between worker processes.
+
+    Jars are serialized to JSON, encrypted with settings.EMPTOUCH_COOKIE_STORE_KEY
+    and tagged with a format version, so that any worker can rehydrate a live SIS
+    session instead of logging the user in again.
+    """
+
+    def __init__(self, max_age=None):
+        """
+        Initializes the store.
+
+        Args:
+            max_age (float, optional): Seconds after which a saved jar is treated as
+                expired. Defaults to settings.EMPTOUCH_SESSION_IDLE_TIMEOUT.
+        """
+        try:
+            from cryptography.fernet import Fernet, MultiFernet
+        except ImportError:
+            raise ImproperlyConfigured("Sharing SIS cookie jars requires the 'cryptography' package.")
+
+        if max_age is None:
+            max_age = getattr(settings, 'EMPTOUCH_SESSION_IDLE_TIMEOUT', 15 * 60)
+        self.max_age = max_age
+        # A dedicated secret, not SECRET_KEY: the jars hold live SIS sessions. New
+        # jars are encrypted with the first key; the others still decrypt old ones.
+        keys = getattr(settings, 'EMPTOUCH_COOKIE_STORE_KEY', None)
+        if isinstance(keys, str):
+            keys = [keys]
+        if not keys:
+            raise ImproperlyConfigured("Sharing SIS cookie jars requires EMPTOUCH_COOKIE_STORE_KEY.")
+        self._fernet = MultiFernet([
+            Fernet(base64.urlsafe_b64encode(hashlib.sha256(key.encode()).digest())) for key in keys
+        ])
+
+    def load(self, user) -> Optional[dict]:
+        """
+        Returns the user's saved jar as a dict with 'cookies' and 'authenticated_at',
+        or None if there is no usable jar.
+        """
+        token = self._read(user)
+        if token is None:
+            return None
+        try:
+            data = json.loads(self._fernet.decrypt(token, ttl=int(self.max_age)))
+        except Exception:
+            # Tampered, expired, or encrypted under a key that has since been removed.
+            return None
+        if data.get('version') != FORMAT_VERSION:
+            return None
+        return data
+
+    def save(self, user, cookies: list, authenticated_at: float):
+        """
+        Encrypts and saves the user's jar, unless the store already holds a jar
+        from a more recent login (e.g. one made by another worker).
+        """
+        current = self.load(user)
+        if current is not None and current['authenticated_at'] > authenticated_at:
+            return
+        data = {
+            'version': FORMAT_VERSION,
+            'authenticated_at': authenticated_at,
+            'saved_at': time.time(),
+            'cookies': cookies,
+        }
+        self._write(user, self._fernet.encrypt(json.dumps(data).encode()))
+
+    @property
+    def shared(self) -> bool:
+        """
+        Whether other worker processes see the jars saved here. Sessions that are
+        only known to this process are logged out of the SIS when they are dropped.
+        """
+        return True
+
+    @abstractmethod
+    def delete(self, user):
+        """Removes the user's saved jar."""
+        raise NotImplementedError("Subclasses must implement the delete() method.")
+
+    @abstractmethod
+    def _read(self, user) -> Optional[bytes]:
+        """Returns the raw encrypted token for the user, or None."""
+        raise NotImplementedError("Subclasses must implement the _read() method.")
+
+    @abstractmethod
+    def _write(self, user, token: bytes):
+        """Stores the raw encrypted token for the user."""
+        raise NotImplementedError("Subclasses must implement the _write() method.")
+
+
+class CacheCookieJarStore(BaseCookieJarStore):
+    """
+    Stores cookie jars in a Django cache. Point `cache_alias` at a shared backend
+    (Redis, Memcached, or `DatabaseCache` for a DB-backed store) so that all workers
+    see the same jars; a per-process LocMemCache only helps within one worker.
+    """
+
+    def __init__(self, cache_alias='default', key_prefix='emptouch:sis-cookies', **kwargs):
+        super().__init__(**kwargs)
+        self.cache_alias = cache_alias
+        self.key_prefix = key_prefix
+
+    @property
+    def _cache(self):
+        return caches[self.cache_alias]
+
+    @property
+    def shared(self) -> bool:
+        # LocMemCache lives in process memory and DummyCache stores nothing.
+        return not isinstance(self._cache, (LocMemCache, DummyCache))
+
+    def _key(self, user) -> str:
+        return f"{self.key_prefix}:v{FORMAT_VERSION}:{user.pk}"
+
+    def delete(self, user):
+        self._cache.delete(self._key(user))
+
+    def _read(self, user) -> Optional[bytes]:
+        return self._cache.get(self._key(user))
+
+    def _write(self, user, token: bytes):
+        self._cache.set(self._key(user), token, timeout=self.max_age)
+
+
+def get_cookie_store() -> Optional[BaseCookieJarStore]:
+    """
+    Builds the store configured in settings.EMPTOUCH_COOKIE_STORE, or returns
+    None if sharing cookie jars is disabled.
+    """
+    config = getattr(settings, 'EMPTOUCH_COOKIE_STORE', None)
+    if not config:
+        return None
+    store_class = import_string(config['BACKEND'])
+    return store_class(**config.get('OPTIONS', {}))
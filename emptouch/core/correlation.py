@@ -0,0 +1,28 @@
+# core/correlation.py
+import contextvars
+import functools
+import logging
+from typing import Callable
+
+# The correlation ID of the request being handled, set by RequestIDMiddleware.
+request_id = contextvars.ContextVar('request_id', default='-')
+
+
+class RequestIDFilter(logging.Filter):
+    """
+    Adds the current request's correlation ID to every log record as `request_id`,
+    for use in format strings such as '[%(request_id)s] %(message)s'.
+    """
+
+    def filter(self, record):
+        record.request_id = request_id.get()
+        return True
+
+
+def in_current_context(func: Callable) -> Callable:
+    """
+    Binds `func` to a copy of the current context, so work handed to a thread pool
+    logs with the request ID of the request that scheduled it. Wrap each task
+    separately: a copied context can't be entered by two threads at once.
+    """
+    return functools.partial(contextvars.copy_context().run, func)
@@ -0,0 +1,244 @@
+# core/documents.py
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import List, Optional, Sequence, Union
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+from .metrics import timed
+
+
+@dataclass(frozen=True)
+class ParseTarget:
+    """
+    Declares the region of a page that a parser actually needs, so that only
+    that part of the tree is built.
+
+    Either filter by tag name(s) and attributes, like `Node.find_all`, or give a
+    CSS selector. With the BeautifulSoup backends, name/attrs targets are applied
+    while parsing (via SoupStrainer); CSS targets are resolved after a full parse
+    and only the topmost matching subtrees are kept. The selectolax backend
+    ignores targets and always returns the whole tree, which it builds faster
+    than a subset, so parsers must not rely on elements outside the target
+    being absent.
+    """
+    name: Union[str, Sequence[str], None] = None
+    attrs: Optional[dict] = None
+    css: Optional[str] = None
+
+    @property
+    def selector(self) -> str:
+        """The target expressed as a CSS selector."""
+        return self.css or _to_selector(self.name, self.attrs)
+
+
+# The nodes `HttpClient._is_login_page` inspects: the login form inputs and the alert paragraph.
+LOGIN_DETECTION_TARGET = ParseTarget(name=['input', 'p'])
+
+
+class Node(ABC):
+    """
+    A thin, backend-independent view of an HTML element or document.
+
+    Parsers should use this API rather than a specific library's tree, so that
+    the parse backend can be swapped (see `parse_document`) without rewriting them.
+    `raw` gives access to the backend's own object when a parser really needs it.
+    """
+
+    def __init__(self, raw):
+        self.raw = raw
+
+    @property
+    @abstractmethod
+    def tag(self) -> str:
+        """The element's tag name."""
+
+    @property
+    @abstractmethod
+    def html(self) -> str:
+        """The element serialized back to HTML."""
+
+    @abstractmethod
+    def select(self, css: str) -> List['Node']:
+        """Returns all descendants matching a CSS selector."""
+
+    @abstractmethod
+    def get(self, attribute: str, default=None):
+        """Returns the value of an attribute, or `default` if it is missing."""
+
+    @abstractmethod
+    def text(self, strip: bool = False) -> str:
+        """Returns the text content of the element and its descendants."""
+
+    def select_one(self, css: str) -> Optional['Node']:
+        """Returns the first descendant matching a CSS selector, or None."""
+        matches = self.select(css)
+        return matches[0] if matches else None
+
+    def find_all(self, name: str = None, attrs: dict = None) -> List['Node']:
+        """
+        Returns all descendants with the given tag name and attribute values.
+        An attribute value of True only requires the attribute to be present.
+        """
+        return self.select(_to_selector(name, attrs))
+
+    def find(self, name: str = None, attrs: dict = None) -> Optional['Node']:
+        """Returns the first descendant matching `find_all`'s filters, or None."""
+        return self.select_one(_to_selector(name, attrs))
+
+    def prettify(self) -> str:
+        """
+        Returns human-readable HTML. Backends without a pretty-printer return `html`.
+        """
+        return self.html
+
+    def __getitem__(self, attribute):
+        value = self.get(attribute)
+        if value is None:
+            raise KeyError(attribute)
+        return value
+
+
+class SoupNode(Node):
+    """A Node backed by a BeautifulSoup tag (html.parser or lxml tree builders)."""
+
+    @property
+    def tag(self) -> str:
+        return self.raw.name
+
+    @property
+    def html(self) -> str:
+        return str(self.raw)
+
+    def select(self, css: str) -> List[Node]:
+        return [SoupNode(tag) for tag in self.raw.select(css)]
+
+    def select_one(self, css: str) -> Optional[Node]:
+        tag = self.raw.select_one(css)
+        return SoupNode(tag) if tag is not None else None
+
+    def find_all(self, name: str = None, attrs: dict = None) -> List[Node]:
+        return [SoupNode(tag) for tag in self.raw.find_all(name, attrs or {})]
+
+    def find(self, name: str = None, attrs: dict = None) -> Optional[Node]:
+        tag = self.raw.find(name, attrs or {})
+        return SoupNode(tag) if tag is not None else None
+
+    def get(self, attribute: str, default=None):
+        value = self.raw.get(attribute, default)
+        # bs4 returns multi-valued attributes such as 'class' as lists.
+        return ' '.join(value) if isinstance(value, list) else value
+
+    def text(self, strip: bool = False) -> str:
+        return self.raw.get_text(strip=strip)
+
+    def prettify(self) -> str:
+        return self.raw.prettify()
+
+
+class SelectolaxNode(Node):
+    """A Node backed by a selectolax (Lexbor) node or document."""
+
+    @property
+    def tag(self) -> str:
+        return getattr(self.raw, 'tag', '[document]')
+
+    @property
+    def html(self) -> str:
+        return self.raw.html or ''
+
+    def select(self, css: str) -> List[Node]:
+        return [SelectolaxNode(node) for node in self.raw.css(css)]
+
+    def select_one(self, css: str) -> Optional[Node]:
+        node = self.raw.css_first(css)
+        return SelectolaxNode(node) if node is not None else None
+
+    def get(self, attribute: str, default=None):
+        attributes = getattr(self.raw, 'attributes', {})
+        value = attributes.get(attribute, default)
+        # selectolax reports valueless attributes (e.g. `checked`) as None.
+        return '' if value is None and attribute in attributes else value
+
+    def text(self, strip: bool = False) -> str:
+        return self.raw.text(strip=strip)
+
+
+def _to_selector(name: Union[str, Sequence[str], None] = None, attrs: dict = None) -> str:
+    """
+    Translates find()-style filters into a CSS selector. 'class' matches any one
+    of the element's classes, as it does in BeautifulSoup.
+    """
+    if name is not None and not isinstance(name, str):
+        return ', '.join(_to_selector(tag, attrs) for tag in name)
+    selector = name or '*'
+    for attribute, value in (attrs or {}).items():
+        if value is True:
+            selector += f'[{attribute}]'
+            continue
+        escaped = str(value).replace('\\', '\\\\').replace('"', '\\"')
+        operator = '~=' if attribute == 'class' else '='
+        selector += f'[{attribute}{operator}"{escaped}"]'
+    return selector
+
+
+def _parse_with_soup(content: bytes, features: str, target: ParseTarget = None) -> Node:
+    from bs4 import BeautifulSoup, FeatureNotFound, SoupStrainer
+    parse_only = None
+    if target is not None and target.css is None:
+        parse_only = SoupStrainer(target.name, target.attrs or {})
+    try:
+        soup = BeautifulSoup(content, features, parse_only=parse_only)
+    except FeatureNotFound:
+        raise ImproperlyConfigured(f"The '{features}' parser backend requires the '{features}' package.")
+
+    if target is not None and target.css is not None:
+        matches = soup.select(target.css)
+        # Keep only the topmost matches: a match nested inside another (e.g. a
+        # table in a layout table) comes along with its ancestor, and extracting
+        # it separately would tear it out of that ancestor.
+        matched = {id(tag) for tag in matches}
+        soup = BeautifulSoup('', features)
+        for tag in matches:
+            if not any(id(parent) in matched for parent in tag.parents):
+                soup.append(tag.extract())
+    return SoupNode(soup)
+
+
+def _parse_with_selectolax(content: bytes, target: ParseTarget = None) -> Node:
+    try:
+        from selectolax.lexbor import LexborHTMLParser
+    except ImportError:
+        raise ImproperlyConfigured("The 'selectolax' parser backend requires the 'selectolax' package.")
+    # The target is ignored: lexbor builds a whole tree faster than the target's
+    # subtrees could be copied out of it (see `manage.py runbenchmarks -k parse`).
+    return SelectolaxNode(LexborHTMLParser(content))
+
+
+# Maps backend names (as used in settings and on Endpoint) to parse functions.
+BACKENDS = {
+    'html.parser': lambda content, target=None: _parse_with_soup(content, 'html.parser', target),
+    'lxml': lambda content, target=None: _parse_with_soup(content, 'lxml', target),
+    'selectolax': _parse_with_selectolax,
+}
+
+
+def parse_document(content: bytes, backend: str = None, target: ParseTarget = None) -> Node:
+    """
+    Parses raw HTML into a Node using the named backend.
+
+    Args:
+        content (bytes): The raw response body.
+        backend (str, optional): One of BACKENDS. Defaults to
+            settings.EMPTOUCH_PARSER_BACKEND, or 'html.parser' if unset.
+        target (ParseTarget, optional): Restricts the tree to the elements the
+            caller needs. The whole page is parsed when omitted.
+    """
+    backend = backend or getattr(settings, 'EMPTOUCH_PARSER_BACKEND', 'html.parser')
+    try:
+        parse = BACKENDS[backend]
+    except KeyError:
+        raise ImproperlyConfigured(f"Unknown parser backend '{backend}'. Choose one of: {', '.join(BACKENDS)}.")
+    with timed('html_parse_seconds', 'html', backend=backend):
+        return parse(content, target)
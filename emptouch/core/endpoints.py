@@ -1,5 +1,6 @@
 # core/endpoints.py
 from dataclasses import dataclass
+from typing import Dict, Optional
 
 
 @dataclass(frozen=True)
@@ -10,5 +11,54 @@ class Endpoint:
     This is a simple data structure that defines a destination for the client.
     Concrete instances of this class should be defined in the application
     (e.g., in a 'grades' app), not in the core framework.
+
+    `parser_backend` optionally overrides settings.EMPTOUCH_PARSER_BACKEND for
+    pages fetched from this endpoint (see core.documents.BACKENDS).
+
+    Setting `cache_ttl` (seconds) caches parsed results for this endpoint per user
+    and payload (see core.cache.ResponseCache). For `stale_ttl` more seconds an
+    expired result is still served while it is refreshed in the background.
+
+    Concurrent identical requests for the same user share one SIS round trip
+    (see core.singleflight). Set `coalesce=False` for endpoints where every
+    request must actually reach the SIS.
+
+    Endpoints passed to `register()` are reported in metrics under their `name`;
+    requests to any other fuseaction share the 'other' label.
     """
-    fuseaction: str
\ No newline at end of file
+    fuseaction: str
+    parser_backend: Optional[str] = None
+    cache_ttl: Optional[int] = None
+    stale_ttl: int = 0
+    coalesce: bool = True
+    name: Optional[str] = None
+
+
+# Registered endpoints, keyed by fuseaction.
+ENDPOINT_REGISTRY: Dict[str, Endpoint] = {}
+
+# The metric label shared by all unregistered fuseactions, which keeps the number
+# of label values bounded whatever users type into the SIS explorer.
+OTHER_LABEL = 'other'
+
+
+def register(endpoint: Endpoint) -> Endpoint:
+    """Adds a named endpoint to the central registry and returns it."""
+    if not isinstance(endpoint, Endpoint):
+        raise TypeError("Only Endpoint instances can be registered.")
+    if not endpoint.name:
+        raise ValueError(f"Endpoint '{endpoint.fuseaction}' needs a name to be registered.")
+    if endpoint.fuseaction in ENDPOINT_REGISTRY:
+        raise ValueError(f"An endpoint for the fuseaction '{endpoint.fuseaction}' is already registered.")
+    ENDPOINT_REGISTRY[endpoint.fuseaction] = endpoint
+    return endpoint
+
+
+def metric_label(fuseaction: Optional[str]) -> str:
+    """Returns the name metrics report a request to `fuseaction` under."""
+    endpoint = ENDPOINT_REGISTRY.get(fuseaction) if fuseaction else None
+    return endpoint.name if endpoint is not None else OTHER_LABEL
+
+
+# Used by the HTTP clients themselves.
+LOGOUT = register(Endpoint('Logout', coalesce=False, name='logout'))
@@ -22,6 +22,33 @@ class SessionExpiredError(NavigationError):
     """
     pass
 
+class SISTimeoutError(NavigationError):
+    """
+    Raised when the SIS does not accept a connection or send a response
+    within the configured timeouts.
+    """
+    pass
+
+class CircuitOpenError(NavigationError):
+    """
+    Raised without contacting the SIS while its circuit breaker is open,
+    i.e. after repeated consecutive failures.
+    """
+    pass
+
+class RateLimitExceeded(NavigationError):
+    """
+    Raised when a request to the SIS could not get past the client-side rate
+    limiter within the configured maximum wait.
+    """
+    pass
+
+class CassetteMissError(NavigationError):
+    """
+    Raised in cassette replay mode when a request has no recorded response.
+    """
+    pass
+
 class PageParsingError(EmpowerError):
     """
     Raised within a parser class when the page's HTML structure
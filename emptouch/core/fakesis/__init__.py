@@ -0,0 +1,4 @@
+# core/fakesis/__init__.py
+from .server import FakeSIS
+
+__all__ = ['FakeSIS']
@@ -0,0 +1,262 @@
+# core/fakesis/server.py
+import json
+import random
+import re
+import secrets
+import threading
+import time
+from collections import Counter
+from http.cookies import SimpleCookie
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from string import Template
+from typing import Dict, Optional
+from urllib.parse import parse_qs, urlsplit
+
+PAGES_DIR = Path(__file__).resolve().parent / 'pages'
+
+NAVIGATION_PATH = '/empower/fusebox.cfm'
+AUTH_PATH = '/ptl-includes/authentication/auth-onlogin.cfm'
+STATS_PATH = '/__stats__'
+
+# Fuseaction and .cfc method names that may be looked up as page files.
+_SAFE_NAME = re.compile(r'^[A-Za-z0-9._-]{1,100}$')
+
+
+class FakeSIS:
+    """
+    A local stand-in for the Empower SIS, for developing and benchmarking
+    without touching the production system.
+
+    It speaks the parts of the SIS protocol the client uses: logins posted to the
+    auth URL set a session cookie; fusebox.cfm serves a page per fuseaction; .cfc
+    URLs answer AJAX calls; a missing or expired session gets the login page, and
+    rejected credentials the 'Authentication Failed' page, both with status 200
+    just like the real system.
+
+    Pages are files in `pages_dir`: login.html, auth_failed.html, home.html,
+    fuseactions/<fuseaction>.html and cfc/<method>.html, each falling back to a
+    `_default.html` in its directory. They are string.Template files, with
+    $username, $fuseaction, $method and $token (a per-session token) substituted.
+
+    Args:
+        host (str): Interface to listen on.
+        port (int): Port to listen on; 0 picks a free one.
+        pages_dir (str or Path, optional): Page files. Defaults to the bundled pages.
+        credentials (dict, optional): username -> password. When omitted, any
+            username with a non-empty password logs in.
+        latency (float): Seconds added to every response.
+        jitter (float): Up to this many extra seconds, random per response.
+        session_ttl (float, optional): Sessions expire after this many idle seconds.
+        expire_every (int, optional): Every Nth authenticated request finds its
+            session expired.
+        expire_probability (float): Chance that any authenticated request finds
+            its session expired.
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, pages_dir=None, credentials: Dict[str, str] = None,
+                 latency=0.0, jitter=0.0, session_ttl: Optional[float] = None, expire_every: Optional[int] = None,
+                 expire_probability=0.0):
+        self.pages_dir = Path(pages_dir) if pages_dir else PAGES_DIR
+        self.credentials = credentials
+        self.latency = latency
+        self.jitter = jitter
+        self.session_ttl = session_ttl
+        self.expire_every = expire_every
+        self.expire_probability = expire_probability
+
+        self._lock = threading.Lock()
+        # session token -> {'username', 'token', 'last_seen'}
+        self._sessions = {}
+        self._authenticated_requests = 0
+        self.stats = Counter()
+        self._pages = {}
+
+        self._server = ThreadingHTTPServer((host, port), _FakeSISHandler)
+        self._server.daemon_threads = True
+        self._server.sis = self
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def navigation_url(self) -> str:
+        return self.base_url + NAVIGATION_PATH
+
+    @property
+    def auth_url(self) -> str:
+        return self.base_url + AUTH_PATH
+
+    def start(self) -> 'FakeSIS':
+        """Serves requests on a background thread."""
+        self._thread = threading.Thread(target=self._server.serve_forever, name='fakesis', daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        """Serves requests on the calling thread until interrupted."""
+        self._server.serve_forever()
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    def expire_all_sessions(self):
+        """Ends every session, as an SIS restart would."""
+        with self._lock:
+            self._sessions.clear()
+
+    def snapshot(self) -> dict:
+        """Returns the request counters and the number of live sessions."""
+        with self._lock:
+            return {'requests': dict(self.stats), 'sessions': len(self._sessions)}
+
+    # --- Used by the request handler ---
+
+    def delay(self):
+        pause = self.latency + (random.uniform(0, self.jitter) if self.jitter else 0)
+        if pause:
+            time.sleep(pause)
+
+    def count(self, event: str):
+        with self._lock:
+            self.stats[event] += 1
+
+    def login(self, username: str, password: str) -> Optional[str]:
+        """Returns a new session cookie value, or None if the credentials are rejected."""
+        if self.credentials is not None:
+            accepted = username in self.credentials and self.credentials[username] == password
+        else:
+            accepted = bool(username) and bool(password)
+        if not accepted:
+            return None
+        session_id = secrets.token_hex(16)
+        with self._lock:
+            self._sessions[session_id] = {
+                'username': username, 'token': secrets.token_hex(8), 'last_seen': time.monotonic(),
+            }
+        return session_id
+
+    def logout(self, session_id: Optional[str]):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def session(self, session_id: Optional[str]) -> Optional[dict]:
+        """Returns the live session for a cookie value, applying idle and injected expiry."""
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                return None
+            now = time.monotonic()
+            self._authenticated_requests += 1
+            expired = (
+                (self.session_ttl is not None and now - session['last_seen'] > self.session_ttl)
+                or (self.expire_every and self._authenticated_requests % self.expire_every == 0)
+                or (self.expire_probability and random.random() < self.expire_probability)
+            )
+            if expired:
+                del self._sessions[session_id]
+                self.stats['expired'] += 1
+                return None
+            session['last_seen'] = now
+            return dict(session)
+
+    def page(self, name: str, **values) -> bytes:
+        """Renders a page file, falling back to its directory's _default.html."""
+        path = self.pages_dir / name
+        if not path.is_file():
+            path = path.parent / '_default.html'
+        template = self._pages.get(path)
+        if template is None:
+            template = self._pages[path] = Template(path.read_text(encoding='utf-8'))
+        return template.safe_substitute(values).encode('utf-8')
+
+
+class _FakeSISHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    server_version = 'FakeSIS'
+
+    @property
+    def sis(self) -> FakeSIS:
+        return self.server.sis
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        self._dispatch(body=b'')
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        self._dispatch(body=self.rfile.read(length))
+
+    def _dispatch(self, body: bytes):
+        url = urlsplit(self.path)
+        query = {k: v[0] for k, v in parse_qs(url.query).items()}
+        form = {k: v[0] for k, v in parse_qs(body.decode('utf-8', 'replace')).items()}
+
+        if url.path == STATS_PATH:
+            return self._respond(json.dumps(self.sis.snapshot()).encode(), content_type='application/json')
+
+        self.sis.delay()
+        if url.path == AUTH_PATH and self.command == 'POST':
+            return self._login(form)
+        if url.path == NAVIGATION_PATH:
+            return self._navigate(query.get('fuseaction', ''))
+        if url.path.endswith('.cfc') and self.command == 'POST':
+            return self._ajax(query.get('method', ''))
+        self.sis.count('not_found')
+        self._respond(b'Not Found', status=404, content_type='text/plain')
+
+    def _login(self, form: dict):
+        self.sis.count('login')
+        username = form.get('empower_usrn', '')
+        session_id = self.sis.login(username, form.get('empower_pswd', ''))
+        if session_id is None:
+            self.sis.count('login_failed')
+            return self._respond(self.sis.page('auth_failed.html'))
+        self._respond(self.sis.page('home.html', username=username), cookies={'CFID': session_id, 'CFTOKEN': session_id})
+
+    def _navigate(self, fuseaction: str):
+        self.sis.count('fuseaction')
+        session_id = self._session_id()
+        if fuseaction.lower() == 'logout':
+            self.sis.logout(session_id)
+            return self._respond(self.sis.page('login.html'))
+        session = self.sis.session(session_id)
+        if session is None:
+            return self._respond(self.sis.page('login.html'))
+        name = fuseaction if _SAFE_NAME.match(fuseaction) else '_default'
+        self._respond(self.sis.page(f'fuseactions/{name}.html', fuseaction=fuseaction,
+                                    username=session['username'], token=session['token']))
+
+    def _ajax(self, method: str):
+        self.sis.count('cfc')
+        session = self.sis.session(self._session_id())
+        if session is None:
+            return self._respond(self.sis.page('login.html'))
+        name = method if _SAFE_NAME.match(method) else '_default'
+        self._respond(self.sis.page(f'cfc/{name}.html', method=method,
+                                    username=session['username'], token=session['token']))
+
+    def _session_id(self) -> Optional[str]:
+        cookie = SimpleCookie(self.headers.get('Cookie', ''))
+        return cookie['CFTOKEN'].value if 'CFTOKEN' in cookie else None
+
+    def _respond(self, body: bytes, status=200, content_type='text/html; charset=utf-8', cookies: dict = None):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (cookies or {}).items():
+            self.send_header('Set-Cookie', f"{name}={value}; Path=/; HttpOnly")
+        self.end_headers()
+        self.wfile.write(body)
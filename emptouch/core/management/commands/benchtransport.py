@@ -0,0 +1,122 @@
+# core/management/commands/benchtransport.py
+import gzip
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.core.management.base import BaseCommand
+from requests.adapters import HTTPAdapter
+
+from core.network import HttpClient
+from core.ratelimit import rate_limiter
+
+
+class _PageHandler(BaseHTTPRequestHandler):
+    """Serves one SIS-sized page over keep-alive connections, counting connections and bytes."""
+    protocol_version = 'HTTP/1.1'
+
+    def setup(self):
+        super().setup()
+        self.server.record(connections=1)
+
+    def do_GET(self):
+        body, encoding = self.server.page, None
+        if 'gzip' in self.headers.get('Accept-Encoding', ''):
+            body, encoding = self.server.gzipped_page, 'gzip'
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html')
+        self.send_header('Content-Length', str(len(body)))
+        if encoding:
+            self.send_header('Content-Encoding', encoding)
+        self.end_headers()
+        self.wfile.write(body)
+        self.server.record(requests=1, wire_bytes=len(body), page_bytes=len(self.server.page))
+
+    def log_message(self, format, *args):
+        pass
+
+
+class _PageServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, page: bytes):
+        super().__init__(('127.0.0.1', 0), _PageHandler)
+        self.page = page
+        self.gzipped_page = gzip.compress(page)
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.stats = {'connections': 0, 'requests': 0, 'wire_bytes': 0, 'page_bytes': 0}
+
+    def record(self, **counts):
+        with self._lock:
+            for name, count in counts.items():
+                self.stats[name] += count
+
+
+class Command(BaseCommand):
+    help = (
+        "Measures how well the SIS transport reuses keep-alive connections and how much "
+        "compression saves, by fetching pages for several users from a local server. "
+        "Compares the shared, tuned connection pool with one default pool per client."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=8, help="Number of simulated users (HttpClients).")
+        parser.add_argument('--requests', type=int, default=25, help="Requests per user.")
+        parser.add_argument('--concurrency', type=int, default=16, help="Requests in flight at once.")
+        parser.add_argument('--page-kb', type=int, default=100, help="Approximate size of the served page.")
+
+    def handle(self, *args, **options):
+        row = b'<tr><td class="course">COS 1010</td><td>Introduction to Programming</td><td>A-</td></tr>\n'
+        page = b'<html><body><table>' + row * (options['page_kb'] * 1024 // len(row)) + b'</table></body></html>'
+        server = _PageServer(page)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = f'http://127.0.0.1:{server.server_port}/empower/fusebox.cfm'
+
+        # The rate limiter protects the real SIS; it would only throttle a local benchmark.
+        limiter_enabled, rate_limiter.enabled = rate_limiter.enabled, False
+        try:
+            for mode in ('shared', 'per-client'):
+                server.reset()
+                elapsed = self._run(mode, url, options)
+                self._report(mode, server.stats, elapsed)
+        finally:
+            rate_limiter.enabled = limiter_enabled
+            server.shutdown()
+            server.server_close()
+
+    def _run(self, mode: str, url: str, options: dict) -> float:
+        clients = [HttpClient(f'user{i}', 'password', navigation_url=url) for i in range(options['users'])]
+        own_adapters = []
+        if mode == 'per-client':
+            for client in clients:
+                # What every client used before: a default requests pool of its own.
+                adapter = HTTPAdapter()
+                client._session.mount('http://', adapter)
+                own_adapters.append(adapter)
+
+        jobs = [clients[i % len(clients)] for i in range(options['users'] * options['requests'])]
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['concurrency']) as executor:
+            for response in executor.map(lambda client: client._send('GET', url, params={'fuseaction': 'bench'}), jobs):
+                response.content
+        elapsed = time.perf_counter() - started
+
+        for client in clients:
+            client.close(logout=False)
+        for adapter in own_adapters:
+            adapter.close()
+        return elapsed
+
+    def _report(self, mode: str, stats: dict, elapsed: float):
+        requests, connections = stats['requests'], stats['connections']
+        reuse = 1 - connections / requests if requests else 0
+        compression = stats['wire_bytes'] / stats['page_bytes'] if stats['page_bytes'] else 1
+        self.stdout.write(
+            f"{mode:>10}: {requests} requests over {connections} connections "
+            f"(reuse rate {reuse:.1%}), {compression:.1%} of page bytes on the wire, "
+            f"{elapsed:.2f}s ({requests / elapsed:.0f} req/s)"
+        )
@@ -0,0 +1,324 @@
+# core/management/commands/loadtest.py
+import json
+import random
+import re
+import statistics
+import threading
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urljoin
+
+import requests
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.core.servers.basehttp import WSGIRequestHandler, WSGIServer, get_internal_wsgi_application
+from django.test.utils import override_settings
+
+from core.fakesis import FakeSIS
+from core.ratelimit import rate_limiter
+from core.sessions import session_pool
+
+# The app reports the SIS requests it made for a page as `sis;dur=...;desc="3x"`
+# in the Server-Timing header (a single request has no desc).
+_SIS_TIMING = re.compile(r'(?:^|,)\s*sis;dur=[\d.]+(?:;desc="(\d+)x")?')
+_WIDGET_URL = re.compile(r'data-widget-url="([^"]+)"')
+
+USERNAME_PREFIX = 'loadtest-'
+
+
+class _QuietRequestHandler(WSGIRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+class _WorkerPoolWSGIServer(WSGIServer):
+    """
+    Serves the app with a fixed number of worker threads, like a gunicorn or uWSGI
+    deployment would, and counts busy workers and queued connections. Not being a
+    ThreadingMixIn server, Django's handler closes each connection after one
+    response, so an idle keep-alive connection never holds a worker.
+    """
+
+    def __init__(self, workers: int):
+        super().__init__(('127.0.0.1', 0), _QuietRequestHandler)
+        self.workers = workers
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='loadtest-worker')
+        self._lock = threading.Lock()
+        self.busy = 0
+        self.queued = 0
+
+    def process_request(self, request, client_address):
+        with self._lock:
+            self.queued += 1
+        self._executor.submit(self._process, request, client_address)
+
+    def _process(self, request, client_address):
+        with self._lock:
+            self.queued -= 1
+            self.busy += 1
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+            with self._lock:
+                self.busy -= 1
+
+    def server_close(self):
+        super().server_close()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+class Command(BaseCommand):
+    help = (
+        "Simulates start-of-term traffic: many users log in through the login page at "
+        "once, then load the dashboard and the testing page, against a local fake SIS. "
+        "The app runs in this process on a fixed pool of worker threads. Reports "
+        "throughput, latency percentiles and SIS requests per action, and how saturated "
+        "the workers were."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100, help="Number of simulated users.")
+        parser.add_argument('--iterations', type=int, default=3,
+                            help="Dashboard and testing page visits per user after logging in.")
+        parser.add_argument('--think-time', type=float, default=1.0,
+                            help="Average seconds a user pauses between actions (randomized by +/-50%%).")
+        parser.add_argument('--ramp-up', type=float, default=0.0,
+                            help="Seconds over which users arrive; 0 starts them all at once.")
+        parser.add_argument('--workers', type=int, default=8, help="Worker threads serving the app.")
+        parser.add_argument('--fuseaction', default='STUDENT.GRADES',
+                            help="Fuseaction requested through the testing page.")
+        parser.add_argument('--sis-latency', type=float, default=0.2, help="Seconds the fake SIS takes per response.")
+        parser.add_argument('--sis-jitter', type=float, default=0.1, help="Extra random SIS latency, up to this many seconds.")
+        parser.add_argument('--sis-expire-probability', type=float, default=0.0,
+                            help="Chance that an SIS request finds its session expired.")
+        parser.add_argument('--timeout', type=float, default=60.0, help="Client timeout per request, in seconds.")
+        parser.add_argument('--no-rate-limit', action='store_true',
+                            help="Turn the SIS rate limiter off, to load the app rather than the limiter.")
+        parser.add_argument('--output', help="Write the results to this JSON file.")
+
+    def handle(self, *args, **options):
+        if options['users'] < 1 or options['workers'] < 1:
+            raise CommandError("--users and --workers must be at least 1.")
+
+        existing_users = set(User.objects.filter(username__startswith=USERNAME_PREFIX).values_list('pk', flat=True))
+        sis = FakeSIS(latency=options['sis_latency'], jitter=options['sis_jitter'],
+                      expire_probability=options['sis_expire_probability']).start()
+        server = _WorkerPoolWSGIServer(options['workers'])
+        server.set_app(get_internal_wsgi_application())
+        threading.Thread(target=server.serve_forever, name='loadtest-server', daemon=True).start()
+        base_url = f'http://127.0.0.1:{server.server_port}'
+
+        limiter_enabled = rate_limiter.enabled
+        if options['no_rate_limit']:
+            rate_limiter.enabled = False
+        try:
+            # No cassette: every SIS request must reach the fake SIS to be counted.
+            # SIS calls per action are read from the Server-Timing header, so it is
+            # on for the run whatever the project's setting.
+            with override_settings(EMPTOUCH_SIS_NAVIGATION_URL=sis.navigation_url,
+                                   EMPTOUCH_SIS_AUTH_URL=sis.auth_url, EMPTOUCH_SIS_CASSETTE={},
+                                   EMPTOUCH_SERVER_TIMING=True):
+                self.stdout.write(
+                    f"{options['users']} users against {base_url} ({options['workers']} workers), "
+                    f"fake SIS at {sis.base_url} ({options['sis_latency']}s latency)..."
+                )
+                report = self._run(base_url, server, options)
+                report['sis'] = sis.snapshot()
+                report['rate_limiter'] = rate_limiter.snapshot()
+        finally:
+            rate_limiter.enabled = limiter_enabled
+            server.shutdown()
+            server.server_close()
+            session_pool.clear()
+            sis.stop()
+            User.objects.filter(username__startswith=USERNAME_PREFIX).exclude(pk__in=existing_users).delete()
+
+        self._report(report)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(report, f, indent=2)
+            self.stdout.write(f"Results written to {options['output']}.")
+
+    def _run(self, base_url: str, server: _WorkerPoolWSGIServer, options: dict) -> dict:
+        samples = []
+        samples_lock = threading.Lock()
+
+        def record(sample: dict):
+            with samples_lock:
+                samples.append(sample)
+
+        saturation = []
+        stop_sampling = threading.Event()
+
+        def sample_workers():
+            while not stop_sampling.wait(0.1):
+                saturation.append((server.busy, server.queued))
+
+        start = threading.Barrier(options['users'])
+        users = [
+            threading.Thread(target=self._simulate_user, name=f'loadtest-user-{i}',
+                             args=(i, base_url, options, start, record), daemon=True)
+            for i in range(options['users'])
+        ]
+        sampler = threading.Thread(target=sample_workers, name='loadtest-sampler', daemon=True)
+
+        started = time.perf_counter()
+        sampler.start()
+        for user in users:
+            user.start()
+        for user in users:
+            user.join()
+        elapsed = time.perf_counter() - started
+        stop_sampling.set()
+        sampler.join()
+
+        return {
+            'options': {k: options[k] for k in ('users', 'iterations', 'think_time', 'ramp_up', 'workers',
+                                                'fuseaction', 'sis_latency', 'sis_jitter', 'no_rate_limit')},
+            'elapsed': elapsed,
+            'requests': len(samples),
+            'throughput': len(samples) / elapsed if elapsed else 0.0,
+            'actions': self._summarize(samples),
+            'workers': self._summarize_saturation(saturation, options['workers']),
+        }
+
+    def _simulate_user(self, index: int, base_url: str, options: dict, start: threading.Barrier, record):
+        rng = random.Random(index)
+        session = requests.Session()
+
+        def request(action: str, method: str, path: str, expected=(200,), **kwargs) -> requests.Response:
+            began = time.perf_counter()
+            try:
+                response = session.request(method, urljoin(base_url, path), allow_redirects=False,
+                                           timeout=options['timeout'], **kwargs)
+            except requests.RequestException as e:
+                record({'action': action, 'seconds': time.perf_counter() - began, 'status': None,
+                        'sis_calls': 0, 'error': type(e).__name__})
+                return None
+            error = None if response.status_code in expected else f'HTTP {response.status_code}'
+            record({'action': action, 'seconds': time.perf_counter() - began, 'status': response.status_code,
+                    'sis_calls': _sis_calls(response), 'error': error})
+            return response if error is None else None
+
+        def think():
+            if options['think_time'] > 0:
+                time.sleep(options['think_time'] * rng.uniform(0.5, 1.5))
+
+        def form_post(action: str, path: str, data: dict, expected=(200,)) -> requests.Response:
+            # Django rotates the CSRF token on login, so read it fresh every time.
+            data = {**data, 'csrfmiddlewaretoken': session.cookies.get('csrftoken', '')}
+            return request(action, 'POST', path, expected, data=data)
+
+        try:
+            start.wait()
+            if options['ramp_up'] > 0:
+                time.sleep(options['ramp_up'] * index / options['users'])
+
+            if request('login_page', 'GET', '/login/') is None:
+                return
+            # A successful login redirects to the dashboard; a rejected one shows the form again.
+            credentials = {'username': f'{USERNAME_PREFIX}{index:04d}', 'password': 'password'}
+            if form_post('login', '/login/', credentials, expected=(302,)) is None:
+                return
+
+            for _ in range(options['iterations']):
+                think()
+                response = request('dashboard', 'GET', '/')
+                if response is not None:
+                    for url in _WIDGET_URL.findall(response.text):
+                        request('widget_fragment', 'GET', url)
+                think()
+                request('testing_page', 'GET', '/testing/')
+                think()
+                form_post('testing_fetch', '/testing/', {'fuseaction': options['fuseaction']})
+        finally:
+            session.close()
+
+    @staticmethod
+    def _summarize(samples: list) -> dict:
+        by_action = defaultdict(list)
+        for sample in samples:
+            by_action[sample['action']].append(sample)
+
+        actions = {}
+        for action, action_samples in by_action.items():
+            ok = [s for s in action_samples if s['error'] is None]
+            latencies = sorted(s['seconds'] for s in ok)
+            actions[action] = {
+                'count': len(action_samples),
+                'errors': len(action_samples) - len(ok),
+                'error_kinds': dict(sorted(Counter(s['error'] for s in action_samples if s['error']).items())),
+                'p50': _percentile(latencies, 50),
+                'p95': _percentile(latencies, 95),
+                'p99': _percentile(latencies, 99),
+                'max': latencies[-1] if latencies else None,
+                'sis_calls_per_action': statistics.fmean(s['sis_calls'] for s in ok) if ok else 0.0,
+            }
+        return actions
+
+    @staticmethod
+    def _summarize_saturation(saturation: list, workers: int) -> dict:
+        if not saturation:
+            return {'workers': workers, 'mean_busy': 0.0, 'peak_busy': 0, 'saturated': 0.0,
+                    'mean_queued': 0.0, 'peak_queued': 0}
+        busy = [b for b, _ in saturation]
+        queued = [q for _, q in saturation]
+        return {
+            'workers': workers,
+            'mean_busy': statistics.fmean(busy),
+            'peak_busy': max(busy),
+            # Share of samples with every worker busy.
+            'saturated': sum(1 for b in busy if b >= workers) / len(busy),
+            'mean_queued': statistics.fmean(queued),
+            'peak_queued': max(queued),
+        }
+
+    def _report(self, report: dict):
+        self.stdout.write(
+            f"\n{report['requests']} requests in {report['elapsed']:.1f}s "
+            f"({report['throughput']:.1f} req/s)\n"
+        )
+        self.stdout.write(f"{'action':<16}{'count':>7}{'errors':>8}{'p50':>9}{'p95':>9}{'p99':>9}{'SIS/action':>12}")
+        for action, stats in report['actions'].items():
+            line = (f"{action:<16}{stats['count']:>7}{stats['errors']:>8}{_ms(stats['p50']):>9}"
+                    f"{_ms(stats['p95']):>9}{_ms(stats['p99']):>9}{stats['sis_calls_per_action']:>12.2f}")
+            self.stdout.write(self.style.ERROR(line) if stats['errors'] else line)
+            if stats['error_kinds']:
+                self.stdout.write(f"{'':<16}" + ', '.join(f"{kind}: {n}" for kind, n in stats['error_kinds'].items()))
+
+        workers = report['workers']
+        self.stdout.write(
+            f"\nWorkers: {workers['mean_busy']:.1f} of {workers['workers']} busy on average "
+            f"(peak {workers['peak_busy']}), all busy {workers['saturated']:.0%} of the time; "
+            f"{workers['mean_queued']:.1f} connections queued on average (peak {workers['peak_queued']})."
+        )
+        sis = report['sis']
+        self.stdout.write(f"Fake SIS: {', '.join(f'{k}={v}' for k, v in sorted(sis['requests'].items()))}")
+        for key, stats in report['rate_limiter'].items():
+            self.stdout.write(
+                f"Rate limit '{key}': {stats['admitted']} admitted, {stats['rejected']} rejected, "
+                f"{stats['wait_seconds_total']:.1f}s spent waiting (max {stats['wait_seconds_max']:.2f}s)."
+            )
+
+
+def _sis_calls(response: requests.Response) -> int:
+    match = _SIS_TIMING.search(response.headers.get('Server-Timing', ''))
+    if match is None:
+        return 0
+    return int(match.group(1) or 1)
+
+
+def _percentile(sorted_values: list, percent: float):
+    """Nearest-rank percentile of an ascending list, or None if it is empty."""
+    if not sorted_values:
+        return None
+    rank = max(1, -(-len(sorted_values) * percent // 100))
+    return sorted_values[int(rank) - 1]
+
+
+def _ms(seconds) -> str:
+    return '-' if seconds is None else f"{seconds * 1000:.0f}ms"
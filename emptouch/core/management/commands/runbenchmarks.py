@@ -0,0 +1,48 @@
+# core/management/commands/runbenchmarks.py
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core import benchmarks
+
+
+class Command(BaseCommand):
+    help = (
+        "Runs the benchmark suite (login detection, parsing per backend, EmpowerClient.get "
+        "and the dashboard against a local fake SIS), optionally saving the results as JSON "
+        "and comparing them with a previous run."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('-k', '--filter', help="Only run benchmarks whose name contains this.")
+        parser.add_argument('--rounds', type=int, default=5, help="Timed rounds per benchmark.")
+        parser.add_argument('--min-round-time', type=float, default=0.2, help="Minimum seconds per round.")
+        parser.add_argument('--output', help="Write the results to this JSON file.")
+        parser.add_argument('--compare', help="A previous results file to compare against.")
+        parser.add_argument('--threshold', type=float, default=0.10,
+                            help="Slowdown (as a fraction of the baseline median) counted as a regression.")
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options['compare']:
+            with open(options['compare']) as f:
+                baseline = json.load(f)
+
+        report = benchmarks.run(options['filter'], options['rounds'], options['min_round_time'], log=self.stdout.write)
+        if not report['results']:
+            raise CommandError("No benchmarks matched.")
+
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(report, f, indent=2)
+            self.stdout.write(f"Results written to {options['output']}.")
+
+        if baseline is not None:
+            rows = benchmarks.compare(baseline, report, options['threshold'])
+            for row in rows:
+                line = (f"{row['name']}: {benchmarks.format_seconds(row['before'])} -> "
+                        f"{benchmarks.format_seconds(row['after'])} ({row['change']:+.1%})")
+                self.stdout.write(self.style.ERROR(line) if row['regression'] else line)
+            regressions = [row['name'] for row in rows if row['regression']]
+            if regressions:
+                raise CommandError(f"{len(regressions)} benchmark(s) regressed by more than {options['threshold']:.0%}.")
@@ -0,0 +1,40 @@
+# core/management/commands/runfakesis.py
+from django.core.management.base import BaseCommand
+
+from core.fakesis import FakeSIS
+
+
+class Command(BaseCommand):
+    help = (
+        "Runs a local fake Empower SIS serving recorded pages, with optional latency "
+        "and session-expiry injection. Point the app at it with the "
+        "EMPTOUCH_SIS_NAVIGATION_URL and EMPTOUCH_SIS_AUTH_URL settings."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=8001)
+        parser.add_argument('--pages', help="Directory of page files to serve instead of the bundled ones.")
+        parser.add_argument('--latency', type=float, default=0.0, help="Seconds added to every response.")
+        parser.add_argument('--jitter', type=float, default=0.0, help="Up to this many extra seconds per response.")
+        parser.add_argument('--session-ttl', type=float, help="Expire sessions idle for this many seconds.")
+        parser.add_argument('--expire-every', type=int, help="Expire the session on every Nth authenticated request.")
+        parser.add_argument('--expire-probability', type=float, default=0.0,
+                            help="Chance that an authenticated request finds its session expired.")
+
+    def handle(self, *args, **options):
+        sis = FakeSIS(
+            host=options['host'], port=options['port'], pages_dir=options['pages'],
+            latency=options['latency'], jitter=options['jitter'], session_ttl=options['session_ttl'],
+            expire_every=options['expire_every'], expire_probability=options['expire_probability'],
+        )
+        self.stdout.write(f"Fake SIS listening on {sis.base_url}. Run the app with:")
+        self.stdout.write(f"  EMPTOUCH_SIS_NAVIGATION_URL={sis.navigation_url}")
+        self.stdout.write(f"  EMPTOUCH_SIS_AUTH_URL={sis.auth_url}")
+        self.stdout.write(f"Request counters: {sis.base_url}/__stats__")
+        try:
+            sis.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            sis.stop()
@@ -0,0 +1,99 @@
+# core/management/commands/syncsis.py
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from core.client import EmpowerClient
+from core.exceptions import AuthenticationError
+from core.network import HttpClient
+from core.sessions import session_pool
+from core.sync import SYNC_REGISTRY, get_spec, sync_user
+
+
+class Command(BaseCommand):
+    help = (
+        "Syncs registered SIS data (see core.sync) into the database for users whose SIS "
+        "session is still live in the shared cookie jar store. Passwords aren't stored, "
+        "so users without a live session are skipped until they next log in. Run it "
+        "from cron, or with --loop; the cookie store must then use a cache shared with "
+        "the web workers."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', action='append', dest='usernames', metavar='USERNAME',
+                            help="Only sync this user (repeatable).")
+        parser.add_argument('--spec', action='append', dest='specs', metavar='NAME',
+                            help="Only sync this spec (repeatable).")
+        parser.add_argument('--force', action='store_true', help="Sync even data that isn't due yet.")
+        parser.add_argument('--loop', action='store_true', help="Keep syncing until interrupted.")
+        parser.add_argument('--interval', type=float, default=60.0, help="Seconds between passes with --loop.")
+
+    def handle(self, *args, **options):
+        if session_pool.cookie_store is None or not session_pool.cookie_store.shared:
+            raise CommandError("Syncing needs the shared SIS cookie jars; configure EMPTOUCH_COOKIE_STORE "
+                               "with a cache shared between processes.")
+        specs = SYNC_REGISTRY
+        if options['specs']:
+            specs = []
+            for name in options['specs']:
+                spec = get_spec(name)
+                if spec is None:
+                    raise CommandError(f"No sync spec named '{name}'.")
+                specs.append(spec)
+        if not specs:
+            self.stdout.write("No sync specs are registered.")
+            return
+
+        while True:
+            self._sync_all(specs, options)
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+
+    def _sync_all(self, specs, options):
+        users = User.objects.filter(is_active=True)
+        if options['usernames']:
+            users = users.filter(username__in=[name.lower() for name in options['usernames']])
+
+        synced = skipped = failed = 0
+        for user in users.iterator():
+            jar = session_pool.cookie_store.load(user)
+            if jar is None:
+                skipped += 1
+                continue
+            try:
+                results = self._sync_user(user, jar, specs, options['force'])
+            except Exception as e:
+                # One user's failure (e.g. a database error) mustn't end a --loop run.
+                self.stderr.write(f"{user.username}: sync failed: {e!r}")
+                failed += 1
+                continue
+            synced += 1
+            for result in results.values():
+                if result.ok:
+                    self.stdout.write(
+                        f"{user.username} {result.name}: {result.created} created, {result.updated} updated, "
+                        f"{result.deleted} deleted, {result.unchanged} unchanged"
+                    )
+                else:
+                    self.stdout.write(self.style.ERROR(f"{user.username} {result.name}: {result.error}"))
+        self.stdout.write(f"Synced {synced} user(s); skipped {skipped} without a live SIS session; {failed} failed.")
+
+    def _sync_user(self, user, jar, specs, force):
+        # No password: if the SIS session has expired, the client raises
+        # AuthenticationError rather than attempting a login.
+        http_client = HttpClient(user.username, '')
+        http_client.load_cookies(jar['cookies'], jar['authenticated_at'])
+        try:
+            results = sync_user(user, EmpowerClient(user.username, '', http_client=http_client), specs, force=force)
+            if any(isinstance(result.error, AuthenticationError) for result in results.values()):
+                # The SIS session is gone; stop trying until the user logs in again.
+                session_pool.cookie_store.delete(user)
+            elif http_client.last_response_at is not None:
+                # Only a request to the SIS extends its session; when nothing was due,
+                # leave the jar to expire when the session it holds does.
+                session_pool.cookie_store.save(user, http_client.export_cookies(), http_client.authenticated_at)
+        finally:
+            http_client.close(logout=False)
+        return results
@@ -0,0 +1,240 @@
+# core/metrics.py
+import contextvars
+import math
+import socket
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+# Histogram buckets (seconds) for the timings the app records.
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, math.inf)
+
+
+class BaseMetricsSink:
+    """
+    Receives metrics from the app. Names are snake_case; `labels` is a dict of
+    low-cardinality dimensions, such as the fuseaction or widget slug.
+    """
+
+    def observe(self, name: str, value: float, labels: dict = None):
+        """Records one sample of a distribution, e.g. a duration in seconds."""
+        raise NotImplementedError
+
+    def increment(self, name: str, value: float = 1, labels: dict = None):
+        """Adds to a monotonically increasing counter."""
+        raise NotImplementedError
+
+    def gauge(self, name: str, value: float, labels: dict = None):
+        """Sets a value that can go up and down."""
+        raise NotImplementedError
+
+
+class NullMetricsSink(BaseMetricsSink):
+    """Discards all metrics."""
+
+    def observe(self, name, value, labels=None):
+        pass
+
+    def increment(self, name, value=1, labels=None):
+        pass
+
+    def gauge(self, name, value, labels=None):
+        pass
+
+
+class InMemoryMetricsSink(BaseMetricsSink):
+    """
+    Aggregates metrics in process memory and renders them in the Prometheus text
+    format, served by MetricsView. Durations (names ending in '_seconds') become
+    histograms; other observations become summaries with only a sum and count.
+    """
+
+    def __init__(self, prefix='emptouch', buckets=DEFAULT_BUCKETS):
+        self.prefix = prefix
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        # (name, labels) -> [count, sum, per-bucket counts]
+        self._observations = {}
+        self._counters = defaultdict(float)
+        self._gauges = {}
+
+    def observe(self, name, value, labels=None):
+        key = (name, _label_key(labels))
+        with self._lock:
+            observation = self._observations.get(key)
+            if observation is None:
+                observation = self._observations[key] = [0, 0.0, [0] * len(self.buckets)]
+            observation[0] += 1
+            observation[1] += value
+            if name.endswith('_seconds'):
+                for i, bound in enumerate(self.buckets):
+                    if value <= bound:
+                        observation[2][i] += 1
+
+    def increment(self, name, value=1, labels=None):
+        with self._lock:
+            self._counters[(name, _label_key(labels))] += value
+
+    def gauge(self, name, value, labels=None):
+        with self._lock:
+            self._gauges[(name, _label_key(labels))] = value
+
+    def render(self) -> str:
+        """Returns all metrics in the Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            observations = sorted(self._observations.items())
+            counters = sorted(self._counters.items())
+            gauges = sorted(self._gauges.items())
+
+        typed = set()
+
+        def declare(name, kind):
+            if name not in typed:
+                typed.add(name)
+                lines.append(f"# TYPE {name} {kind}")
+
+        for (name, labels), (count, total, bucket_counts) in observations:
+            full_name = f"{self.prefix}_{name}"
+            if name.endswith('_seconds'):
+                declare(full_name, 'histogram')
+                for bound, bucket_count in zip(self.buckets, bucket_counts):
+                    le = '+Inf' if bound == math.inf else f"{bound:g}"
+                    lines.append(f"{full_name}_bucket{_format_labels(labels + (('le', le),))} {bucket_count}")
+            else:
+                declare(full_name, 'summary')
+            lines.append(f"{full_name}_sum{_format_labels(labels)} {total:g}")
+            lines.append(f"{full_name}_count{_format_labels(labels)} {count}")
+        for (name, labels), value in counters:
+            declare(f"{self.prefix}_{name}_total", 'counter')
+            lines.append(f"{self.prefix}_{name}_total{_format_labels(labels)} {value:g}")
+        for (name, labels), value in gauges:
+            declare(f"{self.prefix}_{name}", 'gauge')
+            lines.append(f"{self.prefix}_{name}{_format_labels(labels)} {value:g}")
+        return '\n'.join(lines) + '\n'
+
+
+class StatsDMetricsSink(BaseMetricsSink):
+    """
+    Sends metrics to a StatsD daemon over UDP, with labels as DogStatsD-style tags.
+    Sending never blocks or fails a request; lost packets are lost metrics.
+    """
+
+    def __init__(self, host='localhost', port=8125, prefix='emptouch'):
+        self.address = (host, port)
+        self.prefix = prefix
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._socket.setblocking(False)
+
+    def observe(self, name, value, labels=None):
+        if name.endswith('_seconds'):
+            self._send(name[:-len('_seconds')], f"{value * 1000:g}", 'ms', labels)
+        else:
+            self._send(name, f"{value:g}", 'h', labels)
+
+    def increment(self, name, value=1, labels=None):
+        self._send(name, f"{value:g}", 'c', labels)
+
+    def gauge(self, name, value, labels=None):
+        self._send(name, f"{value:g}", 'g', labels)
+
+    def _send(self, name, value, kind, labels):
+        line = f"{self.prefix}.{name}:{value}|{kind}"
+        if labels:
+            line += '|#' + ','.join(f"{k}:{v}" for k, v in sorted(labels.items()))
+        try:
+            self._socket.sendto(line.encode(), self.address)
+        except OSError:
+            pass
+
+
+def _label_key(labels: Optional[dict]) -> tuple:
+    return tuple(sorted((str(k), str(v)) for k, v in (labels or {}).items()))
+
+
+def _format_labels(labels: tuple) -> str:
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{k}="{_escape_label_value(v)}"' for k, v in labels) + '}'
+
+
+def _escape_label_value(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def get_metrics_sink() -> BaseMetricsSink:
+    """
+    Builds the sink configured in settings.EMPTOUCH_METRICS, or a NullMetricsSink
+    if metrics are disabled.
+    """
+    config = getattr(settings, 'EMPTOUCH_METRICS', None)
+    if not config:
+        return NullMetricsSink()
+    sink_class = import_string(config['BACKEND'])
+    return sink_class(**config.get('OPTIONS', {}))
+
+
+# The sink every part of the app reports to.
+metrics = get_metrics_sink()
+
+
+class RequestTimings:
+    """
+    Collects named durations for one HTTP request, for its Server-Timing header.
+    Shared with the request's worker threads through the context, hence the lock.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # name -> [total seconds, count]
+        self._timings: Dict[str, list] = {}
+
+    def add(self, name: str, seconds: float):
+        with self._lock:
+            timing = self._timings.setdefault(name, [0.0, 0])
+            timing[0] += seconds
+            timing[1] += 1
+
+    def header(self) -> str:
+        """Formats the timings as a Server-Timing header value."""
+        with self._lock:
+            timings = list(self._timings.items())
+        entries = []
+        for name, (seconds, count) in timings:
+            entry = f"{name};dur={seconds * 1000:.1f}"
+            if count > 1:
+                entry += f';desc="{count}x"'
+            entries.append(entry)
+        return ', '.join(entries)
+
+
+# The timings of the request being handled, set by ServerTimingMiddleware.
+request_timings = contextvars.ContextVar('request_timings', default=None)
+
+
+def record_timing(name: str, seconds: float):
+    """Adds a duration to the current request's Server-Timing header, if any."""
+    timings = request_timings.get()
+    if timings is not None:
+        timings.add(name, seconds)
+
+
+@contextmanager
+def timed(metric: str, timing: str = None, **labels):
+    """
+    Times the block, reporting it to the metrics sink as `metric` and, if `timing`
+    is given, to the current request's Server-Timing header under that name.
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        metrics.observe(metric, elapsed, labels)
+        if timing is not None:
+            record_timing(timing, elapsed)
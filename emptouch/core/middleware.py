@@ -0,0 +1,120 @@
+# core/middleware.py
+import re
+import threading
+import time
+import uuid
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+from .correlation import request_id
+from .metrics import RequestTimings, metrics, request_timings
+
+# Incoming IDs are reused only if they look like IDs, so they can't inject into logs.
+_VALID_REQUEST_ID = re.compile(r'^[A-Za-z0-9._-]{1,64}$')
+
+
+class RequestIDMiddleware:
+    """
+    Gives each request a correlation ID, available to log records through
+    core.correlation.RequestIDFilter and returned in the X-Request-ID header.
+    An X-Request-ID sent by a proxy in front of the app is reused.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token = self._start(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            request_id.reset(token)
+        response['X-Request-ID'] = request.request_id
+        return response
+
+    async def __acall__(self, request):
+        token = self._start(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            request_id.reset(token)
+        response['X-Request-ID'] = request.request_id
+        return response
+
+    @staticmethod
+    def _start(request):
+        incoming = request.headers.get('X-Request-ID', '')
+        request.request_id = incoming if _VALID_REQUEST_ID.match(incoming) else uuid.uuid4().hex
+        return request_id.set(request.request_id)
+
+
+class ServerTimingMiddleware:
+    """
+    Times each request and reports where the time went, both to the metrics sink
+    and, if EMPTOUCH_SERVER_TIMING is on, in a Server-Timing response header:
+    'sis' (SIS network), 'html' (building page trees), 'parse' (parser classes),
+    'fetch.<widget>' / 'render.<widget>' (dashboard widgets) and 'total'.
+    Durations of concurrent work are summed, so entries can exceed 'total'.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self._in_flight = 0
+        self._lock = threading.Lock()
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token, started = self._start()
+        try:
+            response = self.get_response(request)
+        finally:
+            timings = self._finish(token)
+        return self._report(request, response, timings, started)
+
+    async def __acall__(self, request):
+        token, started = self._start()
+        try:
+            response = await self.get_response(request)
+        finally:
+            timings = self._finish(token)
+        return self._report(request, response, timings, started)
+
+    def _start(self):
+        self._track_in_flight(+1)
+        return request_timings.set(RequestTimings()), time.perf_counter()
+
+    def _finish(self, token) -> RequestTimings:
+        self._track_in_flight(-1)
+        timings = request_timings.get()
+        request_timings.reset(token)
+        return timings
+
+    def _track_in_flight(self, delta: int):
+        with self._lock:
+            self._in_flight += delta
+            metrics.gauge('http_requests_in_flight', self._in_flight)
+
+    def _report(self, request, response, timings: RequestTimings, started: float):
+        elapsed = time.perf_counter() - started
+        match = getattr(request, 'resolver_match', None)
+        metrics.observe('http_request_seconds', elapsed, {
+            'view': match.view_name if match else 'unresolved',
+            'method': request.method,
+            'status': f"{response.status_code // 100}xx",
+        })
+        if getattr(settings, 'EMPTOUCH_SERVER_TIMING', False):
+            timings.add('total', elapsed)
+            response['Server-Timing'] = timings.header()
+        return response
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-17 18:51
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SISCredential',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fingerprint', models.CharField(help_text="HMAC-SHA256 of the user's SIS password, keyed with EMPTOUCH_SIS_FINGERPRINT_KEY.", max_length=64)),
+                ('updated_at', models.DateTimeField(auto_now=True, help_text='When the SIS password last changed (or was first seen).')),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='sis_credential', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+    ]
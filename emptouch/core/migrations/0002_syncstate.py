@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-17 18:54
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SyncState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(help_text='The SyncSpec name.', max_length=100)),
+                ('last_synced_at', models.DateTimeField(blank=True, help_text='When the data was last synced successfully.', null=True)),
+                ('last_attempt_at', models.DateTimeField(blank=True, help_text='When a sync was last attempted.', null=True)),
+                ('last_error', models.TextField(blank=True, help_text='Why the last attempt failed; empty if it succeeded.')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sync_states', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('user', 'name'), name='core_syncstate_unique_user_name')],
+            },
+        ),
+    ]
@@ -1,6 +1,10 @@
 # core/models.py
-from django.db import models
+from typing import Optional
+
+from django.conf import settings
+from django.db import IntegrityError, models
 from django.utils import timezone
+from django.utils.crypto import constant_time_compare, salted_hmac
 
 
 # The Custom Manager for Safe Deletion
@@ -88,4 +92,166 @@ class BaseModel(models.Model):
 
     def __str__(self):
         # Provide a sensible default string representation
-        return f"Record created on {self.created_at.strftime('%Y-%m-%d %H:%M')}"
\ No newline at end of file
+        return f"Record created on {self.created_at.strftime('%Y-%m-%d %H:%M')}"
+
+class SISCredential(models.Model):
+    """
+    A keyed fingerprint of the SIS password a user last logged in with.
+
+    The SIS authenticates every login, so the local password hash only needs
+    rewriting when the password actually changed. Comparing an HMAC fingerprint
+    is cheap, whereas check_password() and set_password() each run the
+    deliberately slow password hasher, which dominated CPU during login storms.
+
+    An HMAC is fast to compute, so whoever holds its key and a database dump can
+    guess passwords against it far faster than against the password hash. It is
+    therefore keyed with settings.EMPTOUCH_SIS_FINGERPRINT_KEY, a secret that is
+    kept out of the code and the database, rather than the committed SECRET_KEY.
+    Without that setting no fingerprints are stored, and logins fall back to
+    check_password().
+    """
+    KEY_SALT = 'core.models.SISCredential'
+
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='sis_credential',
+    )
+    fingerprint = models.CharField(
+        max_length=64,
+        help_text="HMAC-SHA256 of the user's SIS password, keyed with EMPTOUCH_SIS_FINGERPRINT_KEY."
+    )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        help_text="When the SIS password last changed (or was first seen)."
+    )
+
+    def __str__(self):
+        return f"SIS credential for {self.user}"
+
+    @classmethod
+    def make_fingerprint(cls, user, password: str) -> Optional[str]:
+        """Returns the password's fingerprint, or None if no fingerprint key is configured."""
+        key = getattr(settings, 'EMPTOUCH_SIS_FINGERPRINT_KEY', None)
+        if not key:
+            return None
+        # The user's primary key ties the fingerprint to one account, so equal
+        # passwords don't produce equal fingerprints.
+        return salted_hmac(cls.KEY_SALT, f"{user.pk}:{password}", secret=key, algorithm='sha256').hexdigest()
+
+    @classmethod
+    def sync_password(cls, user, password: str, created: bool = False) -> bool:
+        """
+        Stores `password` as the user's local password if it differs from the one
+        they last logged in with. Call only after the SIS accepted the password.
+
+        The hash is only rewritten when the password really changed: a new salt
+        changes the session auth hash, which would sign the user out of their
+        other devices.
+
+        Args:
+            created (bool): Whether `user` was just created and has no password yet.
+
+        Returns:
+            bool: True if the local password hash was rewritten.
+        """
+        fingerprint = cls.make_fingerprint(user, password)
+        credential = cls.objects.filter(user=user).first() if fingerprint is not None else None
+        if credential is not None:
+            changed = not constant_time_compare(credential.fingerprint, fingerprint)
+        else:
+            # Nothing cheap to compare against; check the hash itself.
+            changed = created or not user.check_password(password)
+
+        if changed:
+            user.set_password(password)
+            user.save(update_fields=['password'])
+        if fingerprint is None or (credential is not None and not changed):
+            return changed
+
+        # Single-statement writes rather than update_or_create(), whose transaction
+        # makes concurrent logins fail with "database is locked" on SQLite.
+        if credential is not None:
+            credential.fingerprint = fingerprint
+            credential.save(update_fields=['fingerprint', 'updated_at'])
+        else:
+            try:
+                cls.objects.create(user=user, fingerprint=fingerprint)
+            except IntegrityError:
+                # Another login for the same user got there first.
+                cls.objects.filter(user=user).update(fingerprint=fingerprint, updated_at=timezone.now())
+        return changed
+
+
+class SyncedModel(BaseModel):
+    """
+    An abstract base for SIS data mirrored into the database by core.sync.
+
+    Each row belongs to a user and is identified within that user's data by
+    `sync_key`, built from the natural key of the scraped record (e.g. term and
+    course code). `content_hash` lets a sync skip rows that haven't changed, and
+    rows that disappear from the SIS are soft-deleted, so the default manager
+    only returns what the SIS currently shows.
+
+    Subclasses that declare their own Meta must derive it from SyncedModel.Meta,
+    to keep the unique (user, sync_key) constraint the sync's upsert relies on.
+    """
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        help_text="The student whose SIS data this row mirrors."
+    )
+    sync_key = models.CharField(
+        max_length=255,
+        help_text="Identifies the record among the user's rows; built from its natural key."
+    )
+    content_hash = models.CharField(
+        max_length=64,
+        help_text="SHA-256 of the synced field values, to detect changes."
+    )
+    synced_at = models.DateTimeField(
+        help_text="When the SIS last reported a change to this row."
+    )
+
+    class Meta(BaseModel.Meta):
+        abstract = True
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'sync_key'], name='%(app_label)s_%(class)s_unique_sync_key'),
+        ]
+
+
+class SyncState(models.Model):
+    """
+    When one sync spec (see core.sync) last ran for a user, and how it went.
+    """
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='sync_states',
+    )
+    name = models.CharField(
+        max_length=100,
+        help_text="The SyncSpec name."
+    )
+    last_synced_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="When the data was last synced successfully."
+    )
+    last_attempt_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="When a sync was last attempted."
+    )
+    last_error = models.TextField(
+        blank=True,
+        help_text="Why the last attempt failed; empty if it succeeded."
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'name'], name='core_syncstate_unique_user_name'),
+        ]
+
+    def __str__(self):
+        return f"{self.name} sync for {self.user}"
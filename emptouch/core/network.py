@@ -1,171 +1,491 @@
 # core/network.py
+import logging
 import requests
-from bs4 import BeautifulSoup
+import threading
+import time
+from contextlib import nullcontext
 from datetime import datetime
 
-from .exceptions import AuthenticationError, NavigationError, SessionExpiredError
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib.parse import urlsplit
+from urllib3.util import make_headers
 
+from .cassette import REPLAY, CassetteAdapter, get_cassette_adapter
+from .documents import LOGIN_DETECTION_TARGET, Node, ParseTarget, parse_document
+from .endpoints import LOGOUT, metric_label
+from .exceptions import AuthenticationError, NavigationError, SessionExpiredError, SISTimeoutError
+from .metrics import metrics, record_timing
+from .ratelimit import rate_limiter
+from .resilience import RetryPolicy, circuit_breaker
 
-class HttpClient:
+logger = logging.getLogger(__name__)
+
+
+_transport_adapter = None
+_transport_adapter_lock = threading.Lock()
+
+
+def get_transport_adapter() -> HTTPAdapter:
     """
-    A stateful session manager that detects session expiry by looking for
-    the login form fields in the HTML response.
+    Returns the HTTPAdapter shared by every HttpClient in this process.
+
+    Sessions keep their own cookie jars, but their requests go through one pool of
+    keep-alive connections per host, so a connection (and its TLS handshake) set up
+    for one user is reused for the next. Pool sizes come from
+    settings.EMPTOUCH_SIS_CONNECTION_POOL.
     """
-    def __init__(self, username, password,
-                 navigation_url='https://aubg.empower-xl.com/empower/fusebox.cfm',
-                 auth_url='https://aubg.empower-xl.com/ptl-includes/authentication/auth-onlogin.cfm'):
-        
-        self.navigation_url = navigation_url
-        self.auth_url = auth_url
-        self._session = requests.Session()
-        self._session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        })
+    global _transport_adapter
+    with _transport_adapter_lock:
+        if _transport_adapter is None:
+            config = getattr(settings, 'EMPTOUCH_SIS_CONNECTION_POOL', {})
+            _transport_adapter = HTTPAdapter(
+                pool_connections=config.get('POOL_CONNECTIONS', 4),
+                pool_maxsize=config.get('POOL_MAXSIZE', 16),
+                pool_block=config.get('POOL_BLOCK', False),
+                # Retries are handled by HttpClient._send.
+                max_retries=0,
+            )
+        return _transport_adapter
+
+
+class BaseHttpClient:
+    """
+    The I/O-free half of an SIS client: credentials, login state, cookie jar
+    (de)serialization and login-page detection. Shared by the blocking HttpClient
+    and the asyncio-based AsyncHttpClient (core.async_network).
+    """
+    USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+
+    DEFAULT_NAVIGATION_URL = 'https://aubg.empower-xl.com/empower/fusebox.cfm'
+    DEFAULT_AUTH_URL = 'https://aubg.empower-xl.com/ptl-includes/authentication/auth-onlogin.cfm'
+
+    def __init__(self, username, password, navigation_url=None, auth_url=None):
+        """
+        Args:
+            username (str): The SIS username.
+            password (str): The SIS password.
+            navigation_url (str, optional): The fusebox.cfm URL. Defaults to
+                settings.EMPTOUCH_SIS_NAVIGATION_URL, e.g. to point at a fake SIS.
+            auth_url (str, optional): The login form's target. Defaults to
+                settings.EMPTOUCH_SIS_AUTH_URL.
+        """
+        self.navigation_url = navigation_url or getattr(settings, 'EMPTOUCH_SIS_NAVIGATION_URL', self.DEFAULT_NAVIGATION_URL)
+        self.auth_url = auth_url or getattr(settings, 'EMPTOUCH_SIS_AUTH_URL', self.DEFAULT_AUTH_URL)
         self._username = username
         self._password = password
         self._is_logged_in = False
+        timeout = getattr(settings, 'EMPTOUCH_SIS_TIMEOUT', {})
+        self.connect_timeout = timeout.get('CONNECT', 5)
+        self.read_timeout = timeout.get('READ', 30)
+        self.retry_policy = RetryPolicy.from_settings()
+        # Wall-clock time of the login that produced the current cookie jar.
+        self.authenticated_at = None
+        # Dynamic tokens scraped for two-step AJAX calls, keyed by
+        # (initial fuseaction, token name). They belong to the current SIS
+        # session, so every login or cookie jar swap clears them.
+        self._tokens = {}
+        # True while replaying a cassette, when no request reaches the network.
+        self._offline = False
+        # Wall-clock time of the last response from the SIS, which also kept the
+        # session alive there; None until a request goes out.
+        self.last_response_at = None
+
+    @property
+    def _cookie_jar(self):
+        """The http.cookiejar.CookieJar holding the SIS session cookies."""
+        raise NotImplementedError("Subclasses must provide the _cookie_jar property.")
+
+    def export_cookies(self) -> list:
+        """
+        Serializes the session's cookie jar into a list of JSON-friendly dicts.
+        """
+        return [
+            {
+                'name': cookie.name, 'value': cookie.value, 'domain': cookie.domain,
+                'path': cookie.path, 'secure': cookie.secure, 'expires': cookie.expires,
+                'rest': cookie._rest,
+            }
+            for cookie in self._cookie_jar
+        ]
+
+    def load_cookies(self, cookies: list, authenticated_at: float):
+        """
+        Rehydrates a previously authenticated session from an exported cookie jar.
+
+        The client trusts the jar and skips _login(); if the SIS has meanwhile
+        expired the session, the usual SessionExpiredError path logs in again.
+        """
+        self._cookie_jar.clear()
+        self._tokens.clear()
+        for cookie in cookies:
+            self._cookie_jar.set_cookie(requests.cookies.create_cookie(**cookie))
+        self.authenticated_at = authenticated_at
+        self._is_logged_in = True
+
+    def _record_response(self, method: str, url: str, fuseaction: str, seconds: float, response_bytes: int,
+                         ttfb: float = None):
+        """
+        Reports one completed SIS request to the metrics sink and the current
+        request's Server-Timing header.
+        """
+        if not self._offline:
+            self.last_response_at = time.time()
+        labels = {'method': method, 'endpoint': self._endpoint_label(url, fuseaction)}
+        metrics.observe('sis_request_seconds', seconds, labels)
+        if ttfb is not None:
+            metrics.observe('sis_ttfb_seconds', ttfb, labels)
+        metrics.observe('sis_response_bytes', response_bytes, labels)
+        record_timing('sis', seconds)
+
+    def _record_failure(self, method: str, url: str, fuseaction: str, reason: str):
+        labels = {'method': method, 'endpoint': self._endpoint_label(url, fuseaction), 'reason': reason}
+        metrics.increment('sis_request_errors', labels=labels)
+
+    def _retries_for(self, method: str, retry: bool = None) -> int:
+        """How many times `_send` may retry a request; by default only GETs are retried."""
+        return self.retry_policy.total if (method == 'GET' if retry is None else retry) else 0
+
+    def _retry_delay(self, method: str, url: str, fuseaction: str, attempt: int, retries: int,
+                     response=None, failure: Exception = None):
+        """
+        Records the outcome of one `_send` attempt with the circuit breaker and
+        metrics, and decides what happens next.
+
+        Args:
+            attempt (int): The 0-based attempt that just finished.
+            retries (int): The retries `_send` may make in total.
+            response: The response, if one arrived.
+            failure (Exception, optional): The error raised instead of a response.
+
+        Returns:
+            The seconds to wait before the next attempt, or None if `_send` should
+            stop and return the response (a success, or the final 5xx for the
+            caller's raise_for_status() to report) or raise `failure`.
+        """
+        if failure is None and not RetryPolicy.is_retryable_status(response.status_code):
+            circuit_breaker.record_success(url)
+            return None
+        circuit_breaker.record_failure(url)
+        self._record_failure(method, url, fuseaction, type(failure).__name__ if failure else str(response.status_code))
+        if attempt == retries:
+            return None
+        delay = self.retry_policy.delay(attempt)
+        logger.warning("%s %s failed (%s); retry %d of %d in %.2fs.", method, url,
+                       failure or f"HTTP {response.status_code}", attempt + 1, retries, delay)
+        return delay
+
+    def _endpoint_label(self, url: str, fuseaction: str) -> str:
+        """The 'endpoint' metric label for a request; see core.endpoints.metric_label."""
+        if fuseaction is None and url == self.auth_url:
+            return 'login'
+        return metric_label(fuseaction)
+
+    def _login_payload(self) -> dict:
+        """The form fields the SIS login page posts."""
+        logon_info = datetime.now().strftime('%m/%d/%Y %H:%M:%S')
+        return {
+            'empower_usrn': self._username, 'empower_pswd': self._password, 'LoggedInToEmpower': '1',
+            'logoninfo': logon_info, 'LogInToEmpower.x': '57', 'LogInToEmpower.y': '18',
+        }
+
+    def _ajax_headers(self) -> dict:
+        """The headers the SIS expects on AJAX requests to .cfc endpoints."""
+        return {
+            'X-Requested-With': 'XMLHttpRequest',
+            'Referer': self.navigation_url, # Use the main app URL as the referer
+            'Origin': '{0.scheme}://{0.netloc}'.format(urlsplit(self.navigation_url)),
+            'Accept': 'application/json, text/javascript, */*'
+        }
+
+    def _is_login_response(self, content: bytes, document: Node = None) -> bool:
+        """
+        Decides whether a response is a "failed login state" page, parsing only if needed.
+
+        A byte-level pre-check on the raw content settles the common case: a page
+        that lacks the login form field names and the 'Authentication Failed' alert
+        cannot be either failure page. Only pages containing those markers get the
+        full `_is_login_page` check, reusing `document` when the caller already parsed
+        the whole page, or else building just the nodes that check needs.
+        """
+        has_login_fields = b'empower_usrn' in content and b'empower_pswd' in content
+        has_failure_alert = b'page-alert' in content and b'Authentication Failed' in content
+        if not has_login_fields and not has_failure_alert:
+            return False
 
-    def _is_login_page(self, soup: BeautifulSoup) -> bool:
+        if document is None:
+            document = parse_document(content, target=LOGIN_DETECTION_TARGET)
+        return self._is_login_page(document)
+
+    def _is_login_page(self, document: Node) -> bool:
         """
         The definitive check: a page is considered a "failed login state" if
         it is EITHER the main login page OR the specific "Authentication Failure" page.
         """
         # --- Check 1: Is it the original login form? ---
         # This is the check we had before, and it's still valid for session timeouts.
-        username_field = soup.find('input', {'name': 'empower_usrn'})
-        password_field = soup.find('input', {'name': 'empower_pswd'})
+        username_field = document.find('input', {'name': 'empower_usrn'})
+        password_field = document.find('input', {'name': 'empower_pswd'})
         if username_field is not None and password_field is not None:
-            print("DEBUG [_is_login_page]: Found login form input fields. Result: True.")
+            logger.debug("_is_login_page: found login form input fields; result True.")
             return True
 
         # --- Check 2: Is it the "Authentication Failure" page? ---
         # Based on the new HTML, this is a unique fingerprint of that page.
-        page_alert = soup.find('p', {'class': 'page-alert'})
-        if page_alert and 'Authentication Failed' in page_alert.get_text():
-            print("DEBUG [_is_login_page]: Found 'Authentication Failed' alert. Result: True.")
+        page_alert = document.find('p', {'class': 'page-alert'})
+        if page_alert and 'Authentication Failed' in page_alert.text():
+            logger.debug("_is_login_page: found 'Authentication Failed' alert; result True.")
             return True
             
         # --- If neither of the above are true, it's a successful login page ---
-        print("DEBUG [_is_login_page]: Did not find any failure indicators. Result: False.")
+        logger.debug("_is_login_page: no failure indicators found; result False.")
         return False
 
+
+
+class HttpClient(BaseHttpClient):
+    """
+    A stateful session manager that detects session expiry by looking for
+    the login form fields in the HTML response.
+
+    Thread safety: one HttpClient may be shared by several threads, e.g. for
+    parallel widget fetches or batch requests on a pooled session. Requests never
+    mutate shared session state (per-request headers are passed to `_send`), and
+    logins are serialized so that threads which hit an expired session together
+    trigger a single re-login. The session cookie jar itself is shared, which is
+    the point: every thread rides on the same SIS login. `load_cookies()` and
+    `close()` must not race with in-flight requests.
+    """
+    def __init__(self, username, password, **kwargs):
+        super().__init__(username, password, **kwargs)
+        self._session = requests.Session()
+        self._session.headers.update({
+            'User-Agent': self.USER_AGENT,
+            # gzip and deflate, plus br/zstd when a decoder for them is installed.
+            'Accept-Encoding': make_headers(accept_encoding=True)['accept-encoding'],
+        })
+        adapter = get_transport_adapter()
+        self._session.mount('https://', adapter)
+        self._session.mount('http://', adapter)
+        cassette = get_cassette_adapter(adapter)
+        if cassette is not None:
+            self.use_cassette(cassette)
+        self._login_lock = threading.Lock()
+
+    def clone(self) -> 'HttpClient':
+        """
+        Returns a new client continuing this one's SIS session (cookies, tokens,
+        transport and cassette), for work that may outlive this client, such as
+        a background cache refresh. The caller owns and must close the clone; if
+        this client logs out first, the clone simply logs in again.
+        """
+        clone = type(self)(self._username, self._password, navigation_url=self.navigation_url, auth_url=self.auth_url)
+        clone._session.adapters.update(self._session.adapters)
+        clone._offline = self._offline
+        if self._is_logged_in:
+            clone.load_cookies(self.export_cookies(), self.authenticated_at)
+            clone._tokens.update(self._tokens)
+        return clone
+
+    def use_cassette(self, cassette: CassetteAdapter):
+        """
+        Routes this client's requests through a cassette, to record them or to
+        replay recorded responses. Replayed requests skip the rate limiter.
+        """
+        self._session.mount('https://', cassette)
+        self._session.mount('http://', cassette)
+        self._offline = cassette.mode == REPLAY
+
+    def _send(self, method: str, url: str, retry: bool = None, **kwargs) -> requests.Response:
+        """
+        Sends a single HTTP request on the shared session. Every request the
+        client makes goes through here; extra headers apply to this request only.
+
+        The request waits its turn under the SIS rate limiter, is bounded by the
+        configured connect/read timeouts and fails fast while the circuit breaker
+        is open. Timeouts, connection errors and 5xx responses are retried with
+        jittered exponential backoff if `retry` is true, which is the default for GETs.
+
+        Raises:
+            SISTimeoutError: If the SIS didn't respond within the timeouts.
+            CircuitOpenError: If the SIS host is failing and its circuit is open.
+            NavigationError: If the SIS couldn't be reached.
+        """
+        fuseaction = (kwargs.get('params') or {}).get('fuseaction')
+        kwargs.setdefault('timeout', (self.connect_timeout, self.read_timeout))
+        retries = self._retries_for(method, retry)
+
+        for attempt in range(retries + 1):
+            circuit_breaker.before_request(url)
+            response = failure = None
+            try:
+                with nullcontext() if self._offline else rate_limiter.limit(url, fuseaction):
+                    started = time.perf_counter()
+                    response = self._session.request(method, url, **kwargs)
+                    # requests reads the whole body before returning, so this covers the
+                    # download too; `elapsed` stops at the response headers (TTFB).
+                    self._record_response(method, url, fuseaction, time.perf_counter() - started,
+                                          len(response.content), response.elapsed.total_seconds())
+            except requests.exceptions.Timeout as e:
+                failure = SISTimeoutError(f"{method} {url} timed out: {e}")
+            except requests.exceptions.ConnectionError as e:
+                failure = NavigationError(f"Could not connect to the SIS for {method} {url}: {e}")
+
+            delay = self._retry_delay(method, url, fuseaction, attempt, retries, response, failure)
+            if delay is None:
+                if failure is not None:
+                    raise failure
+                return response
+            time.sleep(delay)
+
+    def _ensure_logged_in(self, force=False, seen=None):
+        """
+        Logs in unless already logged in; with force=True, logs in again because
+        a request sent on the login made at `seen` (its `authenticated_at`, read
+        before the request went out) came back expired. If another thread has
+        logged in since, its login is reused instead of replacing it.
+        """
+        with self._login_lock:
+            if force and self.authenticated_at != seen:
+                return
+            if force or not self._is_logged_in:
+                self._is_logged_in = False
+                self._login()
+
+    @property
+    def _cookie_jar(self):
+        return self._session.cookies
+
     def _login(self):
         """
         Internal login method. Verifies success by checking that the response is NOT the login page.
         """
-        print("INFO: Authenticating with Empower SIS...")
-        logon_info = datetime.now().strftime('%m/%d/%Y %H:%M:%S')
-        login_payload = {
-            'empower_usrn': self._username, 'empower_pswd': self._password, 'LoggedInToEmpower': '1',
-            'logoninfo': logon_info, 'LogInToEmpower.x': '57', 'LogInToEmpower.y': '18',
-        }
+        if not self._password:
+            # A client rehydrated from a stored cookie jar (e.g. by the sync job) has
+            # no password; don't send the SIS a login attempt that's bound to fail.
+            raise AuthenticationError("The SIS session expired and no password is available to log in again.")
+        logger.info("Authenticating with Empower SIS...")
         try:
-            response = self._session.post(self.auth_url, data=login_payload)
+            response = self._send('POST', self.auth_url, data=self._login_payload())
             response.raise_for_status()
-            soup = BeautifulSoup(response.content, 'html.parser')
 
-            if self._is_login_page(soup):
+            if self._is_login_response(response.content):
                 # If we are still on the login page, the login FAILED.
-                print("DEBUG: Login failed, credentials rejected by SIS.")
+                logger.info("Login failed, credentials rejected by SIS.")
                 return False
             
             # If we are NOT on the login page, the login SUCCEEDED.
-            print("INFO: Authentication successful.")
+            logger.info("Authentication successful.")
+            self._tokens.clear()
             self._is_logged_in = True
+            self.authenticated_at = time.time()
             return True
 
         except requests.exceptions.RequestException as e:
             raise AuthenticationError(f"An HTTP error occurred during authentication: {e}")
+        except NavigationError as e:
+            # _send's timeouts, connection errors, open circuit or rate limit.
+            raise AuthenticationError(f"Could not reach the SIS to log in: {e}") from e
 
-    def get(self, endpoint) -> BeautifulSoup:
-        if not self._is_logged_in: self._login()
+    def get(self, endpoint, target: ParseTarget = None) -> Node:
+        """
+        Performs a GET request with automatic session management. When `target` is
+        given, only that region of the page is parsed.
+        """
+        self._ensure_logged_in()
+        seen = self.authenticated_at
         try:
-            return self._perform_get(endpoint)
+            return self._perform_get(endpoint, target)
         except SessionExpiredError:
-            self._is_logged_in = False
-            self._login()
-            return self._perform_get(endpoint)
-
-    def _perform_get(self, endpoint) -> BeautifulSoup:
-        response = self._session.get(self.navigation_url, params={'fuseaction': endpoint.fuseaction})
-        response.raise_for_status()
-        soup = BeautifulSoup(response.content, 'html.parser')
-        if self._is_login_page(soup):
+            logger.info("Session expired during GET of '%s'. Re-authenticating.", endpoint.fuseaction)
+            self._ensure_logged_in(force=True, seen=seen)
+            return self._perform_get(endpoint, target)
+
+    def _perform_get(self, endpoint, target: ParseTarget = None) -> Node:
+        try:
+            response = self._send('GET', self.navigation_url, params={'fuseaction': endpoint.fuseaction})
+            response.raise_for_status()
+        except requests.exceptions.RequestException as e:
+            raise NavigationError(f"HTTP GET request failed for endpoint '{endpoint.fuseaction}': {e}")
+        document = parse_document(response.content, endpoint.parser_backend, target)
+        if self._is_login_response(response.content, document if target is None else None):
             raise SessionExpiredError(f"Session expired when requesting '{endpoint.fuseaction}'.")
-        return soup
+        return document
 
-    def post(self, endpoint, payload: dict) -> BeautifulSoup:
+    def post(self, endpoint, payload: dict, target: ParseTarget = None) -> Node:
         """
-        Performs a POST request with automatic session management.
+        Performs a POST request with automatic session management. When `target` is
+        given, only that region of the page is parsed.
         """
-        if not self._is_logged_in:
-            self._login()
+        self._ensure_logged_in()
+        seen = self.authenticated_at
 
         try:
             # We use _perform_post, similar to how get uses _perform_get
-            return self._perform_post(endpoint, payload)
+            return self._perform_post(endpoint, payload, target)
         except SessionExpiredError:
             # If we get kicked out, re-login and retry once.
-            print("WARNING: Detected redirection to login page during POST. Re-authenticating.")
-            self._is_logged_in = False
-            self._login()
+            logger.warning("Detected redirection to login page during POST to '%s'. Re-authenticating.", endpoint.fuseaction)
+            self._ensure_logged_in(force=True, seen=seen)
             
-            print("INFO: Retrying original POST request...")
-            return self._perform_post(endpoint, payload)
+            logger.info("Retrying original POST request...")
+            return self._perform_post(endpoint, payload, target)
 
-    def _perform_post(self, endpoint, payload: dict) -> BeautifulSoup:
+    def _perform_post(self, endpoint, payload: dict, target: ParseTarget = None) -> Node:
         """The core logic for performing a single POST request."""
         try:
-            response = self._session.post(self.navigation_url, params={'fuseaction': endpoint.fuseaction}, data=payload)
+            response = self._send('POST', self.navigation_url, params={'fuseaction': endpoint.fuseaction}, data=payload)
             response.raise_for_status()
-            soup = BeautifulSoup(response.content, 'html.parser')
+            document = parse_document(response.content, endpoint.parser_backend, target)
 
-            if self._is_login_page(soup):
+            if self._is_login_response(response.content, document if target is None else None):
                 raise SessionExpiredError(f"Session expired when POSTing to '{endpoint.fuseaction}'.")
             
-            return soup
+            return document
         except requests.exceptions.RequestException as e:
             raise NavigationError(f"HTTP POST request failed for endpoint '{endpoint.fuseaction}': {e}")
 
-    def ajax_post(self, cfc_url: str, method: str, payload: dict) -> BeautifulSoup:
+    def ajax_post(self, cfc_url: str, method: str, payload: dict, parser_backend: str = None,
+                  target: ParseTarget = None) -> Node:
         """
         Performs a specialized AJAX POST request to a .cfc endpoint.
-        """
-        if not self._is_logged_in:
-            self._login()
 
-        # --- Set the specific headers required for an AJAX request ---
-        ajax_headers = {
-            'X-Requested-With': 'XMLHttpRequest',
-            'Referer': self.navigation_url, # Use the main app URL as the referer
-            'Origin': 'https://aubg.empower-xl.com',
-            'Accept': 'application/json, text/javascript, */*'
-        }
-        
-        # Combine with existing session headers
-        original_headers = self._session.headers.copy()
-        self._session.headers.update(ajax_headers)
+        Raises SessionExpiredError if the SIS answers with the login page, after
+        logging in again. The call is not retried here, because the payload's
+        dynamic token belonged to the expired session; EmpowerClient.ajax_post
+        scrapes a new one and retries.
+        """
+        self._ensure_logged_in()
+        seen = self.authenticated_at
 
+        # Construct the full URL with the method parameter
+        full_url = f"{cfc_url}?method={method}"
         try:
-            # Construct the full URL with the method parameter
-            full_url = f"{cfc_url}?method={method}"
-            
-            response = self._session.post(full_url, data=payload)
+            # The AJAX headers are sent with this request only, so concurrent
+            # navigation on the same session never sees them.
+            response = self._send('POST', full_url, data=payload, headers=self._ajax_headers())
             response.raise_for_status()
             
             # Since the response is just HTML, we can parse it directly
-            soup = BeautifulSoup(response.content, 'html.parser')
-            return soup
+            document = parse_document(response.content, parser_backend, target)
+            if self._is_login_response(response.content, document if target is None else None):
+                self._ensure_logged_in(force=True, seen=seen)
+                raise SessionExpiredError(f"Session expired when POSTing to '{full_url}'.")
+            return document
             
         except requests.exceptions.RequestException as e:
             raise NavigationError(f"AJAX POST request failed for URL '{full_url}': {e}")
-        finally:
-            # --- IMPORTANT: Restore the original headers ---
-            # This prevents these special headers from interfering with normal navigation.
-            self._session.headers = original_headers
             
-    def close(self):
-        logout_params = {'fuseaction': 'Logout'}
-        try: self._session.get(self.navigation_url, params=logout_params)
-        except requests.exceptions.RequestException: pass
-        finally: self._session.close()
\ No newline at end of file
+    def close(self, logout=True):
+        """
+        Closes the session. By default the SIS session is logged out first;
+        pass logout=False to keep it alive for other workers sharing the jar.
+        """
+        logout_params = {'fuseaction': LOGOUT.fuseaction}
+        try:
+            if logout: self._send('GET', self.navigation_url, retry=False, params=logout_params)
+        except (requests.exceptions.RequestException, NavigationError): pass
+        finally:
+            # The transport adapter and its connections are shared with other
+            # clients, so only this session's reference to it is dropped.
+            self._session.adapters.clear()
\ No newline at end of file
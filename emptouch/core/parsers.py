@@ -1,26 +1,57 @@
 # core/parsers.py
 from abc import ABC, abstractmethod
-from bs4 import BeautifulSoup
+from typing import Optional, Type
+
+from .documents import Node, ParseTarget, SoupNode
+from .exceptions import PageParsingError
+from .metrics import timed
 
 
 class BaseParser(ABC):
     """
     Abstract base class for all page parsers.
 
-    Each concrete parser must implement the `parse` method, which takes a
-    BeautifulSoup object and returns structured data.
+    Each concrete parser must implement the `parse` method, which reads the
+    parsed page through the backend-independent `self.document` Node and
+    returns structured data.
+
+    Parsers that only need part of a large page should declare it in `target`,
+    e.g. `target = ParseTarget(name='table', attrs={'id': 'grades'})` or
+    `target = ParseTarget(css='form#search')`; the client then builds only that
+    subtree and `self.document` contains just the matching elements.
     """
 
-    def __init__(self, soup: BeautifulSoup):
+    target: Optional[ParseTarget] = None
+
+    def __init__(self, document: Node):
         """
         Initializes the parser with the HTML content to be parsed.
         """
-        self.soup = soup
+        self.document = document
+
+    @property
+    def soup(self):
+        """
+        The underlying BeautifulSoup object, for parsers that still need bs4 directly.
+        Only available with the 'html.parser' and 'lxml' backends.
+        """
+        if not isinstance(self.document, SoupNode):
+            raise PageParsingError(f"{type(self).__name__} uses .soup, which requires a BeautifulSoup parser backend.")
+        return self.document.raw
 
     @abstractmethod
     def parse(self):
         """
-        Parses the BeautifulSoup object to extract structured data.
+        Parses the document to extract structured data.
         This method MUST be implemented by all subclasses.
         """
-        raise NotImplementedError("Subclasses must implement the parse() method.")
\ No newline at end of file
+        raise NotImplementedError("Subclasses must implement the parse() method.")
+
+
+def run_parser(parser_class: Type[BaseParser], document: Node):
+    """
+    Runs `parser_class` over a parsed page and returns its result, timing the
+    parse per parser class.
+    """
+    with timed('parser_seconds', 'parse', parser=parser_class.__name__):
+        return parser_class(document).parse()
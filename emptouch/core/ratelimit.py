@@ -0,0 +1,274 @@
+# core/ratelimit.py
+import asyncio
+import logging
+import math
+import threading
+import time
+from collections import defaultdict
+from contextlib import asynccontextmanager, contextmanager
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.module_loading import import_string
+
+from .exceptions import RateLimitExceeded
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class RateLimit:
+    """
+    A single limit on SIS traffic.
+
+    Attributes:
+        rate (float, optional): Sustained requests per second; None for no rate limit.
+        burst (int, optional): Requests allowed back-to-back after an idle period.
+            Defaults to one second's worth of `rate`.
+        max_in_flight (int, optional): Maximum concurrent requests; None for no cap.
+    """
+    rate: Optional[float] = None
+    burst: Optional[int] = None
+    max_in_flight: Optional[int] = None
+
+    @property
+    def capacity(self) -> int:
+        return self.burst or max(1, math.ceil(self.rate))
+
+
+class BaseRateLimitBackend:
+    """
+    Stores token buckets and in-flight counters. Both acquire methods block until
+    they succeed or `deadline` (a time.monotonic() value) passes, returning False
+    in the latter case.
+    """
+
+    def acquire_token(self, key: str, limit: RateLimit, deadline: float) -> bool:
+        raise NotImplementedError
+
+    def acquire_slot(self, key: str, limit: RateLimit, deadline: float) -> bool:
+        raise NotImplementedError
+
+    def release_slot(self, key: str):
+        raise NotImplementedError
+
+
+class LocalRateLimitBackend(BaseRateLimitBackend):
+    """
+    Keeps the limits in process memory, shared by all threads of one worker.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._slots_freed = threading.Condition(self._lock)
+        # key -> (tokens, monotonic time of last update)
+        self._buckets = {}
+        self._in_flight = defaultdict(int)
+
+    def acquire_token(self, key: str, limit: RateLimit, deadline: float) -> bool:
+        with self._lock:
+            now = time.monotonic()
+            tokens, updated = self._buckets.get(key, (limit.capacity, now))
+            tokens = min(limit.capacity, tokens + (now - updated) * limit.rate)
+            # Reserve a token even if it has yet to accrue, then wait for it. Waiters
+            # are thereby served in arrival order.
+            wait = max(0.0, (1 - tokens) / limit.rate)
+            if now + wait > deadline:
+                self._buckets[key] = (tokens, now)
+                return False
+            self._buckets[key] = (tokens - 1, now)
+        if wait:
+            time.sleep(wait)
+        return True
+
+    def acquire_slot(self, key: str, limit: RateLimit, deadline: float) -> bool:
+        with self._slots_freed:
+            while self._in_flight[key] >= limit.max_in_flight:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._slots_freed.wait(remaining)
+            self._in_flight[key] += 1
+            return True
+
+    def release_slot(self, key: str):
+        with self._slots_freed:
+            self._in_flight[key] -= 1
+            self._slots_freed.notify_all()
+
+
+class CacheRateLimitBackend(BaseRateLimitBackend):
+    """
+    Keeps the limits in a Django cache, so all workers pointing at the same cache
+    (Redis, Memcached) share them.
+
+    The token bucket is approximated with fixed windows: each window of
+    burst / rate seconds admits `burst` requests. In-flight counters expire after
+    `slot_timeout` seconds, so slots leaked by a crashed worker free themselves.
+    """
+
+    def __init__(self, cache_alias='default', key_prefix='emptouch:ratelimit', poll_interval=0.05, slot_timeout=300):
+        self.cache_alias = cache_alias
+        self.key_prefix = key_prefix
+        self.poll_interval = poll_interval
+        self.slot_timeout = slot_timeout
+
+    @property
+    def _cache(self):
+        return caches[self.cache_alias]
+
+    def _incr(self, key: str, timeout: float) -> int:
+        self._cache.add(key, 0, timeout=timeout)
+        try:
+            return self._cache.incr(key)
+        except ValueError:
+            # The counter expired between add() and incr().
+            self._cache.add(key, 1, timeout=timeout)
+            return 1
+
+    def acquire_token(self, key: str, limit: RateLimit, deadline: float) -> bool:
+        window = limit.capacity / limit.rate
+        while True:
+            now = time.time()
+            window_index = int(now // window)
+            count = self._incr(f"{self.key_prefix}:rate:{key}:{window_index}", timeout=math.ceil(window) + 1)
+            if count <= limit.capacity:
+                return True
+            wait = (window_index + 1) * window - now
+            if time.monotonic() + wait > deadline:
+                return False
+            time.sleep(wait)
+
+    def acquire_slot(self, key: str, limit: RateLimit, deadline: float) -> bool:
+        counter_key = f"{self.key_prefix}:inflight:{key}"
+        while True:
+            if self._incr(counter_key, timeout=self.slot_timeout) <= limit.max_in_flight:
+                return True
+            self.release_slot(key)
+            if time.monotonic() + self.poll_interval > deadline:
+                return False
+            time.sleep(self.poll_interval)
+
+    def release_slot(self, key: str):
+        try:
+            self._cache.decr(f"{self.key_prefix}:inflight:{key}")
+        except ValueError:
+            pass
+
+
+class RateLimiter:
+    """
+    Governs outgoing SIS requests with a token bucket and a max-in-flight cap
+    per host, plus optional tighter limits per fuseaction, as configured in
+    settings.EMPTOUCH_RATE_LIMIT.
+
+    A request waits at most MAX_WAIT seconds for its turn before failing with
+    RateLimitExceeded. Counters of admitted and rejected requests and of time
+    spent waiting are kept per limit key; see `snapshot()`.
+    """
+
+    def __init__(self, config: dict = None):
+        config = config if config is not None else getattr(settings, 'EMPTOUCH_RATE_LIMIT', None)
+        self.enabled = bool(config)
+        config = config or {}
+        self.max_wait = config.get('MAX_WAIT', 5)
+        self.default = RateLimit(**config['DEFAULT']) if config.get('DEFAULT') else None
+        self.hosts = {host: RateLimit(**limit) for host, limit in config.get('HOSTS', {}).items()}
+        self.fuseactions = {fuseaction: RateLimit(**limit) for fuseaction, limit in config.get('FUSEACTIONS', {}).items()}
+        backend_class = import_string(config.get('BACKEND', 'core.ratelimit.LocalRateLimitBackend'))
+        self.backend = backend_class(**config.get('OPTIONS', {}))
+
+        self._metrics_lock = threading.Lock()
+        self._metrics = defaultdict(lambda: {
+            'admitted': 0, 'rejected': 0, 'in_flight': 0, 'wait_seconds_total': 0.0, 'wait_seconds_max': 0.0,
+        })
+
+    def limits_for(self, url: str, fuseaction: str = None) -> List[Tuple[str, RateLimit]]:
+        """
+        Returns the (key, limit) pairs a request to `url` is subject to.
+        """
+        if not self.enabled:
+            return []
+        host = urlsplit(url).hostname or ''
+        limits = []
+        # Narrowest first, so a request queued behind a fuseaction limit doesn't
+        # hold one of the host's slots while it waits.
+        if fuseaction and fuseaction in self.fuseactions:
+            limits.append((f"{host}:{fuseaction}", self.fuseactions[fuseaction]))
+        host_limit = self.hosts.get(host, self.default)
+        if host_limit:
+            limits.append((host, host_limit))
+        return limits
+
+    @contextmanager
+    def limit(self, url: str, fuseaction: str = None):
+        """
+        Holds a place under every applicable limit for the duration of the block.
+
+        Raises:
+            RateLimitExceeded: If a place doesn't free up within MAX_WAIT seconds.
+        """
+        acquired = self._acquire(url, fuseaction)
+        try:
+            yield
+        finally:
+            self._release(acquired)
+
+    @asynccontextmanager
+    async def alimit(self, url: str, fuseaction: str = None):
+        """
+        The async form of `limit()`; waiting happens in a worker thread.
+        """
+        acquired = await asyncio.to_thread(self._acquire, url, fuseaction)
+        try:
+            yield
+        finally:
+            self._release(acquired)
+
+    def snapshot(self) -> dict:
+        """
+        Returns a copy of this process's counters, keyed by limit key.
+        """
+        with self._metrics_lock:
+            return {key: dict(values) for key, values in self._metrics.items()}
+
+    def _acquire(self, url: str, fuseaction: str = None) -> List[str]:
+        started = time.monotonic()
+        deadline = started + self.max_wait
+        acquired_slots = []
+        for key, limit in self.limits_for(url, fuseaction):
+            admitted = (
+                (limit.rate is None or self.backend.acquire_token(key, limit, deadline))
+                and (limit.max_in_flight is None or self.backend.acquire_slot(key, limit, deadline))
+            )
+            if not admitted:
+                self._release(acquired_slots)
+                self._record(key, 'rejected', time.monotonic() - started)
+                logger.warning("Rate limit '%s' still exhausted after waiting %ss; rejecting request.", key, self.max_wait)
+                raise RateLimitExceeded(f"Rate limit '{key}' still exhausted after waiting {self.max_wait}s.")
+            self._record(key, 'admitted', time.monotonic() - started, holds_slot=limit.max_in_flight is not None)
+            if limit.max_in_flight is not None:
+                acquired_slots.append(key)
+        return acquired_slots
+
+    def _release(self, keys: List[str]):
+        for key in keys:
+            self.backend.release_slot(key)
+            with self._metrics_lock:
+                self._metrics[key]['in_flight'] -= 1
+
+    def _record(self, key: str, outcome: str, waited: float, holds_slot: bool = False):
+        with self._metrics_lock:
+            metrics = self._metrics[key]
+            metrics[outcome] += 1
+            metrics['wait_seconds_total'] += waited
+            metrics['wait_seconds_max'] = max(metrics['wait_seconds_max'], waited)
+            if holds_slot:
+                metrics['in_flight'] += 1
+
+
+# The limiter shared by every SIS client in this process.
+rate_limiter = RateLimiter()
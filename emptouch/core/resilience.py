@@ -0,0 +1,117 @@
+# core/resilience.py
+import logging
+import random
+import threading
+import time
+from dataclasses import dataclass
+from urllib.parse import urlsplit
+
+from django.conf import settings
+
+from .exceptions import CircuitOpenError
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """
+    How idempotent (GET) requests to the SIS are retried after a timeout, a
+    connection error or a 5xx response.
+
+    Attributes:
+        total (int): Retries after the first attempt.
+        backoff (float): Base delay in seconds; attempt n waits a random time of
+            up to backoff * 2**n ("full jitter"), so retries from many threads
+            don't hit a recovering SIS in lockstep.
+        max_backoff (float): Upper bound for a single delay.
+    """
+    total: int = 2
+    backoff: float = 0.5
+    max_backoff: float = 8.0
+
+    @classmethod
+    def from_settings(cls) -> 'RetryPolicy':
+        config = getattr(settings, 'EMPTOUCH_SIS_RETRIES', {})
+        return cls(
+            total=config.get('TOTAL', cls.total),
+            backoff=config.get('BACKOFF', cls.backoff),
+            max_backoff=config.get('MAX_BACKOFF', cls.max_backoff),
+        )
+
+    def delay(self, attempt: int) -> float:
+        """The pause before retry number `attempt` (0-based)."""
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+    @staticmethod
+    def is_retryable_status(status_code: int) -> bool:
+        return status_code >= 500
+
+
+class CircuitBreaker:
+    """
+    Fails requests fast while an SIS host is down, instead of tying up worker
+    threads on timeouts.
+
+    After `failure_threshold` consecutive failures (timeouts, connection errors,
+    5xx responses) to a host, its circuit opens and requests raise CircuitOpenError
+    without touching the network. Once `reset_timeout` seconds have passed, one
+    request is let through as a probe: success closes the circuit, failure keeps it
+    open for another `reset_timeout`. State is kept per process.
+    """
+
+    def __init__(self, failure_threshold=None, reset_timeout=None):
+        config = getattr(settings, 'EMPTOUCH_SIS_CIRCUIT_BREAKER', {})
+        self.failure_threshold = failure_threshold or config.get('FAILURE_THRESHOLD', 5)
+        self.reset_timeout = reset_timeout or config.get('RESET_TIMEOUT', 30)
+        self._lock = threading.Lock()
+        # host -> consecutive failures
+        self._failures = {}
+        # host -> time.monotonic() until which the circuit stays open
+        self._open_until = {}
+
+    def before_request(self, url: str):
+        """
+        Raises CircuitOpenError if requests to the url's host should not be attempted.
+        """
+        host = urlsplit(url).hostname or ''
+        with self._lock:
+            open_until = self._open_until.get(host)
+            if open_until is None:
+                return
+            now = time.monotonic()
+            if now < open_until:
+                raise CircuitOpenError(
+                    f"The SIS at '{host}' is failing; not retrying for another {open_until - now:.0f}s."
+                )
+            # Let this request through as the probe; others keep failing fast until it reports back.
+            self._open_until[host] = now + self.reset_timeout
+
+    def record_success(self, url: str):
+        host = urlsplit(url).hostname or ''
+        with self._lock:
+            self._failures.pop(host, None)
+            self._open_until.pop(host, None)
+
+    def record_failure(self, url: str):
+        host = urlsplit(url).hostname or ''
+        with self._lock:
+            failures = self._failures.get(host, 0) + 1
+            self._failures[host] = failures
+            if failures >= self.failure_threshold:
+                if host not in self._open_until:
+                    logger.error("Circuit for SIS host '%s' opened after %d consecutive failures.", host, failures)
+                self._open_until[host] = time.monotonic() + self.reset_timeout
+
+    def state(self, url: str) -> str:
+        """Returns 'closed', 'open' or 'half-open' for the url's host."""
+        host = urlsplit(url).hostname or ''
+        with self._lock:
+            open_until = self._open_until.get(host)
+        if open_until is None:
+            return 'closed'
+        return 'open' if time.monotonic() < open_until else 'half-open'
+
+
+# The breaker shared by every SIS client in this process.
+circuit_breaker = CircuitBreaker()
@@ -0,0 +1,254 @@
+# core/sessions.py
+import hmac
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager, contextmanager
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.signals import user_logged_out
+from django.dispatch import receiver
+
+from .async_client import AsyncEmpowerClient
+from .async_network import AsyncHttpClient
+from .client import EmpowerClient
+from .cookie_store import get_cookie_store
+from .exceptions import AuthenticationError
+from .network import HttpClient
+
+
+class SessionPool:
+    """
+    A process-wide pool of authenticated HttpClient instances, keyed by Django user.
+
+    Instead of logging in and out of the SIS on every request, views check a
+    client out of the pool, use it, and hand it back. Idle clients expire after
+    `idle_timeout` seconds and the least recently used ones are evicted once the
+    pool holds more than `max_size` users; both are logged out of the SIS in the
+    background, off the request that noticed them. Expired SIS sessions are still
+    handled by the HttpClient's own SessionExpiredError re-login path.
+
+    When a cookie jar store is configured, returned sessions are also saved there,
+    and a worker that has no local client for a user rehydrates one from the store
+    instead of logging in. If the store is shared between processes, sessions
+    dropped locally are then not logged out of the SIS, since other workers may
+    still be using them.
+    """
+
+    def __init__(self, max_size=None, idle_timeout=None, cookie_store=None):
+        """
+        Initializes the pool.
+
+        Args:
+            max_size (int, optional): Maximum number of idle sessions kept alive.
+                Defaults to settings.EMPTOUCH_SESSION_POOL_SIZE.
+            idle_timeout (float, optional): Seconds an idle session is kept before
+                it is logged out. Defaults to settings.EMPTOUCH_SESSION_IDLE_TIMEOUT.
+            cookie_store (BaseCookieJarStore, optional): Store used to share cookie
+                jars between workers. Defaults to settings.EMPTOUCH_COOKIE_STORE.
+        """
+        if max_size is None:
+            max_size = getattr(settings, 'EMPTOUCH_SESSION_POOL_SIZE', 200)
+        if idle_timeout is None:
+            idle_timeout = getattr(settings, 'EMPTOUCH_SESSION_IDLE_TIMEOUT', 15 * 60)
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.cookie_store = cookie_store if cookie_store is not None else get_cookie_store()
+        # Maps user pk -> (HttpClient, last_used). Ordered from least to most recently used.
+        self._idle = OrderedDict()
+        self._lock = threading.Lock()
+        # Logs out expired and evicted sessions, so that the request which happens
+        # to notice them doesn't wait for their SIS round trips.
+        self._closer = ThreadPoolExecutor(max_workers=2, thread_name_prefix='sis-logout')
+
+    def checkout(self, user, password) -> HttpClient:
+        """
+        Takes the user's idle HttpClient out of the pool, or creates a new one.
+
+        A pooled client is only reused if it was created with the same password;
+        otherwise it is discarded so that changed credentials take effect.
+        The caller owns the returned client until it is passed to `checkin()`.
+        """
+        with self._lock:
+            stale = self._pop_expired()
+            entry = self._idle.pop(user.pk, None)
+
+        http_client = None
+        if entry is not None:
+            pooled_client, _ = entry
+            if hmac.compare_digest(pooled_client._password.encode(), password.encode()):
+                http_client = pooled_client
+            else:
+                stale.append(pooled_client)
+
+        self._close_later(stale)
+        if http_client is None:
+            http_client = HttpClient(user.username, password)
+            self._rehydrate(user, http_client)
+        return http_client
+
+    def checkin(self, user, http_client: HttpClient):
+        """
+        Returns a client to the pool so the next request for this user can reuse it.
+        """
+        if self.cookie_store is not None and http_client._is_logged_in:
+            self.cookie_store.save(user, http_client.export_cookies(), http_client.authenticated_at)
+
+        with self._lock:
+            stale = self._pop_expired()
+            previous = self._idle.pop(user.pk, None)
+            if previous is not None:
+                # Another request returned a client for this user first; keep the newest one.
+                stale.append(previous[0])
+            self._idle[user.pk] = (http_client, time.monotonic())
+            while len(self._idle) > self.max_size:
+                _, (evicted_client, _) = self._idle.popitem(last=False)
+                stale.append(evicted_client)
+
+        self._close_later(stale)
+
+    def clone(self, user, password) -> HttpClient:
+        """
+        Returns a new client continuing the user's SIS session, taken from their
+        idle pooled client (if it was created with the same password) or from the
+        shared cookie jar, without checking anything out of the pool. Meant for
+        background work that shouldn't hold up the user's own requests; the
+        caller owns the returned client and never passes it to `checkin()`.
+        """
+        with self._lock:
+            entry = self._idle.get(user.pk)
+            if entry is not None and hmac.compare_digest(entry[0]._password.encode(), password.encode()):
+                return entry[0].clone()
+        http_client = HttpClient(user.username, password)
+        self._rehydrate(user, http_client)
+        return http_client
+
+    def discard(self, user):
+        """
+        Removes and logs out the user's pooled session, if there is one, and
+        forgets any jar shared with other workers.
+        """
+        with self._lock:
+            entry = self._idle.pop(user.pk, None)
+        if self.cookie_store is not None:
+            self.cookie_store.delete(user)
+        if entry is not None:
+            entry[0].close()
+
+    def clear(self):
+        """
+        Logs out and removes every pooled session.
+        """
+        with self._lock:
+            clients = [http_client for http_client, _ in self._idle.values()]
+            self._idle.clear()
+        self._close_all(clients)
+
+    @contextmanager
+    def session(self, user, password):
+        """
+        Checks out an EmpowerClient for the duration of a `with` block.
+
+        The underlying HttpClient is returned to the pool afterwards, unless
+        authentication failed, in which case it is thrown away.
+        """
+        http_client = self.checkout(user, password)
+        discard = False
+        try:
+            yield EmpowerClient(user.username, password, http_client=http_client)
+        except AuthenticationError:
+            discard = True
+            raise
+        finally:
+            if discard:
+                http_client.close()
+            else:
+                self.checkin(user, http_client)
+
+    @asynccontextmanager
+    async def async_session(self, user, password):
+        """
+        The async counterpart of `session()`, yielding an AsyncEmpowerClient.
+
+        The pooled HttpClient's SIS session is carried over into a short-lived
+        AsyncHttpClient (whose connections are bound to the current event loop),
+        and any re-login it performs is copied back before the client is returned.
+        """
+        http_client = await sync_to_async(self.checkout)(user, password)
+        async_client = AsyncHttpClient.from_client(http_client)
+        discard = False
+        try:
+            yield AsyncEmpowerClient(user.username, password, http_client=async_client)
+        except AuthenticationError:
+            discard = True
+            raise
+        finally:
+            async_client.sync_to(http_client)
+            await async_client.aclose(logout=False)
+            if discard:
+                await sync_to_async(http_client.close)()
+            else:
+                await sync_to_async(self.checkin)(user, http_client)
+
+    def __len__(self):
+        return len(self._idle)
+
+    def _pop_expired(self) -> list:
+        """
+        Removes idle entries older than `idle_timeout`. Must be called with the lock held.
+        """
+        expired = []
+        deadline = time.monotonic() - self.idle_timeout
+        while self._idle:
+            key, (http_client, last_used) = next(iter(self._idle.items()))
+            if last_used > deadline:
+                break
+            del self._idle[key]
+            expired.append(http_client)
+        return expired
+
+    def _rehydrate(self, user, http_client: HttpClient):
+        """
+        Loads the user's shared cookie jar into a fresh client, if one is stored.
+        """
+        if self.cookie_store is None:
+            return
+        jar = self.cookie_store.load(user)
+        if jar is not None:
+            http_client.load_cookies(jar['cookies'], jar['authenticated_at'])
+
+    def _close_later(self, clients):
+        """
+        Closes clients dropped while serving a request. Their SIS logouts run in
+        the background; clients whose sessions live on in the shared store need
+        no network I/O and are closed right away.
+        """
+        if not clients:
+            return
+        if self.cookie_store is not None and self.cookie_store.shared:
+            self._close_all(clients)
+        else:
+            self._closer.submit(self._close_all, clients)
+
+    def _close_all(self, clients):
+        """
+        Closes the given clients. Called outside the lock, since it does network I/O.
+        """
+        logout = self.cookie_store is None or not self.cookie_store.shared
+        for http_client in clients:
+            http_client.close(logout=logout)
+
+
+# The shared pool used by all views in this process.
+session_pool = SessionPool()
+
+
+@receiver(user_logged_out)
+def discard_pooled_session(sender, request, user, **kwargs):
+    """
+    Logs the user out of the SIS as well when they sign out of Emptouch.
+    """
+    if user is not None:
+        session_pool.discard(user)
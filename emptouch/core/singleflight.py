@@ -0,0 +1,61 @@
+# core/singleflight.py
+import threading
+from typing import Callable, Hashable
+
+
+class _Call:
+    """The state of one in-flight call, shared by everyone waiting on it."""
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls that share a key into a single execution.
+
+    The first caller for a key runs the function; callers that arrive while it is
+    still running wait for it and receive the same result (or exception). Nothing
+    is remembered once the call finishes; that is the response cache's job.
+    Because the result object is shared, callers must not mutate it.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key: Hashable, func: Callable):
+        """
+        Runs `func()` unless a call with the same key is already in flight, in
+        which case it waits for that call and returns its outcome.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            is_leader = call is None
+            if is_leader:
+                call = self._calls[key] = _Call()
+
+        if not is_leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+
+# Shared by every EmpowerClient in the process, so that duplicate requests from
+# different pooled sessions of the same user are coalesced too.
+in_flight = SingleFlight()
@@ -0,0 +1,266 @@
+# core/sync.py
+import functools
+import hashlib
+import json
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Dict, Iterable, List, Optional, Tuple, Type
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from .client import EmpowerClient
+from .correlation import in_current_context
+from .endpoints import Endpoint
+from .metrics import metrics, timed
+from .models import SyncedModel, SyncState
+from .parsers import BaseParser
+from .sessions import session_pool
+
+logger = logging.getLogger(__name__)
+
+# Fields every SyncedModel has that are managed by the sync itself, not the parser.
+BOOKKEEPING_FIELDS = {'id', 'user', 'sync_key', 'content_hash', 'synced_at', 'created_at', 'updated_at', 'is_deleted'}
+
+
+@dataclass(frozen=True)
+class SyncSpec:
+    """
+    Mirrors one SIS page into a SyncedModel.
+
+    The parser must return a list of dicts keyed by model field name; keys that
+    aren't fields of the model are ignored. `key_fields` name the fields that
+    identify a record among one user's rows. If several rows share a key, the
+    last one wins.
+
+    Attributes:
+        name (str): Unique name, used in SyncState and on the command line.
+        model (Type[SyncedModel]): The model the rows are stored in.
+        endpoint (Endpoint): The page to fetch.
+        parser_class (Type[BaseParser]): Turns the page into a list of row dicts.
+        key_fields (tuple): Fields forming each row's natural key.
+        interval (float, optional): Seconds between syncs of the same user.
+            Defaults to settings.EMPTOUCH_SYNC['INTERVAL'].
+    """
+    name: str
+    model: Type[SyncedModel]
+    endpoint: Endpoint
+    parser_class: Type[BaseParser]
+    key_fields: Tuple[str, ...]
+    interval: Optional[float] = None
+
+    @property
+    def fields(self) -> List[str]:
+        """The model fields filled from parsed rows."""
+        return [f.name for f in self.model._meta.concrete_fields if f.name not in BOOKKEEPING_FIELDS]
+
+    @property
+    def max_age(self) -> timedelta:
+        interval = self.interval
+        if interval is None:
+            interval = _config().get('INTERVAL', 60 * 60)
+        return timedelta(seconds=interval)
+
+    def key_for(self, values: dict) -> str:
+        return '|'.join(str(values.get(name, '')) for name in self.key_fields)
+
+
+@dataclass
+class SyncResult:
+    """The outcome of syncing one spec for one user."""
+    name: str
+    created: int = 0
+    updated: int = 0
+    deleted: int = 0
+    unchanged: int = 0
+    error: Optional[Exception] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+# This list will hold all registered sync specs.
+SYNC_REGISTRY: List[SyncSpec] = []
+
+
+def register(spec: SyncSpec):
+    """Adds a sync spec to the central registry."""
+    if not isinstance(spec, SyncSpec):
+        raise TypeError("Only SyncSpec instances can be registered.")
+    if not issubclass(spec.model, SyncedModel):
+        raise TypeError(f"{spec.model.__name__} must derive from core.models.SyncedModel.")
+    if get_spec(spec.name) is not None:
+        raise ValueError(f"A sync spec named '{spec.name}' is already registered.")
+    unknown = set(spec.key_fields) - set(spec.fields)
+    if unknown:
+        raise ValueError(f"Sync spec '{spec.name}' keys on unknown fields: {', '.join(sorted(unknown))}.")
+    SYNC_REGISTRY.append(spec)
+
+
+def get_spec(name: str) -> Optional[SyncSpec]:
+    """Returns the registered spec with the given name, or None."""
+    for spec in SYNC_REGISTRY:
+        if spec.name == name:
+            return spec
+    return None
+
+
+def _config() -> dict:
+    return getattr(settings, 'EMPTOUCH_SYNC', None) or {}
+
+
+def _content_hash(values: dict) -> str:
+    encoded = json.dumps(values, sort_keys=True, default=str, separators=(',', ':'))
+    return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+
+def apply_rows(spec: SyncSpec, user, rows: Iterable[dict]) -> SyncResult:
+    """
+    Brings the user's stored rows for `spec` in line with freshly parsed ones.
+
+    Only rows whose content changed (or that come back after being soft-deleted)
+    are written, with one bulk upsert; rows missing from `rows` are soft-deleted
+    with one UPDATE. Unchanged rows aren't touched.
+    """
+    now = timezone.now()
+    fields = spec.fields
+    incoming = {}
+    for row in rows:
+        values = {name: row.get(name) for name in fields}
+        incoming[spec.key_for(values)] = values
+
+    manager = spec.model.all_objects
+    stored = {
+        sync_key: (content_hash, is_deleted)
+        for sync_key, content_hash, is_deleted in manager.filter(user=user).values_list('sync_key', 'content_hash', 'is_deleted')
+    }
+
+    changed = []
+    created = 0
+    for sync_key, values in incoming.items():
+        content_hash = _content_hash(values)
+        previous = stored.get(sync_key)
+        if previous == (content_hash, False):
+            continue
+        if previous is None:
+            created += 1
+        changed.append(spec.model(user=user, sync_key=sync_key, content_hash=content_hash,
+                                  synced_at=now, is_deleted=False, **values))
+    vanished = [sync_key for sync_key, (_, is_deleted) in stored.items() if not is_deleted and sync_key not in incoming]
+
+    with transaction.atomic():
+        if changed:
+            manager.bulk_create(
+                changed,
+                batch_size=500,
+                update_conflicts=True,
+                unique_fields=['user', 'sync_key'],
+                update_fields=[*fields, 'content_hash', 'synced_at', 'is_deleted', 'updated_at'],
+            )
+        if vanished:
+            manager.filter(user=user, sync_key__in=vanished).update(is_deleted=True, updated_at=now)
+
+    return SyncResult(spec.name, created=created, updated=len(changed) - created, deleted=len(vanished),
+                      unchanged=len(incoming) - len(changed))
+
+
+def due_specs(user, specs: Iterable[SyncSpec] = None) -> List[SyncSpec]:
+    """Returns the specs whose data for `user` is older than their interval."""
+    specs = list(SYNC_REGISTRY if specs is None else specs)
+    last_synced = dict(SyncState.objects.filter(user=user).values_list('name', 'last_synced_at'))
+    now = timezone.now()
+    return [spec for spec in specs
+            if last_synced.get(spec.name) is None or now - last_synced[spec.name] >= spec.max_age]
+
+
+def sync_user(user, client: EmpowerClient, specs: Iterable[SyncSpec] = None, force: bool = False) -> Dict[str, SyncResult]:
+    """
+    Fetches the user's pages for the given specs (all registered ones by default)
+    concurrently, and applies each to its model. Specs synced more recently than
+    their interval are skipped unless `force` is set. A failing spec is recorded
+    in its SyncState and doesn't stop the others.
+
+    Returns:
+        A dict mapping spec names to their SyncResult.
+    """
+    specs = list(SYNC_REGISTRY if specs is None else specs)
+    if not force:
+        specs = due_specs(user, specs)
+    if not specs:
+        return {}
+
+    batch = client.get_many([(spec.endpoint, spec.parser_class) for spec in specs])
+    results = {}
+    for spec, fetched in zip(specs, batch):
+        attempted_at = timezone.now()
+        if fetched.ok:
+            try:
+                with timed('sync_apply_seconds', spec=spec.name):
+                    result = apply_rows(spec, user, fetched.value)
+            except Exception as e:
+                logger.exception("Storing synced '%s' rows for '%s' failed.", spec.name, user.username)
+                result = SyncResult(spec.name, error=e)
+        else:
+            logger.warning("Fetching '%s' for '%s' failed: %s", spec.name, user.username, fetched.error)
+            result = SyncResult(spec.name, error=fetched.error)
+
+        state_fields = {'last_attempt_at': attempted_at, 'last_error': '' if result.ok else str(result.error)}
+        if result.ok:
+            state_fields['last_synced_at'] = attempted_at
+            for change in ('created', 'updated', 'deleted'):
+                if getattr(result, change):
+                    metrics.increment('sync_rows', getattr(result, change), {'spec': spec.name, 'change': change})
+        else:
+            metrics.increment('sync_errors', labels={'spec': spec.name})
+        SyncState.objects.update_or_create(user=user, name=spec.name, defaults=state_fields)
+        results[spec.name] = result
+    return results
+
+
+# Background syncs are kept to a few threads, so that a burst of logins can't
+# turn into a burst of SIS traffic.
+_executor = ThreadPoolExecutor(
+    max_workers=_config().get('MAX_WORKERS', 2),
+    thread_name_prefix='sis-sync',
+)
+_pending = set()
+_pending_lock = threading.Lock()
+
+
+def sync_in_background(user, password) -> Optional[Future]:
+    """
+    Queues a sync of the user's due specs on a copy of their pooled SIS session,
+    e.g. right after login. Returns None if nothing is registered or a sync for
+    the user is already queued.
+    """
+    if not SYNC_REGISTRY:
+        return None
+    with _pending_lock:
+        if user.pk in _pending:
+            return None
+        _pending.add(user.pk)
+    return _executor.submit(in_current_context(functools.partial(_sync_in_session, user, password)))
+
+
+def _sync_in_session(user, password) -> Dict[str, SyncResult]:
+    # The sync runs on its own client, so that the user's pooled one stays
+    # available for their page loads while the SIS pages are fetched.
+    http_client = session_pool.clone(user, password)
+    authenticated_at = http_client.authenticated_at
+    try:
+        return sync_user(user, EmpowerClient(user.username, password, http_client=http_client))
+    except Exception:
+        logger.exception("Background sync for '%s' failed.", user.username)
+        return {}
+    finally:
+        # Only log out a session the sync had to open itself.
+        http_client.close(logout=http_client.authenticated_at != authenticated_at)
+        with _pending_lock:
+            _pending.discard(user.pk)
+        # Worker threads get their own DB connections; don't leave them open.
+        close_old_connections()
@@ -0,0 +1,47 @@
+# core/tests/test_cache.py
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from core.cache import response_cache
+from core.client import EmpowerClient
+from core.endpoints import Endpoint
+from core.parsers import BaseParser
+from core.tests.utils import DeferredExecutor, FakeClock, FakeSISMixin
+
+
+class TitleParser(BaseParser):
+    def parse(self):
+        return self.document.select_one('title').text()
+
+
+class StaleWhileRevalidateTests(FakeSISMixin, SimpleTestCase):
+    endpoint = Endpoint('STUDENT.GRADES', cache_ttl=1, stale_ttl=60)
+
+    def entry(self):
+        key = response_cache._key('student', self.endpoint, None, TitleParser)
+        return response_cache._cache.get(key)
+
+    def setUp(self):
+        super().setUp()
+        self.clock = FakeClock()
+        patcher = mock.patch('core.cache.time', self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_refresh_outlives_the_callers_client(self):
+        refresher = DeferredExecutor()
+        with mock.patch.object(response_cache, '_refresher', refresher):
+            with EmpowerClient('student', 'secret', http_client=self.http_client()) as client:
+                first = client.get(self.endpoint, TitleParser)
+                stale_until = self.entry()['fresh_until']
+                self.clock.advance(2)
+                self.assertEqual(client.get(self.endpoint, TitleParser), first)
+                self.assertEqual(len(refresher.tasks), 1)
+
+            # The caller's client is closed and logged out by now.
+            with self.assertNoLogs('core.cache', 'WARNING'):
+                refresher.run_all()
+
+        self.assertGreater(self.entry()['fresh_until'], stale_until)
+        self.assertEqual(self.entry()['value'], first)
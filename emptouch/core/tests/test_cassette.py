@@ -0,0 +1,78 @@
+# core/tests/test_cassette.py
+import gzip
+import tempfile
+from pathlib import Path
+
+import requests
+from django.test import SimpleTestCase
+from requests.adapters import HTTPAdapter
+
+from core.cassette import RECORD, REPLAY, CassetteAdapter
+from core.exceptions import CassetteMissError
+
+URL = 'https://sis.example.edu/empower/fusebox.cfm'
+
+
+class StubTransport(HTTPAdapter):
+    """Answers every request with a page naming the requested fuseaction."""
+
+    def __init__(self):
+        super().__init__()
+        self.sent = []
+
+    def send(self, request, **kwargs):
+        self.sent.append(request)
+        response = requests.Response()
+        response.status_code = 200
+        response.headers['Content-Type'] = 'text/html; charset=utf-8'
+        response.headers['Set-Cookie'] = 'CFID=1234'
+        response._content = f"<title>{request.url.rsplit('=', 1)[-1]}</title>".encode()
+        response.url = request.url
+        response.request = request
+        return response
+
+
+class CassetteAdapterTests(SimpleTestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = Path(directory.name) / 'sis.jsonl.gz'
+
+    def session(self, adapter: CassetteAdapter) -> requests.Session:
+        session = requests.Session()
+        session.mount('https://', adapter)
+        return session
+
+    def test_replays_what_was_recorded(self):
+        transport = StubTransport()
+        recorder = self.session(CassetteAdapter(self.path, RECORD, transport))
+        recorder.get(URL, params={'fuseaction': 'STUDENT.GRADES'})
+        recorder.post(URL, params={'fuseaction': 'LOGIN'}, data={'empower_user': 'student', 'empower_pswd': 'secret'})
+
+        player = self.session(CassetteAdapter(self.path, REPLAY))
+        page = player.get(URL, params={'fuseaction': 'STUDENT.GRADES'})
+        login = player.post(URL, params={'fuseaction': 'LOGIN'},
+                            data={'empower_user': 'student', 'empower_pswd': 'another'})
+
+        self.assertEqual(len(transport.sent), 2)
+        self.assertEqual((page.status_code, page.text), (200, '<title>STUDENT.GRADES</title>'))
+        self.assertEqual(login.text, '<title>LOGIN</title>')
+        self.assertNotIn('Set-Cookie', page.headers)
+
+    def test_does_not_store_passwords_or_cookies(self):
+        recorder = self.session(CassetteAdapter(self.path, RECORD, StubTransport()))
+        recorder.post(URL, params={'fuseaction': 'LOGIN'}, data={'empower_user': 'student', 'empower_pswd': 'secret'})
+
+        with gzip.open(self.path, 'rt') as cassette:
+            recorded = cassette.read()
+        self.assertNotIn('secret', recorded)
+        self.assertNotIn('CFID', recorded)
+
+    def test_unrecorded_request_raises_a_miss(self):
+        recorder = self.session(CassetteAdapter(self.path, RECORD, StubTransport()))
+        recorder.get(URL, params={'fuseaction': 'STUDENT.GRADES'})
+
+        player = self.session(CassetteAdapter(self.path, REPLAY))
+        with self.assertRaisesMessage(CassetteMissError, 'fuseaction=STUDENT.SCHEDULE'):
+            player.get(URL, params={'fuseaction': 'STUDENT.SCHEDULE'})
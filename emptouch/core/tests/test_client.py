@@ -0,0 +1,153 @@
+# core/tests/test_client.py
+import threading
+import time
+
+from django.test import SimpleTestCase
+
+from core.client import EmpowerClient
+from core.documents import parse_document
+from core.endpoints import Endpoint
+from core.exceptions import AuthenticationError, NavigationError, PageParsingError, SessionExpiredError, SISTimeoutError
+from core.parsers import BaseParser
+
+TOKEN_PAGE = b'<html><body><form><input name="token" value="%s"></form></body></html>'
+
+
+class TextParser(BaseParser):
+    def parse(self):
+        return self.document.text(strip=True)
+
+
+class StubHttpClient:
+    """Serves token pages and answers .cfc calls from a script of results."""
+
+    def __init__(self, ajax_results):
+        self._tokens = {}
+        self.ajax_results = list(ajax_results)
+        self.ajax_tokens = []
+        self.pages_served = 0
+
+    def get(self, endpoint, target=None):
+        self.pages_served += 1
+        return parse_document(TOKEN_PAGE % str(self.pages_served).encode())
+
+    def ajax_post(self, cfc_url, method, payload, parser_backend=None, target=None):
+        self.ajax_tokens.append(payload['token'])
+        result = self.ajax_results.pop(0)
+        if isinstance(result, Exception):
+            raise result
+        return parse_document(result)
+
+
+class AjaxTokenRetryTests(SimpleTestCase):
+    endpoint = Endpoint('STUDENT.SEARCH')
+
+    def call(self, http_client):
+        client = EmpowerClient('student', 'secret', http_client=http_client)
+        return client.ajax_post(self.endpoint, 'token', 'https://sis/x.cfc', 'Search', {}, TextParser)
+
+    def test_rejected_cached_token_is_replaced_once(self):
+        http_client = StubHttpClient([b'<p>first</p>', SessionExpiredError('login page'), b'<p>second</p>'])
+        self.assertEqual(self.call(http_client), 'first')
+        self.assertEqual(self.call(http_client), 'second')
+        self.assertEqual(http_client.ajax_tokens, ['1', '1', '2'])
+
+    def test_timeout_is_not_retried(self):
+        http_client = StubHttpClient([b'<p>first</p>', SISTimeoutError('timed out'), b'<p>second</p>'])
+        self.call(http_client)
+        with self.assertRaises(SISTimeoutError):
+            self.call(http_client)
+        self.assertEqual(http_client.ajax_tokens, ['1', '1'])
+        self.assertEqual(http_client.pages_served, 1)
+
+    def test_unreadable_response_is_not_retried(self):
+        http_client = StubHttpClient([b'<p>first</p>', PageParsingError('unexpected markup'), b'<p>second</p>'])
+        self.call(http_client)
+        with self.assertRaises(PageParsingError):
+            self.call(http_client)
+        self.assertEqual(http_client.ajax_tokens, ['1', '1'])
+        self.assertEqual(http_client.pages_served, 1)
+
+
+class BatchHttpClient:
+    """
+    Serves '<p>FUSEACTION</p>' pages after a delay, failing for fuseactions
+    listed in `failures`, and tracks how many requests were in flight at once.
+    """
+
+    def __init__(self, delays=None, failures=(), login_error=None):
+        self.delays = delays or {}
+        self.failures = set(failures)
+        self.login_error = login_error
+        self.logins = 0
+        self.in_flight = self.max_in_flight = 0
+        self._lock = threading.Lock()
+
+    def _ensure_logged_in(self):
+        self.logins += 1
+        if self.login_error is not None:
+            raise self.login_error
+
+    def get(self, endpoint, target=None):
+        with self._lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            time.sleep(self.delays.get(endpoint.fuseaction, 0.02))
+            if endpoint.fuseaction in self.failures:
+                raise NavigationError(f"{endpoint.fuseaction} failed")
+            return parse_document(f'<p>{endpoint.fuseaction}</p>'.encode())
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+    def post(self, endpoint, payload, target=None):
+        return self.get(endpoint, target)
+
+
+class BatchTests(SimpleTestCase):
+    fuseactions = ['A', 'B', 'C', 'D', 'E', 'F']
+
+    def get_many(self, http_client, max_concurrency=4):
+        client = EmpowerClient('student', 'secret', http_client=http_client)
+        return client.get_many([(Endpoint(name), TextParser) for name in self.fuseactions], max_concurrency)
+
+    def test_results_keep_the_input_order(self):
+        # Earlier requests take longer, so they finish last.
+        delays = {name: 0.06 - 0.01 * i for i, name in enumerate(self.fuseactions)}
+
+        results = self.get_many(BatchHttpClient(delays))
+
+        self.assertEqual([result.value for result in results], self.fuseactions)
+        self.assertEqual([result.endpoint.fuseaction for result in results], self.fuseactions)
+
+    def test_failing_request_is_recorded_without_aborting_the_batch(self):
+        results = self.get_many(BatchHttpClient(failures={'C'}))
+
+        self.assertEqual([result.ok for result in results], [True, True, False, True, True, True])
+        self.assertIsInstance(results[2].error, NavigationError)
+        self.assertEqual(results[5].value, 'F')
+
+    def test_concurrency_is_capped(self):
+        http_client = BatchHttpClient()
+
+        self.get_many(http_client, max_concurrency=2)
+
+        self.assertEqual(http_client.max_in_flight, 2)
+
+    def test_login_failure_is_reported_for_every_request(self):
+        error = AuthenticationError("SIS rejected the password")
+        http_client = BatchHttpClient(login_error=error)
+
+        results = self.get_many(http_client)
+
+        self.assertEqual(http_client.logins, 1)
+        self.assertEqual([result.error for result in results], [error] * len(self.fuseactions))
+        self.assertEqual(http_client.max_in_flight, 0)
+
+    def test_post_many_pairs_payloads_with_their_endpoints(self):
+        client = EmpowerClient('student', 'secret', http_client=BatchHttpClient())
+
+        results = client.post_many([(Endpoint('A'), {'term': '1'}, TextParser), (Endpoint('B'), {}, TextParser)])
+
+        self.assertEqual([result.value for result in results], ['A', 'B'])
@@ -0,0 +1,113 @@
+# core/tests/test_correlation.py
+import logging
+import threading
+
+from asgiref.sync import async_to_sync
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase
+
+from core.client import EmpowerClient
+from core.correlation import RequestIDFilter, request_id
+from core.documents import parse_document
+from core.endpoints import Endpoint
+from core.middleware import RequestIDMiddleware
+from core.parsers import BaseParser
+from core.widgets import Widget, fetch_widget_data
+
+logger = logging.getLogger('core.tests.correlation')
+logger.addFilter(RequestIDFilter())
+
+
+class RequestIDMiddlewareTests(SimpleTestCase):
+
+    def setUp(self):
+        self.seen = []
+
+    def get_response(self, request):
+        self.seen.append(request_id.get())
+        return HttpResponse()
+
+    def call(self, **headers):
+        middleware = RequestIDMiddleware(self.get_response)
+        return middleware(RequestFactory().get('/', headers=headers))
+
+    def test_valid_incoming_id_is_reused(self):
+        response = self.call(X_Request_ID='proxy-1234.a_b')
+
+        self.assertEqual(self.seen, ['proxy-1234.a_b'])
+        self.assertEqual(response['X-Request-ID'], 'proxy-1234.a_b')
+
+    def test_new_id_is_generated_without_an_incoming_one(self):
+        response = self.call()
+
+        self.assertRegex(response['X-Request-ID'], r'^[0-9a-f]{32}$')
+        self.assertEqual(self.seen, [response['X-Request-ID']])
+
+    def test_malformed_or_oversized_ids_are_replaced(self):
+        for incoming in ['abc def', 'id\r\nforged: log line', '<script>', 'x' * 65]:
+            with self.subTest(incoming=incoming):
+                response = self.call(X_Request_ID=incoming)
+                self.assertRegex(response['X-Request-ID'], r'^[0-9a-f]{32}$')
+
+    def test_id_is_reset_after_the_request(self):
+        self.call(X_Request_ID='req-1')
+
+        self.assertEqual(request_id.get(), '-')
+
+    def test_async_request_gets_an_id(self):
+        async def get_response(request):
+            return self.get_response(request)
+
+        middleware = RequestIDMiddleware(get_response)
+        response = async_to_sync(middleware)(RequestFactory().get('/', headers={'X-Request-ID': 'req-async'}))
+
+        self.assertEqual(self.seen, ['req-async'])
+        self.assertEqual(response['X-Request-ID'], 'req-async')
+
+
+class LoggingHttpClient:
+    """Logs from whichever thread serves each request."""
+
+    def _ensure_logged_in(self):
+        pass
+
+    def get(self, endpoint, target=None):
+        logger.info("Fetching %s on %s", endpoint.fuseaction, threading.current_thread().name)
+        return parse_document(b'<p>ok</p>')
+
+
+class TextParser(BaseParser):
+    def parse(self):
+        return self.document.text(strip=True)
+
+
+class WorkerThreadTests(SimpleTestCase):
+    """Work handed to thread pools logs with the request ID that scheduled it."""
+
+    def setUp(self):
+        token = request_id.set('req-42')
+        self.addCleanup(request_id.reset, token)
+
+    def assertLoggedFromPool(self, logs, prefix):
+        self.assertTrue(logs.records)
+        for record in logs.records:
+            self.assertEqual(record.request_id, 'req-42')
+            self.assertIn(prefix, record.getMessage())
+
+    def test_batch_workers_log_with_the_request_id(self):
+        client = EmpowerClient('student', 'secret', http_client=LoggingHttpClient())
+
+        with self.assertLogs(logger, 'INFO') as logs:
+            client.get_many([(Endpoint(name), TextParser) for name in ['A', 'B', 'C']])
+
+        self.assertLoggedFromPool(logs, 'sis-batch')
+
+    def test_widget_workers_log_with_the_request_id(self):
+        def fetch(user):
+            logger.info("Fetching widget on %s", threading.current_thread().name)
+            return {}
+
+        with self.assertLogs(logger, 'INFO') as logs:
+            fetch_widget_data([Widget(name, 'view_grades', 'core/widget.html', fetch) for name in ['A', 'B']], None)
+
+        self.assertLoggedFromPool(logs, 'widget-fetch')
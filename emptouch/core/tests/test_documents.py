@@ -0,0 +1,31 @@
+# core/tests/test_documents.py
+from django.core.exceptions import ImproperlyConfigured
+from django.test import SimpleTestCase
+
+from core.documents import BACKENDS, ParseTarget, parse_document
+
+NESTED = b'<html><body><div class="outer"><p>a</p><div class="outer"><p>b</p></div></div><p>c</p></body></html>'
+
+
+class CssTargetTests(SimpleTestCase):
+    def parse(self, backend, target):
+        try:
+            return parse_document(NESTED, backend, target)
+        except ImproperlyConfigured as e:
+            self.skipTest(str(e))
+
+    def test_nested_matches_stay_inside_their_ancestor(self):
+        for backend in BACKENDS:
+            with self.subTest(backend=backend):
+                document = self.parse(backend, ParseTarget(css='div.outer'))
+                outer = document.select('div.outer')
+                self.assertEqual(outer[0].text(), 'ab')
+                self.assertEqual(outer[1].text(), 'b')
+                # Each paragraph exactly once: nothing torn out or duplicated.
+                self.assertEqual([p.text() for p in outer[0].find_all('p')], ['a', 'b'])
+
+    def test_soup_backends_drop_everything_outside_the_target(self):
+        for backend in ('html.parser', 'lxml'):
+            with self.subTest(backend=backend):
+                document = self.parse(backend, ParseTarget(css='div.outer'))
+                self.assertEqual([p.text() for p in document.find_all('p')], ['a', 'b'])
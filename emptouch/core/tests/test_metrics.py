@@ -0,0 +1,63 @@
+# core/tests/test_metrics.py
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from core import endpoints
+from core.endpoints import Endpoint
+from core.network import HttpClient
+
+
+class EndpointLabelTests(SimpleTestCase):
+
+    def setUp(self):
+        patcher = mock.patch.dict(endpoints.ENDPOINT_REGISTRY)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_registered_fuseaction_is_labelled_by_name(self):
+        endpoints.register(Endpoint('STUDENT.GRADES', name='grades'))
+
+        self.assertEqual(endpoints.metric_label('STUDENT.GRADES'), 'grades')
+
+    def test_anything_else_is_labelled_other(self):
+        self.assertEqual(endpoints.metric_label('STUDENT.WHATEVER.A.USER.TYPED'), 'other')
+        self.assertEqual(endpoints.metric_label(None), 'other')
+
+    def test_client_labels_login_and_ajax_requests(self):
+        client = HttpClient('student', 'secret')
+
+        self.assertEqual(client._endpoint_label(client.auth_url, None), 'login')
+        self.assertEqual(client._endpoint_label('https://sis.example.edu/some/user/typed.cfc', None), 'other')
+        self.assertEqual(client._endpoint_label(client.navigation_url, 'Logout'), 'logout')
+
+    def test_registering_requires_a_unique_name(self):
+        with self.assertRaises(ValueError):
+            endpoints.register(Endpoint('STUDENT.GRADES'))
+        with self.assertRaises(ValueError):
+            endpoints.register(Endpoint('Logout', name='logout-again'))
+
+
+class MetricsViewTests(TestCase):
+
+    def test_hidden_from_anonymous_local_clients(self):
+        response = self.client.get(reverse('metrics'), REMOTE_ADDR='127.0.0.1')
+
+        self.assertEqual(response.status_code, 404)
+
+    def test_served_to_staff(self):
+        self.client.force_login(User.objects.create(username='admin', is_staff=True))
+
+        response = self.client.get(reverse('metrics'))
+
+        self.assertEqual(response.status_code, 200)
+
+    @override_settings(EMPTOUCH_METRICS_TOKEN='scrape-me')
+    def test_served_with_the_token(self):
+        ok = self.client.get(reverse('metrics'), headers={'Authorization': 'Bearer scrape-me'})
+        wrong = self.client.get(reverse('metrics'), headers={'Authorization': 'Bearer guess'})
+
+        self.assertEqual(ok.status_code, 200)
+        self.assertEqual(wrong.status_code, 404)
@@ -0,0 +1,68 @@
+# core/tests/test_models.py
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+
+from core.models import SISCredential
+
+
+@override_settings(EMPTOUCH_SIS_FINGERPRINT_KEY='fingerprint-key')
+class SISCredentialTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create(username='student')
+
+    def test_unchanged_password_is_not_rehashed(self):
+        self.assertTrue(SISCredential.sync_password(self.user, 'secret'))
+        password_hash = User.objects.get(pk=self.user.pk).password
+
+        self.assertFalse(SISCredential.sync_password(self.user, 'secret'))
+        self.assertEqual(User.objects.get(pk=self.user.pk).password, password_hash)
+        self.assertTrue(self.user.check_password('secret'))
+
+    def test_changed_password_is_rehashed(self):
+        SISCredential.sync_password(self.user, 'secret')
+
+        self.assertTrue(SISCredential.sync_password(self.user, 'new-secret'))
+        self.assertTrue(User.objects.get(pk=self.user.pk).check_password('new-secret'))
+
+    def test_fingerprint_is_not_keyed_with_secret_key(self):
+        fingerprint = SISCredential.make_fingerprint(self.user, 'secret')
+
+        with self.settings(EMPTOUCH_SIS_FINGERPRINT_KEY='another-key'):
+            self.assertNotEqual(SISCredential.make_fingerprint(self.user, 'secret'), fingerprint)
+
+    def test_existing_user_without_a_fingerprint_keeps_a_matching_hash(self):
+        self.user.set_password('secret')
+        self.user.save()
+        password_hash = self.user.password
+
+        self.assertFalse(SISCredential.sync_password(self.user, 'secret'))
+
+        self.assertEqual(User.objects.get(pk=self.user.pk).password, password_hash)
+        self.assertTrue(SISCredential.objects.filter(user=self.user).exists())
+
+
+@override_settings(EMPTOUCH_SIS_FINGERPRINT_KEY=None)
+class SISCredentialWithoutKeyTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create(username='student')
+
+    def test_new_user_gets_a_password_and_no_fingerprint(self):
+        self.assertTrue(SISCredential.sync_password(self.user, 'secret', created=True))
+
+        self.assertTrue(User.objects.get(pk=self.user.pk).check_password('secret'))
+        self.assertFalse(SISCredential.objects.exists())
+
+    def test_unchanged_password_is_not_rehashed(self):
+        SISCredential.sync_password(self.user, 'secret', created=True)
+        password_hash = User.objects.get(pk=self.user.pk).password
+
+        self.assertFalse(SISCredential.sync_password(self.user, 'secret'))
+        self.assertEqual(User.objects.get(pk=self.user.pk).password, password_hash)
+
+    def test_changed_password_is_rehashed(self):
+        SISCredential.sync_password(self.user, 'secret', created=True)
+
+        self.assertTrue(SISCredential.sync_password(self.user, 'new-secret'))
+        self.assertTrue(User.objects.get(pk=self.user.pk).check_password('new-secret'))
@@ -0,0 +1,183 @@
+# core/tests/test_network.py
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from django.test import SimpleTestCase
+
+from core.async_network import AsyncHttpClient
+from core.documents import parse_document
+from core.endpoints import Endpoint
+from core.exceptions import SessionExpiredError, SISTimeoutError
+from core.fakesis.server import PAGES_DIR
+from core.network import HttpClient
+from core.ratelimit import rate_limiter
+from core.resilience import RetryPolicy, circuit_breaker
+from core.tests.utils import FakeSISMixin
+
+URL = 'https://retry.example.edu/empower/fusebox.cfm'
+
+
+class LoginResponseTests(SimpleTestCase):
+    """The byte-level pre-check in front of _is_login_page."""
+
+    def setUp(self):
+        self.client = HttpClient('student', 'secret', navigation_url=URL)
+        patcher = mock.patch('core.network.parse_document', wraps=parse_document)
+        self.parse_document = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def page(self, name):
+        return (PAGES_DIR / name).read_bytes()
+
+    def test_login_page(self):
+        self.assertTrue(self.client._is_login_response(self.page('login.html')))
+
+    def test_authentication_failed_page(self):
+        self.assertTrue(self.client._is_login_response(self.page('auth_failed.html')))
+
+    def test_normal_page_is_not_parsed(self):
+        self.assertFalse(self.client._is_login_response(self.page('fuseactions/STUDENT.GRADES.html')))
+        self.parse_document.assert_not_called()
+
+    def test_page_mentioning_the_markers_is_parsed_and_rejected(self):
+        content = (b'<html><body><p>Fields empower_usrn and empower_pswd are required.</p>'
+                   b'<p class="note">Authentication Failed page-alert styles</p></body></html>')
+
+        self.assertFalse(self.client._is_login_response(content))
+        self.parse_document.assert_called_once()
+
+    def test_parsed_document_is_reused(self):
+        content = self.page('login.html')
+
+        self.assertTrue(self.client._is_login_response(content, parse_document(content)))
+        self.parse_document.assert_not_called()
+
+
+class RetryDecisionTests(SimpleTestCase):
+    """The attempt/backoff decision both HttpClient and AsyncHttpClient use."""
+
+    def setUp(self):
+        self.client = HttpClient('student', 'secret', navigation_url=URL)
+        self.client.retry_policy = RetryPolicy(total=2, backoff=0)
+        self.addCleanup(circuit_breaker.record_success, URL)
+
+    def decide(self, attempt, response=None, failure=None):
+        return self.client._retry_delay('GET', URL, 'STUDENT.GRADES', attempt, 2, response, failure)
+
+    def test_success_stops(self):
+        self.assertIsNone(self.decide(0, response=mock.Mock(status_code=200)))
+        self.assertEqual(circuit_breaker.state(URL), 'closed')
+
+    def test_server_error_is_retried_until_the_last_attempt(self):
+        self.assertEqual(self.decide(0, response=mock.Mock(status_code=503)), 0)
+        self.assertEqual(self.decide(1, failure=SISTimeoutError("timed out")), 0)
+        self.assertIsNone(self.decide(2, response=mock.Mock(status_code=503)))
+
+    def test_only_gets_are_retried_by_default(self):
+        self.assertEqual(self.client._retries_for('GET'), 2)
+        self.assertEqual(self.client._retries_for('POST'), 0)
+        self.assertEqual(self.client._retries_for('POST', retry=True), 2)
+        self.assertEqual(self.client._retries_for('GET', retry=False), 0)
+
+
+class AsyncSendTests(FakeSISMixin, SimpleTestCase):
+
+    def get(self, client):
+        async def get():
+            try:
+                return await client.get(Endpoint('STUDENT.GRADES'))
+            finally:
+                await client.aclose()
+        return async_to_sync(get)()
+
+    def test_reports_time_to_first_byte(self):
+        with mock.patch('core.network.metrics') as metrics:
+            self.get(AsyncHttpClient('student', 'secret'))
+
+        observed = {call.args[0] for call in metrics.observe.call_args_list}
+        self.assertIn('sis_ttfb_seconds', observed)
+
+    def test_offline_client_skips_the_rate_limiter(self):
+        client = AsyncHttpClient('student', 'secret')
+        client._offline = True
+
+        with mock.patch.object(rate_limiter, 'alimit', side_effect=AssertionError("rate limited")):
+            page = self.get(client)
+
+        self.assertEqual(page.select_one('title').text(), 'Empower - Grades')
+
+
+class ConcurrentExpiryTests(SimpleTestCase):
+    """
+    Two requests go out on the same login and both come back expired. The
+    second one to notice must reuse the first one's re-login, not replace it.
+    """
+    endpoint = Endpoint('STUDENT.GRADES')
+
+    def test_request_expired_during_another_threads_relogin_reuses_it(self):
+        client = HttpClient('student', 'secret', navigation_url=URL)
+        client.load_cookies([], authenticated_at=1.0)
+        logins = []
+
+        def login():
+            logins.append(len(logins) + 2.0)
+            client.authenticated_at = logins[-1]
+            client._is_logged_in = True
+            return True
+
+        responses = iter(['expired', 'page'])
+
+        def perform_get(endpoint, target=None):
+            if next(responses) == 'expired':
+                # While this thread's request was in flight, another thread's
+                # request on the same login expired and it logged in again.
+                client._ensure_logged_in(force=True, seen=1.0)
+                raise SessionExpiredError("login page")
+            return 'page'
+
+        with mock.patch.object(client, '_login', login), mock.patch.object(client, '_perform_get', perform_get):
+            self.assertEqual(client.get(self.endpoint), 'page')
+
+        self.assertEqual(logins, [2.0])
+
+    def test_async_request_expired_during_another_tasks_relogin_reuses_it(self):
+        client = AsyncHttpClient('student', 'secret', navigation_url=URL)
+        client.load_cookies([], authenticated_at=1.0)
+        logins = []
+
+        async def login():
+            logins.append(len(logins) + 2.0)
+            client.authenticated_at = logins[-1]
+            client._is_logged_in = True
+            return True
+
+        responses = iter(['expired', 'page'])
+
+        async def perform_get(endpoint, target=None):
+            if next(responses) == 'expired':
+                await client._ensure_logged_in(force=True, seen=1.0)
+                raise SessionExpiredError("login page")
+            return 'page'
+
+        async def get():
+            try:
+                return await client.get(self.endpoint)
+            finally:
+                await client.aclose(logout=False)
+
+        with mock.patch.object(client, '_login', login), mock.patch.object(client, '_perform_get', perform_get):
+            self.assertEqual(async_to_sync(get)(), 'page')
+
+        self.assertEqual(logins, [2.0])
+
+    def test_ajax_post_logs_in_again_before_reporting_expiry(self):
+        client = HttpClient('student', 'secret', navigation_url=URL)
+        client.load_cookies([], authenticated_at=1.0)
+        login_page = b'<form><input name="empower_usrn"><input name="empower_pswd"></form>'
+
+        with mock.patch.object(client, '_send', return_value=mock.Mock(status_code=200, content=login_page)), \
+                mock.patch.object(client, '_login', return_value=True) as login:
+            with self.assertRaises(SessionExpiredError):
+                client.ajax_post('https://retry.example.edu/x.cfc', 'Find', {})
+
+        login.assert_called_once_with()
@@ -0,0 +1,73 @@
+# core/tests/test_ratelimit.py
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from core.exceptions import RateLimitExceeded
+from core.ratelimit import RateLimiter
+from core.tests.utils import FakeClock
+
+URL = 'https://sis.example.edu/empower/fusebox.cfm'
+
+
+class RateLimiterTests(SimpleTestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        patcher = mock.patch('core.ratelimit.time', self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_request_beyond_the_burst_waits_for_a_token(self):
+        limiter = RateLimiter({'MAX_WAIT': 5, 'DEFAULT': {'rate': 2, 'burst': 2}})
+
+        for _ in range(2):
+            with limiter.limit(URL):
+                pass
+        self.assertEqual(self.clock.now, 1000.0)
+
+        with limiter.limit(URL):
+            pass
+        self.assertAlmostEqual(self.clock.now, 1000.5)
+        self.assertEqual(limiter.snapshot()['sis.example.edu']['admitted'], 3)
+
+    def test_request_is_rejected_when_the_wait_exceeds_max_wait(self):
+        limiter = RateLimiter({'MAX_WAIT': 1, 'DEFAULT': {'rate': 0.5, 'burst': 1}})
+
+        with limiter.limit(URL):
+            pass
+        with self.assertRaises(RateLimitExceeded):
+            with limiter.limit(URL):
+                pass
+        self.assertEqual(limiter.snapshot()['sis.example.edu']['rejected'], 1)
+
+    def test_slot_is_released_when_the_request_finishes(self):
+        limiter = RateLimiter({'MAX_WAIT': 0, 'DEFAULT': {'max_in_flight': 1}})
+
+        with limiter.limit(URL):
+            self.assertEqual(limiter.snapshot()['sis.example.edu']['in_flight'], 1)
+            with self.assertRaises(RateLimitExceeded):
+                with limiter.limit(URL):
+                    pass
+
+        with limiter.limit(URL):
+            pass
+        self.assertEqual(limiter.snapshot()['sis.example.edu']['in_flight'], 0)
+
+    def test_fuseaction_limit_failure_releases_nothing_it_did_not_take(self):
+        limiter = RateLimiter({
+            'MAX_WAIT': 0,
+            'DEFAULT': {'max_in_flight': 2},
+            'FUSEACTIONS': {'STUDENT.GRADES': {'max_in_flight': 1}},
+        })
+
+        with limiter.limit(URL, 'STUDENT.GRADES'):
+            with self.assertRaises(RateLimitExceeded):
+                with limiter.limit(URL, 'STUDENT.GRADES'):
+                    pass
+            # The rejected request gave its host slot back.
+            with limiter.limit(URL, 'STUDENT.SCHEDULE'):
+                pass
+
+    def test_disabled_limiter_applies_no_limits(self):
+        self.assertEqual(RateLimiter({}).limits_for(URL), [])
@@ -0,0 +1,78 @@
+# core/tests/test_resilience.py
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from core.exceptions import CircuitOpenError
+from core.resilience import CircuitBreaker
+from core.tests.utils import FakeClock
+
+URL = 'https://sis.example.edu/empower/fusebox.cfm'
+
+
+class CircuitBreakerTests(SimpleTestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        patcher = mock.patch('core.resilience.time', self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30)
+
+    def open_circuit(self):
+        for _ in range(2):
+            self.breaker.before_request(URL)
+            self.breaker.record_failure(URL)
+
+    def test_opens_after_consecutive_failures(self):
+        self.breaker.record_failure(URL)
+        self.assertEqual(self.breaker.state(URL), 'closed')
+
+        self.breaker.record_failure(URL)
+
+        self.assertEqual(self.breaker.state(URL), 'open')
+        with self.assertRaises(CircuitOpenError):
+            self.breaker.before_request(URL)
+
+    def test_success_resets_the_failure_count(self):
+        self.breaker.record_failure(URL)
+        self.breaker.record_success(URL)
+        self.breaker.record_failure(URL)
+
+        self.assertEqual(self.breaker.state(URL), 'closed')
+
+    def test_lets_one_probe_through_after_the_reset_timeout(self):
+        self.open_circuit()
+        self.clock.advance(30)
+        self.assertEqual(self.breaker.state(URL), 'half-open')
+
+        self.breaker.before_request(URL)
+        with self.assertRaises(CircuitOpenError):
+            self.breaker.before_request(URL)
+
+    def test_successful_probe_closes_the_circuit(self):
+        self.open_circuit()
+        self.clock.advance(30)
+
+        self.breaker.before_request(URL)
+        self.breaker.record_success(URL)
+
+        self.assertEqual(self.breaker.state(URL), 'closed')
+        self.breaker.before_request(URL)
+
+    def test_failed_probe_keeps_the_circuit_open(self):
+        self.open_circuit()
+        self.clock.advance(30)
+
+        self.breaker.before_request(URL)
+        self.breaker.record_failure(URL)
+
+        self.assertEqual(self.breaker.state(URL), 'open')
+        self.clock.advance(29)
+        with self.assertRaises(CircuitOpenError):
+            self.breaker.before_request(URL)
+
+    def test_hosts_are_tracked_separately(self):
+        self.open_circuit()
+
+        self.breaker.before_request('https://other.example.edu/empower/fusebox.cfm')
@@ -0,0 +1,134 @@
+# core/tests/test_sessions.py
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.exceptions import ImproperlyConfigured
+from django.test import SimpleTestCase, override_settings
+
+from core.checks import check_cookie_store
+from core.cookie_store import CacheCookieJarStore
+from core.sessions import SessionPool
+from core.tests.utils import DeferredExecutor, FakeClock
+
+SHARED_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+    'shared': {'BACKEND': 'django.core.cache.backends.db.DatabaseCache', 'LOCATION': 'emptouch_cache'},
+}
+
+
+def pooled_client(password='secret'):
+    return mock.Mock(_password=password, _is_logged_in=False)
+
+
+class SessionPoolTests(SimpleTestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        patcher = mock.patch('core.sessions.time', self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.pool = SessionPool(max_size=2, idle_timeout=60, cookie_store=None)
+        self.closer = self.pool._closer = DeferredExecutor()
+        self.users = [User(pk=pk, username=f'student{pk}') for pk in (1, 2, 3)]
+
+    def test_checkout_reuses_the_pooled_client(self):
+        client = pooled_client()
+        self.pool.checkin(self.users[0], client)
+
+        self.assertIs(self.pool.checkout(self.users[0], 'secret'), client)
+        self.assertEqual(len(self.pool), 0)
+
+    def test_least_recently_used_session_is_evicted_and_logged_out(self):
+        first, second, third = pooled_client(), pooled_client(), pooled_client()
+        self.pool.checkin(self.users[0], first)
+        self.pool.checkin(self.users[1], second)
+        # Using the first user's session makes the second one the oldest.
+        self.pool.checkin(self.users[0], self.pool.checkout(self.users[0], 'secret'))
+
+        self.pool.checkin(self.users[2], third)
+
+        # The logout happens off the request thread.
+        second.close.assert_not_called()
+        self.closer.run_all()
+        second.close.assert_called_once_with(logout=True)
+        first.close.assert_not_called()
+        self.assertIs(self.pool.checkout(self.users[0], 'secret'), first)
+
+    def test_idle_sessions_expire(self):
+        stale, fresh = pooled_client(), pooled_client()
+        self.pool.checkin(self.users[0], stale)
+        self.clock.advance(45)
+        self.pool.checkin(self.users[1], fresh)
+        self.clock.advance(15)
+
+        self.pool.checkout(self.users[1], 'secret')
+        self.closer.run_all()
+
+        stale.close.assert_called_once_with(logout=True)
+        self.assertEqual(len(self.pool), 0)
+
+    def test_checkout_refuses_a_client_with_another_password(self):
+        old = pooled_client('old-secret')
+        self.pool.checkin(self.users[0], old)
+
+        client = self.pool.checkout(self.users[0], 'new-secret')
+
+        self.assertIsNot(client, old)
+        self.assertEqual(client._password, 'new-secret')
+        self.closer.run_all()
+        old.close.assert_called_once_with(logout=True)
+
+
+@override_settings(EMPTOUCH_COOKIE_STORE_KEY=['test-key'])
+class SessionPoolCookieStoreTests(SimpleTestCase):
+
+    def evict_one(self, cookie_store):
+        pool = SessionPool(max_size=1, idle_timeout=60, cookie_store=cookie_store)
+        pool._closer = DeferredExecutor()
+        first, second = pooled_client(), pooled_client()
+        pool.checkin(User(pk=1, username='first'), first)
+        pool.checkin(User(pk=2, username='second'), second)
+        pool._closer.run_all()
+        return first
+
+    def test_evicted_session_is_logged_out_without_a_shared_store(self):
+        evicted = self.evict_one(CacheCookieJarStore(cache_alias='default'))
+        evicted.close.assert_called_once_with(logout=True)
+
+    @override_settings(CACHES=SHARED_CACHES)
+    def test_evicted_session_stays_logged_in_with_a_shared_store(self):
+        evicted = self.evict_one(CacheCookieJarStore(cache_alias='shared'))
+        evicted.close.assert_called_once_with(logout=False)
+
+    @override_settings(EMPTOUCH_COOKIE_STORE={'BACKEND': 'core.cookie_store.CacheCookieJarStore',
+                                              'OPTIONS': {'cache_alias': 'default'}})
+    def test_check_warns_about_a_per_process_cache(self):
+        self.assertEqual([warning.id for warning in check_cookie_store(None)], ['core.W001'])
+
+    @override_settings(CACHES=SHARED_CACHES,
+                       EMPTOUCH_COOKIE_STORE={'BACKEND': 'core.cookie_store.CacheCookieJarStore',
+                                              'OPTIONS': {'cache_alias': 'shared'}})
+    def test_check_accepts_a_shared_cache(self):
+        self.assertEqual(check_cookie_store(None), [])
+
+
+class CookieJarStoreKeyTests(SimpleTestCase):
+    user = User(pk=1, username='student')
+
+    def save_jar(self):
+        CacheCookieJarStore(cache_alias='default').save(self.user, [], 1.0)
+        self.addCleanup(CacheCookieJarStore(cache_alias='default').delete, self.user)
+
+    @override_settings(EMPTOUCH_COOKIE_STORE_KEY=[])
+    def test_store_refuses_to_start_without_a_key(self):
+        with self.assertRaises(ImproperlyConfigured):
+            CacheCookieJarStore(cache_alias='default')
+
+    def test_jars_survive_a_key_rotation(self):
+        with override_settings(EMPTOUCH_COOKIE_STORE_KEY=['old-key']):
+            self.save_jar()
+
+        with override_settings(EMPTOUCH_COOKIE_STORE_KEY=['new-key', 'old-key']):
+            self.assertEqual(CacheCookieJarStore(cache_alias='default').load(self.user)['cookies'], [])
+        with override_settings(EMPTOUCH_COOKIE_STORE_KEY=['new-key']):
+            self.assertIsNone(CacheCookieJarStore(cache_alias='default').load(self.user))
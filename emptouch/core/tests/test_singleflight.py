@@ -0,0 +1,80 @@
+# core/tests/test_singleflight.py
+import threading
+
+from django.test import SimpleTestCase
+
+from core.singleflight import SingleFlight
+
+
+class WaitSignallingEvent(threading.Event):
+    """An Event that reports when somebody starts waiting on it."""
+
+    def __init__(self):
+        super().__init__()
+        self.waiting = threading.Event()
+
+    def wait(self, timeout=None):
+        self.waiting.set()
+        return super().wait(timeout)
+
+
+class SingleFlightTests(SimpleTestCase):
+
+    def run_with_waiter(self, leader_outcome):
+        """
+        Runs a leader call that only finishes once a second caller for the same
+        key is waiting on it. Returns what the waiter got and how often the
+        function ran.
+        """
+        flight = SingleFlight()
+        runs = []
+        waiter_got = {}
+
+        def waiter():
+            try:
+                waiter_got['result'] = flight.do('key', lambda: runs.append('waiter'))
+            except Exception as e:
+                waiter_got['error'] = e
+
+        def leader():
+            runs.append('leader')
+            call = flight._calls['key']
+            call.done = WaitSignallingEvent()
+            thread = threading.Thread(target=waiter)
+            thread.start()
+            self.assertTrue(call.done.waiting.wait(5))
+            threads.append(thread)
+            if isinstance(leader_outcome, Exception):
+                raise leader_outcome
+            return leader_outcome
+
+        threads = []
+        try:
+            leader_got = flight.do('key', leader)
+        except Exception as e:
+            leader_got = e
+        threads[0].join(5)
+        return leader_got, waiter_got, runs
+
+    def test_waiter_gets_the_leaders_result(self):
+        result = ['page']
+        leader_got, waiter_got, runs = self.run_with_waiter(result)
+
+        self.assertIs(leader_got, result)
+        self.assertIs(waiter_got['result'], result)
+        self.assertEqual(runs, ['leader'])
+
+    def test_waiter_gets_the_leaders_exception(self):
+        error = RuntimeError("SIS down")
+        leader_got, waiter_got, runs = self.run_with_waiter(error)
+
+        self.assertIs(leader_got, error)
+        self.assertIs(waiter_got['error'], error)
+        self.assertEqual(runs, ['leader'])
+
+    def test_finished_calls_are_not_remembered(self):
+        flight = SingleFlight()
+
+        self.assertEqual(flight.do('key', lambda: 1), 1)
+        self.assertEqual(flight.do('key', lambda: 2), 2)
+        self.assertEqual(flight._calls, {})
@@ -0,0 +1,162 @@
+# core/tests/test_sync.py
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection, models
+from django.test import SimpleTestCase, TestCase
+
+from core import sync
+from core.endpoints import Endpoint
+from core.models import SyncedModel
+from core.parsers import BaseParser
+from core.sessions import SessionPool
+
+
+class Grade(SyncedModel):
+    """A test-only synced model; its table is created by ApplyRowsTests."""
+    course = models.CharField(max_length=20)
+    grade = models.CharField(max_length=2)
+
+    class Meta(SyncedModel.Meta):
+        app_label = 'core'
+
+
+GRADES = sync.SyncSpec('grades', Grade, Endpoint('STUDENT.GRADES'), BaseParser, key_fields=('course',))
+
+
+class ApplyRowsTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        # Created outside the test transaction, which SQLite schema changes can't run in.
+        with connection.schema_editor() as editor:
+            editor.create_model(Grade)
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        with connection.schema_editor() as editor:
+            editor.delete_model(Grade)
+
+    def setUp(self):
+        self.user = User.objects.create(username='student')
+
+    def apply(self, *rows):
+        return sync.apply_rows(GRADES, self.user, rows)
+
+    def grades(self):
+        return dict(Grade.objects.filter(user=self.user).values_list('course', 'grade'))
+
+    def test_counts_created_updated_and_unchanged_rows(self):
+        result = self.apply({'course': 'COS 101', 'grade': 'A'}, {'course': 'MAT 102', 'grade': 'B'})
+        self.assertEqual((result.created, result.updated, result.unchanged, result.deleted), (2, 0, 0, 0))
+
+        result = self.apply({'course': 'COS 101', 'grade': 'A'}, {'course': 'MAT 102', 'grade': 'B+'})
+        self.assertEqual((result.created, result.updated, result.unchanged, result.deleted), (0, 1, 1, 0))
+        self.assertEqual(self.grades(), {'COS 101': 'A', 'MAT 102': 'B+'})
+
+    def test_vanished_rows_are_soft_deleted(self):
+        self.apply({'course': 'COS 101', 'grade': 'A'}, {'course': 'MAT 102', 'grade': 'B'})
+
+        result = self.apply({'course': 'COS 101', 'grade': 'A'})
+
+        self.assertEqual((result.deleted, result.unchanged), (1, 1))
+        self.assertEqual(self.grades(), {'COS 101': 'A'})
+        self.assertTrue(Grade.all_objects.get(user=self.user, course='MAT 102').is_deleted)
+
+    def test_row_coming_back_after_soft_delete_is_revived(self):
+        self.apply({'course': 'COS 101', 'grade': 'A'})
+        self.apply()
+
+        result = self.apply({'course': 'COS 101', 'grade': 'A'})
+
+        self.assertEqual((result.created, result.updated), (0, 1))
+        self.assertEqual(self.grades(), {'COS 101': 'A'})
+        self.assertEqual(Grade.all_objects.filter(user=self.user).count(), 1)
+
+    def test_rows_of_other_users_are_left_alone(self):
+        other = User.objects.create(username='other')
+        sync.apply_rows(GRADES, other, [{'course': 'COS 101', 'grade': 'C'}])
+
+        self.apply({'course': 'COS 101', 'grade': 'A'})
+        self.apply()
+
+        self.assertEqual(Grade.objects.get(user=other).grade, 'C')
+
+
+class BackgroundSyncTests(SimpleTestCase):
+
+    def test_sync_leaves_the_pooled_client_in_the_pool(self):
+        user = User(pk=1, username='student')
+        pool = SessionPool(max_size=10, idle_timeout=60, cookie_store=None)
+        pooled = mock.Mock(_password='secret')
+        clone = pooled.clone.return_value
+        clone.authenticated_at = 1.0
+        pool.checkin(user, pooled)
+
+        def fake_sync_user(user, client):
+            # A page load made during the sync still finds the pooled client.
+            self.assertEqual(len(pool), 1)
+            self.assertIs(client._http_client, clone)
+            return {}
+
+        with mock.patch.object(sync, 'session_pool', pool), mock.patch.object(sync, 'sync_user', fake_sync_user):
+            sync._sync_in_session(user, 'secret')
+
+        clone.close.assert_called_once_with(logout=False)
+        pooled.close.assert_not_called()
+        self.assertIs(pool.checkout(user, 'secret'), pooled)
+
+
+class SyncSISCommandTests(TestCase):
+
+    def test_a_failing_user_does_not_stop_the_others(self):
+        User.objects.create(username='first')
+        User.objects.create(username='second')
+        cookie_store = mock.Mock(shared=True)
+        cookie_store.load.return_value = {'cookies': [], 'authenticated_at': 1.0}
+        failures = iter([RuntimeError("database is locked"), {}])
+
+        def fake_sync_user(user, client, specs, force):
+            outcome = next(failures)
+            if isinstance(outcome, Exception):
+                raise outcome
+            return outcome
+
+        stdout, stderr = StringIO(), StringIO()
+        with mock.patch('core.management.commands.syncsis.session_pool.cookie_store', cookie_store), \
+                mock.patch('core.management.commands.syncsis.SYNC_REGISTRY', [mock.Mock()]), \
+                mock.patch('core.management.commands.syncsis.sync_user', fake_sync_user):
+            call_command('syncsis', stdout=stdout, stderr=stderr)
+
+        self.assertIn("database is locked", stderr.getvalue())
+        self.assertIn("Synced 1 user(s)", stdout.getvalue())
+        self.assertIn("1 failed", stdout.getvalue())
+
+    def run_syncsis(self, fake_sync_user):
+        User.objects.create(username='student')
+        cookie_store = mock.Mock(shared=True)
+        cookie_store.load.return_value = {'cookies': [], 'authenticated_at': 1.0}
+        with mock.patch('core.management.commands.syncsis.session_pool.cookie_store', cookie_store), \
+                mock.patch('core.management.commands.syncsis.SYNC_REGISTRY', [mock.Mock()]), \
+                mock.patch('core.management.commands.syncsis.sync_user', fake_sync_user):
+            call_command('syncsis', stdout=StringIO(), stderr=StringIO())
+        return cookie_store
+
+    def test_jar_is_left_alone_when_nothing_was_due(self):
+        cookie_store = self.run_syncsis(lambda user, client, specs, force: {})
+
+        cookie_store.save.assert_not_called()
+        cookie_store.delete.assert_not_called()
+
+    def test_jar_is_saved_after_talking_to_the_sis(self):
+        def fake_sync_user(user, client, specs, force):
+            client._http_client._record_response('GET', client._http_client.navigation_url, 'STUDENT.GRADES', 0.1, 100)
+            return {'grades': sync.SyncResult('grades', unchanged=1)}
+
+        cookie_store = self.run_syncsis(fake_sync_user)
+
+        cookie_store.save.assert_called_once_with(mock.ANY, [], 1.0)
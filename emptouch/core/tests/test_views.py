@@ -0,0 +1,124 @@
+# core/tests/test_views.py
+import socket
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import User
+from django.test import AsyncRequestFactory, Client, TestCase, override_settings
+from django.urls import reverse
+
+from core import widgets
+from core.resilience import circuit_breaker
+from core.tests.utils import FakeSISMixin
+from core.views import AsyncDashboardView
+
+
+def _closed_port() -> int:
+    """A local port with nothing listening on it."""
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+class CustomLoginViewTests(TestCase):
+    def setUp(self):
+        self.auth_url = f'http://127.0.0.1:{_closed_port()}/ptl-includes/authentication/auth-onlogin.cfm'
+        # The breaker is process-wide; don't let this test's failure leak into others.
+        self.addCleanup(circuit_breaker.record_success, self.auth_url)
+
+    def test_unreachable_sis_shows_an_error_instead_of_failing(self):
+        with override_settings(EMPTOUCH_SIS_AUTH_URL=self.auth_url, EMPTOUCH_SIS_CASSETTE={}):
+            response = self.client.post(reverse('login'), {'username': 'student', 'password': 'secret'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "A network error occurred")
+        self.assertFalse(response.wsgi_request.user.is_authenticated)
+
+    def test_open_circuit_shows_an_error_instead_of_failing(self):
+        for _ in range(circuit_breaker.failure_threshold):
+            circuit_breaker.record_failure(self.auth_url)
+
+        with override_settings(EMPTOUCH_SIS_AUTH_URL=self.auth_url, EMPTOUCH_SIS_CASSETTE={}):
+            response = self.client.post(reverse('login'), {'username': 'student', 'password': 'secret'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "A network error occurred")
+
+
+class LoginSessionsTests(FakeSISMixin, TestCase):
+
+    def log_in(self, client):
+        response = client.post(reverse('login'), {'username': 'student', 'password': 'secret'})
+        self.assertRedirects(response, reverse('dashboard'), fetch_redirect_response=False)
+
+    def test_logging_in_again_keeps_other_sessions_signed_in(self):
+        laptop, phone = Client(), Client()
+        self.log_in(laptop)
+
+        self.log_in(phone)
+
+        self.assertEqual(laptop.get(reverse('dashboard')).status_code, 200)
+
+
+class WidgetViewTests(TestCase):
+    template_name = 'core/benchmark_widget.html'
+
+    def setUp(self):
+        self.eager_fetch = mock.Mock(return_value={'grades': [{'course': 'MATH101'}]})
+        self.deferred_fetch = mock.Mock(return_value={'grades': [{'course': 'HIST202'}]})
+        registry = widgets.WIDGET_REGISTRY[:]
+        widgets.WIDGET_REGISTRY[:] = [
+            widgets.Widget('Grades', 'core.view_grades', self.template_name, self.eager_fetch),
+            widgets.Widget('History', 'core.view_grades', self.template_name, self.deferred_fetch, deferred=True),
+        ]
+        self.addCleanup(widgets.WIDGET_REGISTRY.__setitem__, slice(None), registry)
+        self.staff = User.objects.create_superuser('staff', password='secret')
+        self.student = User.objects.create_user('student', password='secret')
+
+    def test_deferred_widget_renders_as_a_placeholder(self):
+        self.client.force_login(self.staff)
+
+        response = self.client.get(reverse('dashboard'))
+
+        self.assertContains(response, 'MATH101')
+        self.assertContains(response, f'data-widget-url="{reverse("widget_fragment", args=["history"])}"')
+        self.assertNotContains(response, 'HIST202')
+        self.deferred_fetch.assert_not_called()
+
+    def test_async_dashboard_renders_deferred_widget_as_a_placeholder(self):
+        request = AsyncRequestFactory().get(reverse('dashboard'))
+        request.user = self.staff
+
+        async def auser():
+            return self.staff
+        request.auser = auser
+
+        response = async_to_sync(AsyncDashboardView.as_view())(request)
+
+        self.assertContains(response, 'MATH101')
+        self.assertContains(response, f'data-widget-url="{reverse("widget_fragment", args=["history"])}"')
+        self.deferred_fetch.assert_not_called()
+
+    def test_fragment_renders_the_widget(self):
+        self.client.force_login(self.staff)
+
+        response = self.client.get(reverse('widget_fragment', args=['history']))
+
+        self.assertContains(response, 'HIST202')
+
+    def test_fragment_is_forbidden_without_a_session(self):
+        response = self.client.get(reverse('widget_fragment', args=['history']))
+
+        # Not a redirect: the dashboard script would swap the login page in.
+        self.assertEqual(response.status_code, 403)
+
+    def test_fragment_is_not_found_without_permission(self):
+        self.client.force_login(self.student)
+
+        self.assertEqual(self.client.get(reverse('widget_fragment', args=['history'])).status_code, 404)
+        self.deferred_fetch.assert_not_called()
+
+    def test_unknown_fragment_is_not_found(self):
+        self.client.force_login(self.staff)
+
+        self.assertEqual(self.client.get(reverse('widget_fragment', args=['missing'])).status_code, 404)
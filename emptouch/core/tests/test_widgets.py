@@ -0,0 +1,98 @@
+# core/tests/test_widgets.py
+import asyncio
+import threading
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from django.test import SimpleTestCase
+
+from core import widgets
+from core.tests.utils import FakeClock
+from core.widgets import Widget, afetch_widget_data, fetch_widget_data
+
+
+def widget(name, fetch, timeout=None):
+    return Widget(name, 'view_grades', 'core/widget.html', fetch, timeout=timeout)
+
+
+class FetchWidgetDataTests(SimpleTestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        patcher = mock.patch.object(widgets, 'time', self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.release = threading.Event()
+        self.addCleanup(self.release.set)
+
+    def slow_fetch(self, user):
+        self.release.wait(5)
+        return {'late': True}
+
+    def test_slow_widget_times_out_without_holding_up_the_others(self):
+        def fast_fetch(user):
+            # The first widget's fetch uses up the slow widget's whole budget.
+            self.clock.advance(10)
+            return {'grades': ['A']}
+
+        results = fetch_widget_data([
+            widget('Grades', fast_fetch),
+            widget('Schedule', self.slow_fetch, timeout=5),
+            widget('Holds', lambda user: {'holds': []}),
+        ], user=None)
+
+        # The slow fetch is still blocked, yet every widget has its context.
+        self.assertFalse(self.release.is_set())
+        self.assertEqual([w.name for w, _ in results], ['Grades', 'Schedule', 'Holds'])
+        self.assertEqual(results[0][1], {'grades': ['A']})
+        self.assertEqual(results[1][1], {'error': "Could not load widget data: timed out after 5 seconds."})
+        self.assertEqual(results[2][1], {'holds': []})
+
+    def test_failing_widget_gets_an_error_placeholder(self):
+        def broken_fetch(user):
+            raise RuntimeError("SIS down")
+
+        with self.assertLogs('core.widgets', 'WARNING'):
+            results = fetch_widget_data([widget('Grades', broken_fetch), widget('Holds', lambda user: {'holds': []})], None)
+
+        self.assertEqual(results[0][1], {'error': "Could not load widget data: SIS down"})
+        self.assertEqual(results[1][1], {'holds': []})
+
+    def test_async_slow_widget_times_out_without_holding_up_the_others(self):
+        async def slow_fetch(user):
+            await asyncio.sleep(5)
+
+        async def fetch_all():
+            return await afetch_widget_data([
+                widget('Schedule', slow_fetch, timeout=0.05),
+                widget('Holds', lambda user: {'holds': []}),
+            ], user=None)
+
+        results = async_to_sync(fetch_all)()
+
+        self.assertEqual(results[0][1], {'error': "Could not load widget data: timed out after 0.05 seconds."})
+        self.assertEqual(results[1][1], {'holds': []})
+
+
+class RegisterTests(SimpleTestCase):
+
+    def setUp(self):
+        patcher = mock.patch.object(widgets, 'WIDGET_REGISTRY', [])
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_registered_widget_is_found_by_slug(self):
+        grades = widget('My Grades', dict)
+        widgets.register(grades)
+
+        self.assertIs(widgets.get_widget('my-grades'), grades)
+
+    def test_name_without_a_slug_is_rejected(self):
+        with self.assertRaises(ValueError):
+            widgets.register(widget('Оценки', dict))
+
+    def test_duplicate_slug_is_rejected(self):
+        widgets.register(widget('My Grades', dict))
+
+        with self.assertRaises(ValueError):
+            widgets.register(widget('my grades', dict))
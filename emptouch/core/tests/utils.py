@@ -0,0 +1,81 @@
+# core/tests/utils.py
+import functools
+
+from django.core.cache import caches
+from django.test.utils import override_settings
+
+from core.fakesis import FakeSIS
+from core.network import HttpClient
+from core.ratelimit import rate_limiter
+from core.resilience import circuit_breaker
+from core.sessions import session_pool
+
+
+class FakeSISMixin:
+    """
+    Runs a FakeSIS for each test and points the app's SIS settings at it, with
+    the process-wide rate limiter off and caches, session pool and circuit
+    breaker reset.
+    """
+    fake_sis_options = {}
+
+    def setUp(self):
+        super().setUp()
+        self.sis = FakeSIS(**self.fake_sis_options).start()
+        self.addCleanup(self.sis.stop)
+
+        settings_override = override_settings(EMPTOUCH_SIS_NAVIGATION_URL=self.sis.navigation_url,
+                                              EMPTOUCH_SIS_AUTH_URL=self.sis.auth_url, EMPTOUCH_SIS_CASSETTE={})
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        limiter_enabled, rate_limiter.enabled = rate_limiter.enabled, False
+        self.addCleanup(setattr, rate_limiter, 'enabled', limiter_enabled)
+        self.addCleanup(circuit_breaker.record_success, self.sis.base_url)
+        # Runs first, while the fake SIS is still up: logins made by the test
+        # leave their sessions in the process-wide pool.
+        self.addCleanup(session_pool.clear)
+        caches['default'].clear()
+
+    def http_client(self, username='student', password='secret') -> HttpClient:
+        return HttpClient(username, password)
+
+
+class FakeClock:
+    """
+    Stands in for the `time` module, so tests can move time forward instead of
+    sleeping. `sleep()` advances the clock.
+    """
+
+    def __init__(self, start=1000.0):
+        self.now = start
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def time(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float):
+        self.now += seconds
+
+    def advance(self, seconds: float):
+        self.now += seconds
+
+
+class DeferredExecutor:
+    """
+    Stands in for a background ThreadPoolExecutor: holds submitted tasks until
+    `run_all()`, so tests control when background work happens.
+    """
+
+    def __init__(self):
+        self.tasks = []
+
+    def submit(self, func, *args):
+        self.tasks.append(functools.partial(func, *args))
+
+    def run_all(self):
+        tasks, self.tasks = self.tasks, []
+        for func in tasks:
+            func()
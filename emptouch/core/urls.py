@@ -1,15 +1,25 @@
 # core/urls.py
+from django.conf import settings
 from django.urls import path
 from django.contrib.auth.views import LogoutView
-from .views import DashboardView, CustomLoginView
+from .views import AsyncDashboardView, DashboardView, CustomLoginView, MetricsView, WidgetFragmentView
+
+# Serve the async dashboard when the project runs under ASGI with async views enabled.
+dashboard_view = AsyncDashboardView if getattr(settings, 'EMPTOUCH_ASYNC_VIEWS', False) else DashboardView
 
 urlpatterns = [
     # The root URL now points to the dashboard. LoginRequiredMixin will handle redirection.
-    path('', DashboardView.as_view(), name='dashboard'),
+    path('', dashboard_view.as_view(), name='dashboard'),
+
+    # Deferred dashboard widgets are loaded one by one from here.
+    path('widgets/<slug:slug>/', WidgetFragmentView.as_view(), name='widget_fragment'),
     
     # Our new custom login URL
     path('login/', CustomLoginView.as_view(), name='login'),
     
     # We can use Django's built-in LogoutView. 'next_page' sends them to our login screen after logout.
     path('logout/', LogoutView.as_view(next_page='login'), name='logout'),
+
+    # Prometheus scrape endpoint for the in-process metrics.
+    path('metrics/', MetricsView.as_view(), name='metrics'),
 ]
\ No newline at end of file
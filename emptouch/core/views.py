@@ -1,16 +1,29 @@
 # core/views.py
+import hmac
+import logging
+
+from django.conf import settings
+from django.http import Http404, HttpResponse
 from django.shortcuts import render, redirect
 from django.views import View
 from django.contrib.auth import login
 from django.contrib.auth.models import User
 from django.contrib import messages
-from django.contrib.auth.mixins import LoginRequiredMixin
+from django.contrib.auth.mixins import AccessMixin, LoginRequiredMixin
 from django.template.loader import render_to_string
+from asgiref.sync import sync_to_async
 
 from .forms import LoginForm
+from .metrics import InMemoryMetricsSink, metrics, timed
+from .models import SISCredential
+from .ratelimit import rate_limiter
 from .network import HttpClient
 from .exceptions import AuthenticationError
-from .widgets import WIDGET_REGISTRY
+from .sessions import session_pool
+from .sync import sync_in_background
+from .widgets import WIDGET_REGISTRY, Widget, afetch_widget_data, fetch_widget_data, get_widget
+
+logger = logging.getLogger(__name__)
 
 
 class CustomLoginView(View):
@@ -29,13 +42,12 @@ class CustomLoginView(View):
             username = form.cleaned_data.get('username').lower()
             password = form.cleaned_data.get('password')
             
+            client = HttpClient(username, password)
             try:
-                client = HttpClient(username, password)
                 if client._login():
                     user, created = User.objects.get_or_create(username=username)
-                    if created or not user.check_password(password):
-                        user.set_password(password)
-                        user.save()
+                    # The SIS just verified the password; only re-hash it locally if it changed.
+                    SISCredential.sync_password(user, password, created=created)
                     
                     login(request, user)
 
@@ -43,48 +55,164 @@ class CustomLoginView(View):
                     # Store the plain-text password in the user's session.
                     # Django's session middleware will handle encryption.
                     request.session['sis_password'] = password
+
+                    # Hand the authenticated SIS session to the pool instead of logging
+                    # out, so the user's first page load doesn't have to log in again.
+                    session_pool.checkin(user, client)
+                    client = None
+
+                    # Refresh the user's mirrored SIS data while they look at the dashboard.
+                    if getattr(settings, 'EMPTOUCH_SYNC', {}).get('ON_LOGIN'):
+                        sync_in_background(user, password)
                     
                     return redirect('dashboard')
                 else:
                     messages.error(request, 'Invalid credentials. Please try again.')
 
             except AuthenticationError as e:
+                logger.warning("SIS login for '%s' failed: %s", username, e)
                 messages.error(request, f"A network error occurred: {e}")
             finally:
-                if 'client' in locals():
+                if client is not None:
                     client.close()
 
         return render(request, self.template_name, {'form': form})
 
 
+def render_widget(widget_config: Widget, context_data: dict) -> str:
+    """
+    Renders a widget's template, falling back to an error box if rendering fails.
+    """
+    try:
+        with timed('widget_render_seconds', f'render.{widget_config.slug}', widget=widget_config.slug):
+            return render_to_string(widget_config.template_name, context_data)
+    except Exception as e:
+        logger.exception("Rendering widget '%s' failed.", widget_config.slug)
+        return f'<div class="alert alert-danger">Error rendering widget: {widget_config.name}</div>'
+
+
+class AsyncLoginRequiredMixin(AccessMixin):
+    """
+    LoginRequiredMixin for async views: resolves the user with request.auser()
+    instead of touching the database from the event loop.
+    """
+
+    async def dispatch(self, request, *args, **kwargs):
+        user = await request.auser()
+        if not user.is_authenticated:
+            return self.handle_no_permission()
+        return await super().dispatch(request, *args, **kwargs)
+
+
 class DashboardView(LoginRequiredMixin, View):
     """
     Displays the main dashboard by pre-rendering all visible widgets into HTML strings.
+
+    Deferred widgets are rendered as placeholders instead; the page fetches each
+    of them from WidgetFragmentView, so they don't delay the first byte.
     """
     template_name = 'core/dashboard.html'
+    placeholder_template_name = 'core/widget_placeholder.html'
 
     def get(self, request, *args, **kwargs):
         rendered_widgets = []
         user = request.user
 
-        for widget_config in WIDGET_REGISTRY:
-            if user.has_perm(widget_config.permission_codename):
-                context_data = {}
-                try:
-                    fetched_data = widget_config.fetch_data_func(user)
-                    if isinstance(fetched_data, dict):
-                        context_data = fetched_data
-                except Exception as e:
-                    context_data['error'] = f"Could not load widget data: {e}"
-
-                try:
-                    widget_html = render_to_string(widget_config.template_name, context_data)
-                    rendered_widgets.append(widget_html)
-                except Exception as e:
-                    error_html = f'<div class="alert alert-danger">Error rendering widget: {widget_config.name}</div>'
-                    rendered_widgets.append(error_html)
+        visible_widgets = [w for w in WIDGET_REGISTRY if user.has_perm(w.permission_codename)]
+        eager_widgets = [w for w in visible_widgets if not w.deferred]
+
+        # Widget data is fetched concurrently, so the page waits for the slowest
+        # widget (or its timeout) rather than the sum of all of them.
+        eager_html = {
+            widget_config.slug: render_widget(widget_config, context_data)
+            for widget_config, context_data in fetch_widget_data(eager_widgets, user)
+        }
+
+        for widget_config in visible_widgets:
+            if widget_config.deferred:
+                rendered_widgets.append(render_to_string(self.placeholder_template_name, {'widget': widget_config}))
+            else:
+                rendered_widgets.append(eager_html[widget_config.slug])
 
         context = {
             'rendered_widgets': rendered_widgets
         }
-        return render(request, self.template_name, context)
\ No newline at end of file
+        return render(request, self.template_name, context)
+
+
+class WidgetFragmentView(LoginRequiredMixin, View):
+    """
+    Renders a single widget as an HTML fragment, for deferred dashboard loading.
+
+    Anonymous requests get a 403 rather than a redirect, so that an expired
+    session shows an error box instead of the login page inside the dashboard.
+    """
+    raise_exception = True
+
+    def get(self, request, slug, *args, **kwargs):
+        widget_config = get_widget(slug)
+        if widget_config is None or not request.user.has_perm(widget_config.permission_codename):
+            raise Http404("No such widget.")
+
+        [(widget_config, context_data)] = fetch_widget_data([widget_config], request.user)
+        return HttpResponse(render_widget(widget_config, context_data))
+
+
+class AsyncDashboardView(AsyncLoginRequiredMixin, View):
+    """
+    The async version of DashboardView, used when EMPTOUCH_ASYNC_VIEWS is enabled.
+    Widget data is gathered on the event loop instead of a thread pool.
+    """
+    template_name = DashboardView.template_name
+    placeholder_template_name = DashboardView.placeholder_template_name
+
+    async def get(self, request, *args, **kwargs):
+        rendered_widgets = []
+        user = await request.auser()
+
+        visible_widgets = [w for w in WIDGET_REGISTRY if await user.ahas_perm(w.permission_codename)]
+        eager_widgets = [w for w in visible_widgets if not w.deferred]
+
+        eager_html = {}
+        for widget_config, context_data in await afetch_widget_data(eager_widgets, user):
+            eager_html[widget_config.slug] = await sync_to_async(render_widget)(widget_config, context_data)
+
+        for widget_config in visible_widgets:
+            if widget_config.deferred:
+                placeholder = await sync_to_async(render_to_string)(self.placeholder_template_name, {'widget': widget_config})
+                rendered_widgets.append(placeholder)
+            else:
+                rendered_widgets.append(eager_html[widget_config.slug])
+
+        context = {
+            'rendered_widgets': rendered_widgets
+        }
+        return await sync_to_async(render)(request, self.template_name, context)
+
+
+class MetricsView(View):
+    """
+    Serves the in-process metrics in the Prometheus text format, for scraping.
+    Only available with the InMemoryMetricsSink, and only to staff users and
+    scrapers sending `Authorization: Bearer <settings.EMPTOUCH_METRICS_TOKEN>`.
+    """
+
+    def get(self, request, *args, **kwargs):
+        if not isinstance(metrics, InMemoryMetricsSink):
+            raise Http404("Metrics are not collected in process.")
+        if not (request.user.is_staff or self._has_token(request)):
+            raise Http404("Metrics are not available.")
+
+        # Limiter state lives outside the sink; publish its current values per scrape.
+        for key, stats in rate_limiter.snapshot().items():
+            for name in ('in_flight', 'admitted', 'rejected'):
+                metrics.gauge(f'sis_rate_limit_{name}', stats[name], {'limit': key})
+        return HttpResponse(metrics.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+    @staticmethod
+    def _has_token(request) -> bool:
+        token = getattr(settings, 'EMPTOUCH_METRICS_TOKEN', None)
+        if not token:
+            return False
+        scheme, _, credentials = request.headers.get('Authorization', '').partition(' ')
+        return scheme.lower() == 'bearer' and hmac.compare_digest(credentials.encode(), token.encode())
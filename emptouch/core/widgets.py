@@ -1,6 +1,21 @@
 # core/widgets.py
+import asyncio
+import functools
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
 from dataclasses import dataclass
-from typing import Callable, List
+from typing import Callable, List, Optional, Tuple
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils.text import slugify
+
+from .correlation import in_current_context
+from .metrics import timed
+
+logger = logging.getLogger(__name__)
 
 
 # This list will hold all registered widget configurations.
@@ -13,9 +28,113 @@ class Widget:
     permission_codename: str
     template_name: str
     fetch_data_func: Callable
+    # Seconds to wait for fetch_data_func before rendering an error instead.
+    # Defaults to settings.EMPTOUCH_WIDGET_TIMEOUT.
+    timeout: Optional[float] = None
+    # Deferred widgets are left out of the initial dashboard render; the page shows a
+    # placeholder and loads the widget from its own fragment URL once it arrives.
+    deferred: bool = False
+
+    @property
+    def slug(self) -> str:
+        """The identifier used in the widget's fragment URL."""
+        return slugify(self.name)
 
 def register(widget: Widget):
     """A function to add a widget to the central registry."""
     if not isinstance(widget, Widget):
         raise TypeError("Only Widget instances can be registered.")
-    WIDGET_REGISTRY.append(widget)
\ No newline at end of file
+    if not widget.slug:
+        # Fragment URLs and the dashboard's per-widget HTML are keyed by slug.
+        raise ValueError(f"The widget name '{widget.name}' has no ASCII letters or digits to build a slug from.")
+    if get_widget(widget.slug) is not None:
+        raise ValueError(f"A widget with the slug '{widget.slug}' is already registered.")
+    WIDGET_REGISTRY.append(widget)
+
+def get_widget(slug: str) -> Optional[Widget]:
+    """Returns the registered widget with the given slug, or None."""
+    for widget in WIDGET_REGISTRY:
+        if widget.slug == slug:
+            return widget
+    return None
+
+
+# A process-wide, bounded pool shared by all dashboard requests, so that a burst
+# of page loads can't spawn an unbounded number of threads.
+_executor = ThreadPoolExecutor(
+    max_workers=getattr(settings, 'EMPTOUCH_WIDGET_MAX_WORKERS', 16),
+    thread_name_prefix='widget-fetch',
+)
+
+def _run_fetch(widget: Widget, user):
+    try:
+        with timed('widget_fetch_seconds', f'fetch.{widget.slug}', widget=widget.slug):
+            return widget.fetch_data_func(user)
+    finally:
+        # Worker threads get their own DB connections; don't leave them open.
+        close_old_connections()
+
+def fetch_widget_data(widgets: List[Widget], user) -> List[Tuple[Widget, dict]]:
+    """
+    Runs the widgets' fetch_data_func concurrently and returns (widget, context)
+    pairs in the original order.
+
+    Each widget gets its own deadline, measured from when all fetches started; a
+    widget that fails or misses it gets an 'error' entry in its context instead of
+    holding up the rest of the page. A timed-out fetch keeps running in the
+    background but its result is discarded.
+    """
+    default_timeout = getattr(settings, 'EMPTOUCH_WIDGET_TIMEOUT', 10)
+    started = time.monotonic()
+    futures = [(widget, _executor.submit(in_current_context(functools.partial(_run_fetch, widget, user))))
+               for widget in widgets]
+
+    results = []
+    for widget, future in futures:
+        timeout = widget.timeout if widget.timeout is not None else default_timeout
+        context_data = {}
+        try:
+            fetched_data = future.result(timeout=max(0, started + timeout - time.monotonic()))
+            if isinstance(fetched_data, dict):
+                context_data = fetched_data
+        except TimeoutError:
+            future.cancel()
+            logger.warning("Widget '%s' timed out after %gs.", widget.slug, timeout)
+            context_data['error'] = f"Could not load widget data: timed out after {timeout:g} seconds."
+        except Exception as e:
+            logger.warning("Widget '%s' failed to load its data.", widget.slug, exc_info=True)
+            context_data['error'] = f"Could not load widget data: {e}"
+        results.append((widget, context_data))
+    return results
+
+
+async def afetch_widget_data(widgets: List[Widget], user) -> List[Tuple[Widget, dict]]:
+    """
+    The asyncio counterpart of `fetch_widget_data`, for async dashboard views.
+
+    A fetch_data_func may be a coroutine function, which is awaited on the event
+    loop; plain functions run in a worker thread. Each widget is bounded by its
+    own timeout and failures become an 'error' entry in its context.
+    """
+    default_timeout = getattr(settings, 'EMPTOUCH_WIDGET_TIMEOUT', 10)
+
+    async def fetch(widget: Widget):
+        timeout = widget.timeout if widget.timeout is not None else default_timeout
+        func = widget.fetch_data_func
+        if not asyncio.iscoroutinefunction(func):
+            func = sync_to_async(func, thread_sensitive=False)
+        context_data = {}
+        try:
+            with timed('widget_fetch_seconds', f'fetch.{widget.slug}', widget=widget.slug):
+                fetched_data = await asyncio.wait_for(func(user), timeout)
+            if isinstance(fetched_data, dict):
+                context_data = fetched_data
+        except asyncio.TimeoutError:
+            logger.warning("Widget '%s' timed out after %gs.", widget.slug, timeout)
+            context_data['error'] = f"Could not load widget data: timed out after {timeout:g} seconds."
+        except Exception as e:
+            logger.warning("Widget '%s' failed to load its data.", widget.slug, exc_info=True)
+            context_data['error'] = f"Could not load widget data: {e}"
+        return widget, context_data
+
+    return list(await asyncio.gather(*(fetch(widget) for widget in widgets)))
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -49,6 +50,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.RequestIDMiddleware',
+    'core.middleware.ServerTimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -140,7 +143,202 @@ LOGIN_URL = 'login'
 LOGIN_REDIRECT_URL = 'dashboard'
 # After logging out, users will be sent back to the login page.
 LOGOUT_REDIRECT_URL = 'login'
+# Keys the fingerprint of each user's SIS password (core.models.SISCredential),
+# which lets a returning user's login skip the slow password hasher. Use a long
+# random value kept out of version control and out of the database. Unset, logins
+# check the password against the local hash instead.
+EMPTOUCH_SIS_FINGERPRINT_KEY = os.environ.get('EMPTOUCH_SIS_FINGERPRINT_KEY')
 
 # --- Add this at the end of the file ---
 CRISPY_ALLOWED_TEMPLATE_PACKS = "bootstrap5"
-CRISPY_TEMPLATE_PACK = "bootstrap5"
\ No newline at end of file
+CRISPY_TEMPLATE_PACK = "bootstrap5"
+
+# --- SIS SESSION POOL ---
+# Authenticated SIS sessions are kept alive between requests instead of logging
+# in and out on every request. Idle sessions are logged out after the timeout
+# (in seconds), and the least recently used ones are evicted beyond the pool size.
+EMPTOUCH_SESSION_POOL_SIZE = 200
+EMPTOUCH_SESSION_IDLE_TIMEOUT = 15 * 60
+
+# Authenticated SIS cookie jars can be encrypted and shared between worker processes
+# through a store, so a request landing on another worker doesn't log in again.
+# Disabled by default, since the default cache is per-process. To enable it, set
+# EMPTOUCH_COOKIE_STORE_KEY and point 'cache_alias' at a cache shared by all
+# workers (Redis, Memcached or DatabaseCache):
+#
+# EMPTOUCH_COOKIE_STORE = {
+#     'BACKEND': 'core.cookie_store.CacheCookieJarStore',
+#     'OPTIONS': {
+#         'cache_alias': 'shared',
+#     },
+# }
+EMPTOUCH_COOKIE_STORE = None
+# Encrypts the shared cookie jars. Use long random values kept out of version
+# control; list several, comma-separated, to rotate: jars are encrypted with the
+# first and any of them decrypts. The store refuses to start without one.
+EMPTOUCH_COOKIE_STORE_KEY = [key for key in os.environ.get('EMPTOUCH_COOKIE_STORE_KEY', '').split(',') if key]
+
+# --- HTML PARSING ---
+# The backend used to parse SIS pages: 'html.parser' (pure Python, always available),
+# 'lxml' or 'selectolax' (C-based and much faster; require the matching package).
+# Individual endpoints can override this with Endpoint(parser_backend=...).
+EMPTOUCH_PARSER_BACKEND = 'html.parser'
+
+# --- DASHBOARD ---
+# Widget data is fetched concurrently on a shared thread pool of this size. A widget
+# that takes longer than the timeout (in seconds) renders an error placeholder;
+# individual widgets can override it with Widget(timeout=...).
+EMPTOUCH_WIDGET_MAX_WORKERS = 16
+EMPTOUCH_WIDGET_TIMEOUT = 10
+
+# --- RESPONSE CACHE ---
+# Parsed results of endpoints that declare a cache_ttl are stored in this cache.
+EMPTOUCH_RESPONSE_CACHE_ALIAS = 'default'
+
+# --- ASYNC VIEWS ---
+# Serve the dashboard and SIS explorer from async views that talk to the SIS with
+# httpx instead of blocking a thread per request. Only worthwhile when running
+# under ASGI (emptouch.asgi) and requires the 'httpx' package.
+EMPTOUCH_ASYNC_VIEWS = False
+
+# --- BATCH REQUESTS ---
+# Maximum number of requests EmpowerClient.get_many/post_many keep in flight at once.
+EMPTOUCH_BATCH_MAX_CONCURRENCY = 4
+
+# --- SIS RATE LIMITING ---
+# Limits on outgoing SIS traffic: a token bucket ('rate' requests/second with
+# bursts of 'burst') and a 'max_in_flight' cap, per host by default and optionally
+# tighter per fuseaction. A request waits up to 'MAX_WAIT' seconds for its turn
+# before failing with RateLimitExceeded. LocalRateLimitBackend shares the limits
+# between the threads of one worker; use core.ratelimit.CacheRateLimitBackend with
+# OPTIONS {'cache_alias': ...} to share them between workers through a common cache.
+# Set to None to disable rate limiting.
+EMPTOUCH_RATE_LIMIT = {
+    'BACKEND': 'core.ratelimit.LocalRateLimitBackend',
+    'OPTIONS': {},
+    'MAX_WAIT': 5,
+    'DEFAULT': {'rate': 10, 'burst': 20, 'max_in_flight': 16},
+    'HOSTS': {},
+    'FUSEACTIONS': {},
+}
+
+# --- SIS RESILIENCE ---
+# Connect/read timeouts (seconds) for every SIS request.
+EMPTOUCH_SIS_TIMEOUT = {
+    'CONNECT': 5,
+    'READ': 30,
+}
+# GETs that time out, can't connect or get a 5xx are retried up to 'TOTAL' times,
+# waiting a random delay of up to BACKOFF * 2**attempt (capped at MAX_BACKOFF) seconds.
+EMPTOUCH_SIS_RETRIES = {
+    'TOTAL': 2,
+    'BACKOFF': 0.5,
+    'MAX_BACKOFF': 8,
+}
+# After FAILURE_THRESHOLD consecutive failures, requests to the SIS fail fast with
+# CircuitOpenError for RESET_TIMEOUT seconds before a single probe is let through.
+EMPTOUCH_SIS_CIRCUIT_BREAKER = {
+    'FAILURE_THRESHOLD': 5,
+    'RESET_TIMEOUT': 30,
+}
+
+# --- SIS TRANSPORT ---
+# Keep-alive connections to the SIS live in one pool shared by all clients of a
+# worker. 'POOL_MAXSIZE' is how many connections are kept per host: size it to the
+# worker's peak concurrent SIS requests (EMPTOUCH_RATE_LIMIT's max_in_flight).
+# With 'POOL_BLOCK' True, requests beyond it wait for a free connection instead of
+# opening a throwaway one. 'POOL_CONNECTIONS' is the number of hosts pooled.
+EMPTOUCH_SIS_CONNECTION_POOL = {
+    'POOL_CONNECTIONS': 4,
+    'POOL_MAXSIZE': 16,
+    'POOL_BLOCK': False,
+}
+
+# --- LOGGING ---
+# Application logs go through the standard logging module. Every record carries
+# the correlation ID of the request that produced it (set by RequestIDMiddleware
+# and echoed in the X-Request-ID response header). Set EMPTOUCH_LOG_LEVEL=DEBUG
+# to trace SIS traffic; at the default level debug messages cost nothing.
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'filters': {
+        'request_id': {
+            '()': 'core.correlation.RequestIDFilter',
+        },
+    },
+    'formatters': {
+        'verbose': {
+            'format': '{asctime} {levelname} {name} [{request_id}] {message}',
+            'style': '{',
+        },
+    },
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+            'filters': ['request_id'],
+            'formatter': 'verbose',
+        },
+    },
+    'loggers': {
+        'core': {
+            'handlers': ['console'],
+            'level': os.environ.get('EMPTOUCH_LOG_LEVEL', 'INFO'),
+            'propagate': False,
+        },
+        'testing': {
+            'handlers': ['console'],
+            'level': os.environ.get('EMPTOUCH_LOG_LEVEL', 'INFO'),
+            'propagate': False,
+        },
+    },
+}
+
+# --- METRICS ---
+# Where timings (SIS network, page parsing, widget fetch/render, whole requests)
+# and counters are reported. InMemoryMetricsSink keeps them per process and serves
+# them at /metrics/ in the Prometheus format; core.metrics.StatsDMetricsSink with
+# OPTIONS {'host': ..., 'port': ...} sends them to StatsD instead. None disables them.
+EMPTOUCH_METRICS = {
+    'BACKEND': 'core.metrics.InMemoryMetricsSink',
+    'OPTIONS': {},
+}
+# Adds a Server-Timing header breaking each response's time down into SIS network,
+# parsing and rendering, visible in the browser's developer tools. Every client,
+# logged in or not, sees these timings, so it is only on in development.
+EMPTOUCH_SERVER_TIMING = DEBUG
+# Lets a scraper read /metrics/ without a staff login by sending
+# 'Authorization: Bearer <token>'. Unset, only staff users can read it.
+EMPTOUCH_METRICS_TOKEN = os.environ.get('EMPTOUCH_METRICS_TOKEN')
+
+# --- SIS LOCATION ---
+# Where the SIS lives. Point both at a local fake SIS (manage.py runfakesis) to
+# develop or benchmark without touching the production system, e.g.
+#   EMPTOUCH_SIS_NAVIGATION_URL=http://127.0.0.1:8001/empower/fusebox.cfm
+#   EMPTOUCH_SIS_AUTH_URL=http://127.0.0.1:8001/ptl-includes/authentication/auth-onlogin.cfm
+EMPTOUCH_SIS_NAVIGATION_URL = os.environ.get(
+    'EMPTOUCH_SIS_NAVIGATION_URL', 'https://aubg.empower-xl.com/empower/fusebox.cfm')
+EMPTOUCH_SIS_AUTH_URL = os.environ.get(
+    'EMPTOUCH_SIS_AUTH_URL', 'https://aubg.empower-xl.com/ptl-includes/authentication/auth-onlogin.cfm')
+
+# --- SIS RECORD / REPLAY ---
+# With MODE 'record', every SIS request and response is appended to the cassette
+# at PATH (gzipped JSON lines, without passwords or cookies); with 'replay', they
+# are served back from it and nothing reaches the network. Leave MODE unset for
+# normal operation. Cassettes contain real SIS pages; don't commit them.
+EMPTOUCH_SIS_CASSETTE = {
+    'MODE': os.environ.get('EMPTOUCH_SIS_CASSETTE_MODE'),
+    'PATH': os.environ.get('EMPTOUCH_SIS_CASSETTE_PATH', str(BASE_DIR / 'cassettes' / 'sis.jsonl.gz')),
+}
+
+# --- SIS SYNC ---
+# Specs registered with core.sync mirror SIS pages into the database, so pages can
+# read them locally. ON_LOGIN queues a sync of the user's stale specs right after
+# login, on at most MAX_WORKERS threads; `manage.py syncsis` syncs users with a
+# live SIS session on a schedule. INTERVAL is the default seconds between syncs
+# of the same data.
+EMPTOUCH_SYNC = {
+    'ON_LOGIN': True,
+    'MAX_WORKERS': 2,
+    'INTERVAL': 60 * 60,
+}
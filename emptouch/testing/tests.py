@@ -1,3 +1,60 @@
-from django.test import TestCase
+# testing/tests.py
+from asgiref.sync import async_to_sync
+from django.test import SimpleTestCase
 
-# Create your tests here.
+from .views import NO_REQUEST_ERROR, RawHtmlParser, explorer_call
+
+
+class RecordingClient:
+    """Records the request an explorer call makes instead of sending it."""
+
+    def get(self, endpoint, parser_class):
+        return ('get', endpoint.fuseaction, parser_class)
+
+    def post(self, endpoint, payload, parser_class):
+        return ('post', endpoint.fuseaction, payload)
+
+    def ajax_post(self, initial_endpoint, token_name, cfc_url, method, payload, parser_class):
+        return ('ajax_post', initial_endpoint.fuseaction, token_name, cfc_url, method, payload)
+
+
+class AsyncRecordingClient(RecordingClient):
+
+    async def get(self, *args):
+        return super().get(*args)
+
+
+class ExplorerCallTests(SimpleTestCase):
+
+    def test_fuseaction_without_payload_is_a_get(self):
+        call, error = explorer_call({'fuseaction': 'STUDENT.GRADES', 'payload': ''})
+
+        self.assertIsNone(error)
+        self.assertEqual(call(RecordingClient()), ('get', 'STUDENT.GRADES', RawHtmlParser))
+
+    def test_fuseaction_with_payload_is_a_post(self):
+        call, _ = explorer_call({'fuseaction': 'STUDENT.SEARCH', 'payload': 'term = 2024FA\nbad line'})
+
+        self.assertEqual(call(RecordingClient()), ('post', 'STUDENT.SEARCH', {'term': '2024FA'}))
+
+    def test_ajax_fields_make_an_ajax_post_without_the_typed_token(self):
+        call, _ = explorer_call({
+            'initial_fuseaction': 'STUDENT.SEARCH', 'token_name': 'token', 'cfc_url': '/x.cfc',
+            'cfc_method': 'Find', 'fuseaction': 'ignored', 'payload': 'token=stale\nq=smith',
+        })
+
+        self.assertEqual(call(RecordingClient()), ('ajax_post', 'STUDENT.SEARCH', 'token', '/x.cfc', 'Find', {'q': 'smith'}))
+
+    def test_incomplete_form_is_an_error(self):
+        call, error = explorer_call({'initial_fuseaction': 'STUDENT.SEARCH', 'fuseaction': '', 'payload': ''})
+
+        self.assertIsNone(call)
+        self.assertEqual(error, NO_REQUEST_ERROR)
+
+    def test_call_returns_an_awaitable_for_async_clients(self):
+        call, _ = explorer_call({'fuseaction': 'STUDENT.GRADES', 'payload': ''})
+
+        async def run():
+            return await call(AsyncRecordingClient())
+
+        self.assertEqual(async_to_sync(run)(), ('get', 'STUDENT.GRADES', RawHtmlParser))
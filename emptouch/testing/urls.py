@@ -1,7 +1,11 @@
 # testing/urls.py
+from django.conf import settings
 from django.urls import path
-from .views import TestingView
+from .views import AsyncTestingView, TestingView
+
+# Serve the async view when the project runs under ASGI with async views enabled.
+testing_view = AsyncTestingView if getattr(settings, 'EMPTOUCH_ASYNC_VIEWS', False) else TestingView
 
 urlpatterns = [
-    path('', TestingView.as_view(), name='testing_page'),
+    path('', testing_view.as_view(), name='testing_page'),
 ]
\ No newline at end of file
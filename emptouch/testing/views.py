@@ -1,17 +1,69 @@
 # testing/views.py
+import logging
+
+from asgiref.sync import sync_to_async
 from django.shortcuts import render
 from django.views import View
 from django.contrib.auth.mixins import LoginRequiredMixin
-from core.client import EmpowerClient
+from core.views import AsyncLoginRequiredMixin
 from core.endpoints import Endpoint
 from core.parsers import BaseParser
+from core.sessions import session_pool
 from .forms import FuseActionForm
 
+logger = logging.getLogger(__name__)
+
 
 class RawHtmlParser(BaseParser):
     """A simple parser that just returns the prettified HTML content."""
     def parse(self):
-        return self.soup.prettify()
+        return self.document.prettify()
+
+# Shown when neither the standard nor all four AJAX fields were filled in.
+NO_REQUEST_ERROR = "You must provide either a Standard Fuseaction or all four AJAX fields."
+NO_PASSWORD_ERROR = "SIS password not found in session. Please log out and log back in."
+
+
+def parse_payload(payload_str):
+    """Turns the form's 'key=value' lines into a payload dict."""
+    payload_dict = {}
+    if payload_str:
+        for line in payload_str.strip().split('\n'):
+            if '=' in line: key, value = line.split('=', 1); payload_dict[key.strip()] = value.strip()
+    return payload_dict
+
+def explorer_call(cleaned_data):
+    """
+    Works out the SIS request an explorer form asks for.
+
+    Returns:
+        A (call, error) pair. `call` takes an EmpowerClient or AsyncEmpowerClient
+        and makes the request, returning its result (or, for the async client, an
+        awaitable of it); it is None, with `error` explaining why, if the form
+        doesn't describe a request.
+    """
+    initial_fuseaction = cleaned_data.get('initial_fuseaction')
+    token_name = cleaned_data.get('token_name')
+    cfc_url = cleaned_data.get('cfc_url')
+    cfc_method = cleaned_data.get('cfc_method')
+    fuseaction = cleaned_data.get('fuseaction')
+    payload_dict = parse_payload(cleaned_data.get('payload', ''))
+
+    if initial_fuseaction and token_name and cfc_url and cfc_method:
+        # --- This is the two-step AJAX request ---
+        initial_endpoint = Endpoint(fuseaction=initial_fuseaction)
+        # We don't need to pass the token in the payload here, the client does it.
+        payload_dict.pop('token', None)
+        return (lambda client: client.ajax_post(initial_endpoint, token_name, cfc_url, cfc_method,
+                                                payload_dict, RawHtmlParser)), None
+    if fuseaction:
+        # This is a standard request
+        endpoint = Endpoint(fuseaction=fuseaction)
+        if payload_dict:
+            return (lambda client: client.post(endpoint, payload_dict, RawHtmlParser)), None
+        return (lambda client: client.get(endpoint, RawHtmlParser)), None
+    return None, NO_REQUEST_ERROR
+
 
 class TestingView(LoginRequiredMixin, View):
     template_name = 'testing/testing_page.html'
@@ -26,41 +78,47 @@ class TestingView(LoginRequiredMixin, View):
         result_html = None; error = None
 
         if form.is_valid():
-            initial_fuseaction = form.cleaned_data.get('initial_fuseaction')
-            token_name = form.cleaned_data.get('token_name')
-            cfc_url = form.cleaned_data.get('cfc_url')
-            cfc_method = form.cleaned_data.get('cfc_method')
-            fuseaction = form.cleaned_data.get('fuseaction')
-            payload_str = form.cleaned_data.get('payload', '')
-
-            payload_dict = {}
-            if payload_str:
-                for line in payload_str.strip().split('\n'):
-                    if '=' in line: key, value = line.split('=', 1); payload_dict[key.strip()] = value.strip()
-            
-            try:
-                sis_password = request.session.get('sis_password')
-                if not sis_password: raise Exception("SIS password not found in session. Please log out and log back in.")
-
-                with EmpowerClient(request.user.username, sis_password) as client:
-                    
-                    if initial_fuseaction and token_name and cfc_url and cfc_method:
-                        # --- This is the new two-step AJAX request ---
-                        initial_endpoint = Endpoint(fuseaction=initial_fuseaction)
-                        # We don't need to pass the token in the payload here, the client does it.
-                        if 'token' in payload_dict:
-                            del payload_dict['token']
-                        result_html = client.ajax_post(initial_endpoint, token_name, cfc_url, cfc_method, payload_dict, RawHtmlParser)
-                    elif fuseaction:
-                        # This is a standard request
-                        endpoint = Endpoint(fuseaction=fuseaction)
-                        if payload_dict: result_html = client.post(endpoint, payload_dict, RawHtmlParser)
-                        else: result_html = client.get(endpoint, RawHtmlParser)
-                    else:
-                        error = "You must provide either a Standard Fuseaction or all four AJAX fields."
-
-            except Exception as e:
-                error = f"An error occurred: {e}"
+            call, error = explorer_call(form.cleaned_data)
+            if call is not None:
+                try:
+                    sis_password = request.session.get('sis_password')
+                    if not sis_password: raise Exception(NO_PASSWORD_ERROR)
+
+                    with session_pool.session(request.user, sis_password) as client:
+                        result_html = call(client)
+                except Exception as e:
+                    logger.info("SIS explorer request failed.", exc_info=True)
+                    error = f"An error occurred: {e}"
+
+        context = {'form': form, 'result_html': result_html, 'error': error}
+        return render(request, self.template_name, context)
+
+class AsyncTestingView(AsyncLoginRequiredMixin, View):
+    """The async version of TestingView, used when EMPTOUCH_ASYNC_VIEWS is enabled."""
+    template_name = TestingView.template_name
+    form_class = FuseActionForm
+
+    async def get(self, request, *args, **kwargs):
+        form = self.form_class()
+        return await sync_to_async(render)(request, self.template_name, {'form': form})
+
+    async def post(self, request, *args, **kwargs):
+        form = self.form_class(request.POST)
+        result_html = None; error = None
+
+        if form.is_valid():
+            call, error = explorer_call(form.cleaned_data)
+            if call is not None:
+                try:
+                    sis_password = await request.session.aget('sis_password')
+                    if not sis_password: raise Exception(NO_PASSWORD_ERROR)
+
+                    user = await request.auser()
+                    async with session_pool.async_session(user, sis_password) as client:
+                        result_html = await call(client)
+                except Exception as e:
+                    logger.info("SIS explorer request failed.", exc_info=True)
+                    error = f"An error occurred: {e}"
 
         context = {'form': form, 'result_html': result_html, 'error': error}
-        return render(request, self.template_name, context)
\ No newline at end of file
+        return await sync_to_async(render)(request, self.template_name, context)